@@ -1,54 +1,556 @@
-from pandas import DataFrame, MultiIndex, read_excel, ExcelWriter, set_option
-set_option('display.max_columns', 500)
+from pandas import DataFrame, MultiIndex, ExcelWriter
+from numpy import zeros, array, int32
 from pathlib import Path
-from random import choice
+from random import Random
 from itertools import product
-from os import system, getlogin
+from os import system, getlogin, name as osName
+from argparse import ArgumentParser
+from json import load as loadJson
 from time import sleep
+from sys import stderr
+from contextlib import redirect_stdout
+from collections import defaultdict
+from solver import BacktrackingScheduler, SchedulingInfeasible, matchRooms
+from optimizer import LocalSearchOptimizer
+from partition import scheduleComponents, groupResources as semesterResources
+from portfolio import runPortfolio
+from journal import PlacementJournal
+from timemodel import TimeModel, InvalidTimeslots
+from service import ScheduleService
+from instrumentation import RunStats
+from cache import ScheduleCache
+from loader import loadTimetableData, compileAvailability, TIMETABLECOLUMNS, OPTIONALCOLUMNS, ROOMSCOLUMNS, UNAVAILABLECOLUMNS, InvalidTimetableData
+from feasibility import checkFeasibility, InfeasibleTimetableData
+from export import writeWorkbook, placementRecords, writePlacements, writeSeparateFiles, TimetableStream, FOLDERS
+
+
+class RoomCatalog:
+    def __init__(self, classesData, BESTFIT=True):
+        """Every room of the Rooms sheet as a bit of an integer, grouped into pools by type and capacity once so that sets of rooms
+        can be found and intersected with bitwise operations
+
+        Args:
+            classesData (pd.DataFrame): normalized Rooms sheet
+            BESTFIT (bool, optional): when every room of the exact capacity is taken, fall back to the free rooms with the smallest
+                capacity above it. Defaults to True.
+        """
+
+        self.rooms = list(classesData['Room_No']) # bit number -> room number
+        self.bits = defaultdict(int) # room number -> bit of the room
+        self.pools = defaultdict(int) # (type, capacity) -> bits of its rooms
+        for roomNo, (room, capacity, roomType) in enumerate(zip(classesData['Room_No'], classesData['Capacity'], classesData['Type'])):
+            self.bits[room] |= 1 << roomNo
+            self.pools[(roomType, capacity)] |= 1 << roomNo
+
+        self.BESTFIT = BESTFIT
+        self.fits = dict() # (type, capacity) -> pools that fit, best first
+
+
+    def mask(self, rooms):
+        """Bits of the given room numbers, rooms that aren't in the Rooms sheet are left out"""
+
+        mask = 0
+        for room in rooms:
+            mask |= self.bits.get(room, 0)
+
+        return mask
+
+
+    def roomsIn(self, mask):
+        """Room numbers of the set bits, in the order of the Rooms sheet"""
+
+        # bit by bit operations on the whole mask would copy it for every room, which adds up with thousands of rooms
+        bits, rooms = bin(mask)[:1:-1], [] # lowest bit first
+        roomNo = bits.find('1')
+        while roomNo != -1:
+            rooms.append(self.rooms[roomNo])
+            roomNo = bits.find('1', roomNo + 1)
+
+        return rooms
+
+
+    def poolMasks(self, roomType, capacity):
+        """Pools of rooms a class of that type and capacity can be held in, the exact capacity first and then the next biggest ones
+
+        Args:
+            roomType (str): 'Class' or 'Lab'
+            capacity (int): capacity the class needs
+
+        Returns:
+            list(int): bits of the rooms of every pool that fits, best fit first
+        """
+
+        if (roomType, capacity) not in self.fits:
+            capacities = sorted(capacity_ for roomType_, capacity_ in self.pools if roomType_ == roomType and capacity_ >= capacity)
+            if not self.BESTFIT:
+                capacities = [capacity_ for capacity_ in capacities if capacity_ == capacity]
+            self.fits[(roomType, capacity)] = [self.pools[(roomType, capacity_)] for capacity_ in capacities]
+
+        return self.fits[(roomType, capacity)]
+
+
+    def fittingRooms(self, roomType, capacity):
+        """Room numbers a class of that type and capacity can be held in, best fit first"""
+
+        return [room for mask in self.poolMasks(roomType, capacity) for room in self.roomsIn(mask)]
+
+
+class SlotOccupancy:
+    def __init__(self, NULLVALUE='', catalog=None, unavailable=None, slotNos=None):
+        """Central index of every room and teacher/TA that is busy in each (day, timeslot) across all the timetables generated so far
+
+        Args:
+            NULLVALUE (str, optional): Value used for empty cells, never indexed as a room or teacher. Defaults to ''.
+            catalog (RoomCatalog, optional): Rooms to also keep busy bits of for every (day, timeslot). Defaults to None.
+            unavailable (dict, optional): teacher/TA or room -> bits of the (day, timeslot)s it can't be used in, never free
+                then. Defaults to none.
+            slotNos (dict, optional): (day, time) -> bit of that (day, timeslot) in the unavailable bits. Defaults to None.
+        """
+
+        self.NULLVALUE = NULLVALUE
+        self.catalog = catalog
+        self.busyRooms = defaultdict(set) # (day, time) -> set of room numbers
+        self.busyRoomBits = defaultdict(int) # (day, time) -> catalog bits of the busy rooms
+        self.busyTeachers = defaultdict(set) # (day, time) -> set of teachers/TAs
+        self.unavailable = unavailable or dict()
+        self.slotNos = slotNos or dict()
+
+        self.closedRoomBits = defaultdict(int) # (day, time) -> catalog bits of the rooms that can't be used then
+        if catalog is not None:
+            for room, bits in self.unavailable.items():
+                if room in catalog.bits:
+                    for slot, slotNo in self.slotNos.items():
+                        if bits >> slotNo & 1:
+                            self.closedRoomBits[slot] |= catalog.bits[room]
+
+
+    def splitNames(self, value):
+        """Split comma-joined rooms/teachers (as used for track cores) into their individual values
+
+        Args:
+            value (str): single or comma-joined room/teacher value
+
+        Returns:
+            list: list of individual non-blank values
+        """
+
+        return [name.strip() for name in str(value).split(',') if name.strip() not in ('', self.NULLVALUE)]
+
+
+    def book(self, day, time, teacher, room):
+        """Mark the teacher(s) and room(s) as busy for that day and timeslot
+
+        Args:
+            day (str): Day of the week
+            time (str): Timeslot
+            teacher (str): Name of the teacher/TA, or comma-joined names
+            room (str): room no., or comma-joined room numbers
+        """
+
+        self.busyTeachers[(day, time)].update(self.splitNames(teacher))
+        self.busyRooms[(day, time)].update(self.splitNames(room))
+        if self.catalog is not None:
+            self.busyRoomBits[(day, time)] |= self.catalog.mask(self.splitNames(room))
+
+
+    def release(self, day, time, teacher, room):
+        """Mark the teacher(s) and room(s) as free again for that day and timeslot, undoing book
+
+        Args:
+            day (str): Day of the week
+            time (str): Timeslot
+            teacher (str): Name of the teacher/TA, or comma-joined names
+            room (str): room no., or comma-joined room numbers
+        """
+
+        self.busyTeachers[(day, time)].difference_update(self.splitNames(teacher))
+        self.busyRooms[(day, time)].difference_update(self.splitNames(room))
+        if self.catalog is not None:
+            self.busyRoomBits[(day, time)] &= ~self.catalog.mask(self.splitNames(room))
+
+
+    def available(self, day, times, names):
+        """Check that none of the teachers/TAs or rooms is unavailable in any of the timeslots of that day, a single bitwise
+        test per name
+
+        Args:
+            day (str): Day of the week
+            times (list(str)): Timeslots
+            names (str): teacher/TA or room, or comma-joined ones
+        """
+
+        if not self.unavailable:
+            return True
+
+        bits = 0
+        for time in times:
+            bits |= 1 << self.slotNos[(day, time)]
+
+        return not any(self.unavailable.get(name, 0) & bits for name in self.splitNames(names))
+
+
+    def roomFree(self, day, time, room):
+        """Check if every given room is free and not closed for that day and timeslot"""
+
+        busyRooms = self.busyRooms.get((day, time), ())
+        return all(room_ not in busyRooms for room_ in self.splitNames(room)) and self.available(day, [time], room)
+
+
+    def teacherFree(self, day, time, teacher):
+        """Check if every given teacher/TA is free and available for that day and timeslot"""
+
+        busyTeachers = self.busyTeachers.get((day, time), ())
+        return all(teacher_ not in busyTeachers for teacher_ in self.splitNames(teacher)) and self.available(day, [time], teacher)
+
+
+    def freeRooms(self, day, time, rooms):
+        """Filter a list of rooms down to the ones that are free for that day and timeslot
+
+        Args:
+            day (str): Day of the week
+            time (str): Timeslot
+            rooms (list): list of room numbers
+
+        Returns:
+            list: list of free room numbers
+        """
+
+        busyRooms = self.busyRooms.get((day, time), ())
+        return [room for room in rooms if room not in busyRooms and self.available(day, [time], room)]
+
+
+    def freeRoomBits(self, day, time, mask):
+        """Catalog bits of the rooms in the mask that are free and not closed for that day and timeslot"""
+
+        return mask & ~(self.busyRoomBits.get((day, time), 0) | self.closedRoomBits.get((day, time), 0))
+
+
+class StringTable:
+    def __init__(self, NULLVALUE=''):
+        """Interned strings shared by all timetable grids so that cells can be stored as integer codes
+
+        Args:
+            NULLVALUE (str, optional): Value used for empty cells, always interned as code 0. Defaults to ''.
+        """
+
+        self.strings = [NULLVALUE]
+        self.codes = {NULLVALUE: 0}
+
+
+    def intern(self, value):
+        """Get the integer code of a string, adding it to the table if it is new
+
+        Args:
+            value (str): string to intern
+
+        Returns:
+            int: code of the string
+        """
+
+        value = str(value)
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.strings)
+            self.strings.append(value)
+
+        return code
+
+
+class TimetableGrid:
+    DETAILS = ['Subject', 'Teacher', 'Room']
+
+    def __init__(self, timeIndex, dayIndex, strings):
+        """Compact timetable stored as an integer-coded array of shape (days, timeslots, details) used during generation
+
+        Args:
+            timeIndex (dict): timeslot -> position of the timeslot
+            dayIndex (dict): day -> position of the day
+            strings (StringTable): interned strings shared between all grids
+        """
+
+        self.timeIndex = timeIndex
+        self.dayIndex = dayIndex
+        self.strings = strings
+        self.cells = zeros((len(dayIndex), len(timeIndex), len(self.DETAILS)), dtype=int32)
+
+
+    def get(self, day, time, detail):
+        """Get the value of a single cell
+
+        Args:
+            day (str): Day of the week
+            time (str): Timeslot
+            detail (str): 'Subject', 'Teacher' or 'Room'
+
+        Returns:
+            str: value of the cell
+        """
+
+        return self.strings.strings[self.cells[self.dayIndex[day], self.timeIndex[time], self.DETAILS.index(detail)]]
+
+
+    def isEmpty(self, day, time):
+        """Check if nothing has been allocated in that day and timeslot yet"""
+
+        return not self.cells[self.dayIndex[day], self.timeIndex[time]].any()
+
+
+    def set(self, day, time, subject, teacher, room):
+        """Allocate a subject, teacher and room into a day and timeslot
+
+        Args:
+            day (str): Day of the week
+            time (str): Timeslot
+            subject (str): Name of the subject
+            teacher (str): Name of the teacher/TA
+            room (str): room/lab number
+        """
+
+        intern = self.strings.intern
+        self.cells[self.dayIndex[day], self.timeIndex[time]] = (intern(subject), intern(teacher), intern(room))
+
+
+    def toDataFrame(self):
+        """Convert the grid into the exported timetable layout with (Time, Details) rows and days as columns
+
+        Returns:
+            pd.DataFrame: timetable dataframe
+        """
+
+        values = array(self.strings.strings, dtype=object)[self.cells] # (days, timeslots, details)
+        index = MultiIndex.from_product([list(self.timeIndex), self.DETAILS], names=['Time', 'Details'])
+        return DataFrame(data=values.transpose(1, 2, 0).reshape(len(index), len(self.dayIndex)), index=index, columns=list(self.dayIndex))
+
+
+    def rows(self):
+        """Rows of the timetable in the exported layout, without building a DataFrame
+
+        Yields:
+            list: time (only on the first detail of a timeslot), detail and the value for every day
+        """
+
+        strings = self.strings.strings
+        for time, timeNo in self.timeIndex.items():
+            for detailNo, detail in enumerate(self.DETAILS):
+                yield [time if detailNo == 0 else None, detail] + [strings[code] for code in self.cells[:, timeNo, detailNo]]
+
+
+    def placements(self):
+        """Every allocated (day, timeslot) of the timetable
+
+        Yields:
+            dict: day, time, subject, teacher and room
+        """
+
+        strings = self.strings.strings
+        days, times = list(self.dayIndex), list(self.timeIndex)
+        for dayNo, timeNo in zip(*self.cells[:, :, 0].nonzero()):
+            subject, teacher, room = (strings[code] for code in self.cells[dayNo, timeNo])
+            yield {'day': days[dayNo], 'time': times[timeNo], 'subject': subject, 'teacher': teacher, 'room': room}
+
+
+    def gaps(self, openSlots=None):
+        """Count the free timeslots in between the first and last class of every day
+
+        Args:
+            openSlots (np.ndarray, optional): (days, timeslots) booleans of the timeslots each day has, the others aren't
+                counted as free. Defaults to every timeslot.
+        """
+
+        gaps = 0
+        for dayNo, occupied in enumerate(self.cells[:, :, 0] != 0): # every day
+            timeNos = occupied.nonzero()[0]
+            if len(timeNos) > 0:
+                span = slice(timeNos[0], timeNos[-1] + 1)
+                gaps += (span.stop - span.start if openSlots is None else openSlots[dayNo, span].sum()) - len(timeNos)
+
+        return int(gaps)
+
+
+    def __str__(self):
+        return str(self.toDataFrame())
+
+
+class PendingHours:
+    def __init__(self, semesterData, subjectTypes, random):
+        """Remaining hours of every (subject, type of lecture) for a batch that are yet to be allocated on the timetable
+
+        Every remaining hour is kept as a token in a list per type of lecture, so checking if everything is allocated,
+        sampling a random subject weighted by its remaining hours and placing hours are all constant time
+
+        Args:
+            semesterData (pd.DataFrame): Pandas Dataframe which contains data for that specific semester
+            subjectTypes (list(str)): types of lectures to keep track of
+            random (random.Random): random number generator used for sampling
+        """
+
+        self.random = random
+        self.remaining = dict() # (subject, subjectType) -> remaining hours
+        self.tokens = {subjectType: [] for subjectType in subjectTypes} # subjectType -> one subject per remaining hour
+        self.positions = dict() # (subject, subjectType) -> positions of that subject's tokens
+
+        for subjectType in subjectTypes:
+            for subject, hours in semesterData[subjectType].items():
+                if hours > 0:
+                    tokens = self.tokens[subjectType]
+                    self.remaining[(subject, subjectType)] = int(hours)
+                    self.positions[(subject, subjectType)] = set(range(len(tokens), len(tokens) + int(hours)))
+                    tokens.extend([subject] * int(hours))
+
+
+    def hours(self, subject, subjectType):
+        """Remaining hours of a subject for that type of lecture"""
+
+        return self.remaining.get((subject, subjectType), 0)
+
+
+    def count(self, subjectTypes):
+        """Total remaining hours for the given types of lectures"""
+
+        return sum(len(self.tokens[subjectType]) for subjectType in subjectTypes)
+
+
+    def done(self, subjectTypes):
+        """Check if every hour of the given types of lectures has been allocated"""
+
+        return self.count(subjectTypes) == 0
+
+
+    def sample(self, subjectTypes):
+        """Pick a random subject and type of lecture, weighted by the remaining hours
+
+        Args:
+            subjectTypes (list(str)): types of lectures to pick from
+
+        Returns:
+            (str, str): random subject and its type of lecture
+        """
+
+        tokenNo = self.random.randrange(self.count(subjectTypes))
+        for subjectType in subjectTypes:
+            if tokenNo < len(self.tokens[subjectType]):
+                return self.tokens[subjectType][tokenNo], subjectType
+            tokenNo -= len(self.tokens[subjectType])
+
+
+    def place(self, subject, subjectType, hours=1):
+        """Mark hours of a subject as allocated
+
+        Args:
+            subject (str): Name of the subject
+            subjectType (str): Type of lecture for that subject
+            hours (int, optional): Number of hours allocated. Defaults to 1.
+        """
+
+        key = (subject, subjectType)
+        tokens = self.tokens[subjectType]
+        for _ in range(min(hours, self.hours(subject, subjectType))):
+            position = self.positions[key].pop()
+            lastSubject = tokens.pop()
+            if position != len(tokens): # move the last token into the freed position
+                tokens[position] = lastSubject
+                self.positions[(lastSubject, subjectType)].discard(len(tokens))
+                self.positions[(lastSubject, subjectType)].add(position)
+
+            self.remaining[key] -= 1
+            if self.remaining[key] == 0:
+                del self.remaining[key], self.positions[key]
+
+
+    def __str__(self):
+        return '\n'.join(f"{subject} - {subjectType}: {hours}" for (subject, subjectType), hours in self.remaining.items())
 
 
 class Vineek:
-    def __init__(self, TIMESLOTS, DAYS, NULLVALUE=''):
-        self.DIR = Path(f"C:\\Users\\{getlogin()}\\Desktop") # get the directory to the current windows user's desktop
-        self.TIMESLOTS = TIMESLOTS
-        self.LABTIMES = self.generateLabTimes()
+    IDLESWEEPS = 200 # passes over the whole week in a row that place no lecture/tutorial before the random engine gives up on a batch
+
+    def __init__(self, TIMESLOTS, DAYS, NULLVALUE='', ENGINE='random', TIMELIMIT=60, SEED=None, FILE=None, VERBOSE=False, CACHE=None, BESTFIT=True, OPTIMIZE=0, WEIGHTS=None, PARALLEL=1, JOURNAL=None):
+        """Timetable generator, nothing is asked or printed here so it can be used headless. See interactive for the interactive program
+
+        Args:
+            TIMESLOTS (list(str) or dict): timeslots of a day, like '9:30 AM - 10:30 AM', or day -> timeslots of that day
+                when the days don't all have the same timeslots
+            DAYS (list(str)): days of the week
+            NULLVALUE (str, optional): value of empty cells. Defaults to ''.
+            ENGINE (str, optional): 'random' or 'solver'. Defaults to 'random'.
+            TIMELIMIT (int, optional): seconds the solver engine may search for a single batch. Defaults to 60.
+            SEED (int, optional): seed of the random engine. Defaults to None.
+            FILE (str, optional): path to the timetable data excel file, its folder is where the timetables are saved by default. Defaults to None.
+            VERBOSE (bool, optional): print the whole timetable after every placement. Defaults to False.
+            CACHE (str, optional): path to the schedule cache file, when given only the courses and semesters affected by an edit
+                of the excel file are generated again. Defaults to None.
+            BESTFIT (bool, optional): when every room of the needed capacity is taken, use a free room with the smallest bigger
+                capacity instead of waiting for a room of the exact capacity. Defaults to True.
+            OPTIMIZE (float, optional): seconds to spend improving gaps and heavy days of the generated timetables with the
+                local search optimizer, 0 to leave them as they were generated. Defaults to 0.
+            WEIGHTS (dict, optional): weights of the optimizer's objective, see LocalSearchOptimizer.WEIGHTS. Defaults to None.
+            PARALLEL (int, optional): worker processes generating the courses and semesters that share no teacher/TA or room
+                at the same time, None for one per core. 1 generates everything one after another like before. Defaults to 1.
+            JOURNAL (str, optional): path to the placement journal, every finished course and semester is written to it so
+                that an interrupted run carries on from there when it's started again. Defaults to None.
+        """
+
+        self.DIR = None if FILE is None else Path(FILE).parent
         self.DAYS = DAYS
+        self.times = TimeModel(TIMESLOTS, DAYS) # timeslots as minute intervals along with every lookup of them
+        self.TIMESLOTS = self.times.labels # every timeslot of every day, in order of the time of the day
+        self.slotNos = {(day, time): self.times.slotNo(dayNo, timeNo) for dayNo, day in enumerate(DAYS) for timeNo, time in enumerate(self.TIMESLOTS)} # (day, time) -> bit in week bitmasks
+        self.labTimes = dict() # (lab block length, day) -> start timeslots
+        self.LABTIMES = self.generateLabTimes() # start timeslots of 2 hour labs
         self.SUBJECTTYPES = ['Lecture_hrs', 'Lab_hrs', 'Tut_hrs']
         self.NULLVALUE = NULLVALUE
-        self.fileName = 'Time-table.xlsx'
-
-        # Rules for timetable detail data entry
-        print("Welcome to the Vineek timetable generation algorithm! Do note that if it looks like the program is stuck, simply close the window and start it up again!\n\nCredits:\nAshwin Rajesh Jawalikar\nGurvinder Kaur\n\nRules:\n- All the timetables, along with the initial excel sheet to provide the necessary data will be on the desktop. If not, the file directory path for them will be shown\n- 'Lecture_hrs', 'Tut_hrs', 'Lab_hrs' represents the amount of lectures of each respective type of lecture there is for a particular subject.\n- If a subject does not have any lab or tutorial lectures, the 'TA' column for that subject should be left as blank\n- Continuing from the previous point, put a 0 respective columns of 'Lecture_hrs', 'Lab_hrs', 'Tut_hrs' if the subject doesn't have any of those respective type of classes\n- 'Assigned_Room' and 'Assigned_Lab' columns are for pre-allocating specific rooms for a subject, either for a lecture or for a lab/tutorial session respectively\n- Please do not use the same values for 'Course_id' and 'Track_Core' columns\n- Please do make sure all variables in the 'Course_id' feature are unique as they play a integral role for track cores\n- Speaking of track cores, if a subject is common in a track core, allocate them in the same slot, assuming they also have the same teacher.\n- Try to keep the sample size small. To do this, try to only specific specific rooms to use for a specific course as the algorithm may panic and/or freeze\n- All the final outputs are in an excel format for further modifications and/or to cross reference to make more subjective changes\n -If you do wish to change the timeslots for all lectures, or even timeslots for labs as the amount of labs (assuming there are labs for the subject, are in multiples of 2) will be held consecutively, they can be changed within the code itself but in a very easy format just by editing the timeslots respectively near the end of the .py script.\n- Be gentle, she's a shy kind-hearted soul\n")
-        
-        if (self.DIR / self.fileName).is_file():
-            print(f"File found {self.DIR / self.fileName}")
-            self.subjectsData = read_excel(self.DIR / self.fileName, header=0, sheet_name='Timetable')
-            self.classesData = read_excel(self.DIR / self.fileName, header=0, sheet_name='Rooms')
-            input("Excel found for timetable data found, please make sure everything is entered correctly before pressing Enter...")
-            system('cls')
-        else:
-            self.createTTDataExcelFile()
+        self.ENGINE = ENGINE # 'random' retries random placements, 'solver' uses the backtracking constraint solver
+        self.solver = BacktrackingScheduler(self, timeLimit=TIMELIMIT)
+        self.SEED = SEED # seed of the random engine, the same seed always generates the same timetables
+        self.random = Random(SEED)
+        self.VERBOSE = VERBOSE
+        self.stats = RunStats() # attempts, rejections and time spent per phase, see stats.addHook and stats.report
+        self.CACHE = CACHE
+        self.BESTFIT = BESTFIT
+        self.catalog = None # rooms grouped by type and capacity, built once the rooms are known
+        self.unavailable = dict() # teacher/TA or room -> bits of the (day, timeslot)s it can't be used in, see slotNos
+        self.OPTIMIZE = OPTIMIZE
+        self.optimizer = LocalSearchOptimizer(self, WEIGHTS)
+        self.optimization = None # moves and scores of the last optimization
+        self.PARALLEL = PARALLEL
+        self.JOURNAL = JOURNAL
+
+        if FILE is not None:
+            self.subjectsData, self.classesData, self.unavailableData = loadTimetableData(FILE, NULLVALUE) # normalized, validated and cached
+            self.catalog = RoomCatalog(self.classesData, BESTFIT)
+            self.unavailable = compileAvailability(self.unavailableData, self.times, DAYS, NULLVALUE)
+
+        self.reset()
+
+
+    def reset(self):
+        """Clear all generated timetables and the occupancy so that a new set of timetables can be generated"""
 
         self.TIMETABLES = dict() # store lecture timetables for each batch, semester and course
+        self.timetableGroups = dict() # timetable name -> semester data of its course and semester
         self.facultyTT = dict() # store faculty timetables
         self.roomTT = dict() # store room timetables
-        self.main() # absolute war
+        self.occupancy = SlotOccupancy(self.NULLVALUE, self.catalog, self.unavailable, self.slotNos) # busy rooms and teachers for every (day, timeslot)
+        self.bookings = [] # (facultyName, day, time, subjectName, room) of every faculty/room allocation, in order
+        self.strings = StringTable(self.NULLVALUE) # interned cell values shared by all timetable grids
+        self.timeIndex = {time: timeNo for timeNo, time in enumerate(self.TIMESLOTS)}
+        self.dayIndex = {day: dayNo for dayNo, day in enumerate(self.DAYS)}
 
 
-    def createTTDataExcelFile(self):
-        """Function to create the prerequisite excel file needed for gathering appropriate data for timetable creation"""
+    @staticmethod
+    def createTTDataExcelFile(FILE):
+        """Function to create the prerequisite excel file needed for gathering appropriate data for timetable creation
 
-        timetableColumns = ['Dept_id', 'Course_id', 'Track_Core', 'Course_Name', 'Faculty', 'TA', 'Semester', 'Lecture_hrs',
-                            'Tut_hrs', 'Capacity', 'Lab_hrs', 'Lab_Capacity', 'Assigned_Room', 'Assigned_Lab']
-        roomsColumns = ['Room_No', 'Capacity', 'Type']
+        Args:
+            FILE (Path): path of the excel file to create
+        """
 
-        writer = ExcelWriter(self.DIR / self.fileName)
+        writer = ExcelWriter(FILE)
 
-        DataFrame(columns=timetableColumns).set_index(timetableColumns[0]).to_excel(writer, sheet_name='Timetable')
-        DataFrame(columns=roomsColumns).set_index(roomsColumns[0]).to_excel(writer, sheet_name='Rooms')
-        writer.save()
-        input(f'Excel file created, path: {self.DIR / self.fileName}...please input details approriately to start generating timetables. The program is now going to exit, simply start the program again after entering the necessary timetable data.')
-        exit()
+        DataFrame(columns=TIMETABLECOLUMNS + list(OPTIONALCOLUMNS)).set_index(TIMETABLECOLUMNS[0]).to_excel(writer, sheet_name='Timetable')
+        DataFrame(columns=ROOMSCOLUMNS).set_index(ROOMSCOLUMNS[0]).to_excel(writer, sheet_name='Rooms')
+        DataFrame(columns=UNAVAILABLECOLUMNS).set_index(UNAVAILABLECOLUMNS[0]).to_excel(writer, sheet_name='Unavailable')
+        writer.close()
 
 
     def emptyTimetable(self):
@@ -65,73 +567,84 @@ class Vineek:
         return emptyDatabase
 
 
-    def generateLabTimes(self):
-        """Generate a list of timeslots that can hold uninterrupted 2 hour lab sessions for subjects
+    def emptyGrid(self):
+        """Generate an empty array-backed timetable used while generating, converted to the emptyTimetable layout when saving
+
+        Returns:
+            TimetableGrid: Empty timetable grid
+        """
+
+        return TimetableGrid(self.timeIndex, self.dayIndex, self.strings)
+
+
+    def generateLabTimes(self, length=2):
+        """Generate a list of timeslots that can start uninterrupted lab sessions of that many hours for subjects on any day
+
+        Args:
+            length (int, optional): hours of the lab session. Defaults to 2.
 
         Returns:
             list: list of timeslots
         """
-        
-        labTimes = []
-        for timeslotIndex, timeslot in enumerate(self.TIMESLOTS[:-1]):
-            timeslotEndTime = timeslot.split(' - ')[-1]
-            if timeslotEndTime in self.TIMESLOTS[timeslotIndex+1]:
-                labTimes.append(timeslot)
 
-        return labTimes
-    
+        timeNos = {timeNo for dayNo in range(len(self.DAYS)) for timeNo in self.times.dayBlocks(dayNo, length)}
+        return [self.TIMESLOTS[timeNo] for timeNo in sorted(timeNos)]
 
-    def getLabTimes(self):
-        """Function that iterates through the Lab times for unique batch for each course of
 
-        Yields:
-            str: timeslot to allocate labs
+    def labStartTimes(self, length, day=None):
+        """Timeslots a lab block of that many hours can start at, see generateLabTimes
+
+        Args:
+            length (int): hours of the lab block
+            day (str, optional): only the timeslots of that day. Defaults to any day.
+
+        Returns:
+            list: list of timeslots
         """
 
-        while True:
-            for time in self.LABTIMES:
-                yield time
+        if (length, day) not in self.labTimes:
+            if day is None:
+                self.labTimes[(length, day)] = self.generateLabTimes(length)
+            else:
+                self.labTimes[(length, day)] = [self.TIMESLOTS[timeNo] for timeNo in self.times.dayBlocks(self.dayIndex[day], length)]
+
+        return self.labTimes[(length, day)]
+
+
+    def labBlockTimes(self, day, labTime, length):
+        """Every timeslot of a lab block of that many hours starting at labTime on that day"""
+
+        return [self.TIMESLOTS[timeNo] for timeNo in self.times.dayBlocks(self.dayIndex[day], length)[self.timeIndex[labTime]]]
 
 
     @staticmethod
-    def allClasssesSlotted(semesterData, subjectTypes):
+    def allClasssesSlotted(pending, subjectTypes):
         """Function to check if all the classes for a semester batch has yet to be  allocated on the timetable
 
         Args:
-            semesterData (pd.DataFrame): Dataframe of semester specific data for a course of
-            subjectTypes (pd.DataFrame): list of the type of subjects to retrieve data for each
+            pending (PendingHours): remaining hours for the semester batch
+            subjectTypes (list(string)): list of the type of subjects to check
 
         Returns:
             bool: Whether or not if there are any more lectures of all types left to allocate for all subjects in a semester
         """
 
-        for subjectType in subjectTypes:
-            for _, row in semesterData.iterrows():
-                if row[subjectType] > 0:
-                    return False
-
-        return True
+        return pending.done(subjectTypes)
 
 
     @staticmethod
-    def getRandomSubject(semesterData, subjectTypes):
-        """Func that returns a random subject and type of lecture that is yet to be alloted
+    def getRandomSubject(pending, subjectTypes):
+        """Func that returns a random subject and type of lecture that is yet to be alloted, weighted by its remaining hours
 
         Args:
-            semesterData (pd.DataFrame): Pandas Dataframe of the timetable which contains data for that specific semesterData
+            pending (PendingHours): remaining hours for the semester batch
             subjectTypes (list(string)): list of strings that contain the lecture types to be assigned for that subject
 
         Returns:
             string, string: returns a random subject and the type of lecture of that subject to be assigned
         """
 
-        subjectTypesCount = []
-        for subject in semesterData.index:
-            for subjectType in subjectTypes:
-                if semesterData.loc[subject, subjectType] > 0:
-                    subjectTypesCount.append((subject, subjectType))
-
-        randomSubject, randomSubjectType = choice(subjectTypesCount)
+        randomSubject, randomSubjectType = pending.sample(subjectTypes)
         return randomSubject, randomSubjectType
 
 
@@ -163,38 +676,84 @@ class Vineek:
             capacity (int): Capacity of the classroom/lab that the lecture needs
 
         Returns:
-            int: returns appropriate room/lab number
+            str: returns appropriate room/lab number, None if no such room is free in that timeslot
         """
 
-        classType = 'Lab' if subjectType == 'Lab_hrs' else 'Class'
-        assignedRoomLabel = f"Assigned_{'Lab' if subjectType == 'Lab_hrs' else 'Room'}"
+        pools = self.freeClasses(semesterData, subject, day, [time], subjectType, capacity)
+        return self.random.choice(pools[0]) if len(pools) > 0 else None
 
-        if semesterData.loc[subject, assignedRoomLabel] == self.NULLVALUE:
-            """FOR SUBJECTS WITH NO RESERVED ROOMS"""
-            allClasses = self.classesData[(self.classesData['Type'] == classType) & (self.classesData['Capacity'] == capacity)]['Room_No']
-            allClasses = [str(int(class_)) for class_ in allClasses]
 
-            if len(self.TIMETABLES) == 0:
-                return choice(allClasses)
-            else:
-                for prevTTData in self.TIMETABLES.values():
-                    occupiedRooms = prevTTData.loc[(time, 'Room'), day].split(',')
-                    allClasses = [class_ for class_ in allClasses if class_ not in occupiedRooms]
+    def freeClasses(self, semesterData, subject, day, times, subjectType, capacity):
+        """Function to get every room/lab the subject can use that is free in all the given timeslots
 
-                return choice(allClasses)
+        Args:
+            semesterData (pd.DataFrame): Pandas Dataframe of the timetable which contains data for that specific semesterData
+            subject (str): Name of the subject
+            day (str): Day of the week
+            times (list(str)): every timeslot the room is needed for
+            subjectType (str): Type of lecture for that subject. Can be normal lecture, tutorial or lab
+            capacity (int): Capacity of the classroom/lab that the lecture needs
 
-        else:
+        Returns:
+            list(list(str)): free rooms of every capacity that fits, best fit first and without empty lists. Only the assigned room/lab
+                if the subject has one
+        """
+
+        classType = 'Lab' if subjectType == 'Lab_hrs' else 'Class'
+        assignedRoom = semesterData.loc[subject, f"Assigned_{'Lab' if subjectType == 'Lab_hrs' else 'Room'}"]
+
+        if assignedRoom != self.NULLVALUE:
             """FOR SUBJECTS WITH RESERVED ROOMS"""
-            assignedRoom = str(semesterData.loc[subject, assignedRoomLabel])
-            if len(self.TIMETABLES) == 0:
-                return assignedRoom
-            else:
-                for prevTTData in self.TIMETABLES.values():
-                    occupiedRooms = prevTTData.loc[(time, 'Room'), day].split(',')
-                    if assignedRoom not in occupiedRooms:
-                        return assignedRoom
+            return [[assignedRoom]] if all(self.occupancy.roomFree(day, time, assignedRoom) for time in times) else []
+
+        """FOR SUBJECTS WITH NO RESERVED ROOMS"""
+        pools = []
+        for pool in self.catalog.poolMasks(classType, capacity):
+            for time in times:
+                pool = self.occupancy.freeRoomBits(day, time, pool)
+            if pool:
+                pools.append(self.catalog.roomsIn(pool))
+
+        return pools
+
+
+    def getTrackCoreClasses(self, semesterData, subjects, day, times, subjectType):
+        """Function to get a different free room/lab for every subject of a track core held together, by matching the subjects
+        to the rooms that fit them instead of picking random rooms until they differ
+
+        Args:
+            semesterData (pd.DataFrame): Pandas Dataframe of the timetable which contains data for the track core
+            subjects (list(str)): subjects held together
+            day (str): Day of the week
+            times (list(str)): every timeslot the rooms are needed for, 2 for labs
+            subjectType (str): Type of lecture for the subjects. Can be normal lecture, tutorial or lab
+
+        Returns:
+            (list(str), int): room for every subject, None if the subjects can't all get a free room, and the number of free
+                rooms found for all the subjects together
+        """
 
-            return None
+        isLab = subjectType == 'Lab_hrs'
+        trackCore = semesterData.loc[subjects[0], 'Track_Core']
+
+        candidates = []
+        for subject in subjects:
+            rooms = []
+            for poolRooms in self.freeClasses(semesterData, subject, day, times, subjectType, semesterData.loc[subject, 'Lab_Capacity' if isLab else 'Capacity']):
+                self.random.shuffle(poolRooms) # random rooms within the best fitting capacity
+                rooms += poolRooms
+            candidates.append(rooms)
+        freeRooms = sum(len(rooms) for rooms in candidates)
+
+        if not all(candidates):
+            self.stats.reject('room unavailable', day=day, time=times[0], subject=trackCore)
+            return None, freeRooms
+
+        classNos = matchRooms(candidates)
+        if classNos is None: # fewer free rooms than subjects sharing them
+            self.stats.reject('track core room collision', day=day, time=times[0], subject=trackCore)
+
+        return classNos, freeRooms
 
 
     def noClashesCheck(self, day, time, teacher, room):
@@ -210,18 +769,49 @@ class Vineek:
             bool: returns if there are clashes found or not
         """
 
-        if len(self.TIMETABLES) == 0:
-            return True
+        return self.clashReason(day, time, teacher, room) is None
 
-        else:
-            for previousTTData in self.TIMETABLES.values():
-                if (previousTTData.loc[(time, 'Room'), day] == room) or (previousTTData.loc[(time, 'Teacher'), day] == teacher):
-                    return False
 
-            return True
+    def clashReason(self, day, time, teacher, room):
+        """Function to find why a room and teacher can't be used in that timeslot for that specific day
+
+        Args:
+            day (str): Day of the week
+            time (str): Timeslot
+            teacher (str): Name of the teacher/TA
+            room (int): room no.
+
+        Returns:
+            str: 'teacher unavailable', 'room closed', 'room unavailable' or 'teacher clash', None if there are no clashes
+        """
+
+        if not self.occupancy.available(day, [time], teacher):
+            return 'teacher unavailable'
+
+        if not self.occupancy.available(day, [time], room):
+            return 'room closed'
+
+        if not self.occupancy.roomFree(day, time, room):
+            return 'room unavailable'
+
+        if not self.occupancy.teacherFree(day, time, teacher):
+            return 'teacher clash'
+
+        return None
+
+
+    def showProgress(self, timetable, pending):
+        """Print the timetable and the remaining hours after a placement, only in verbose mode"""
+
+        if self.VERBOSE:
+            print('#' * 200)
+            print(timetable)
+            print('#' * 200)
+            print(pending)
 
     def assignRoomFacultyTT(self, facultyName, day, time, subjectName, room):
-        """Function to create and allocate details into the faculty timetable for that specific teacher/TA and room number
+        """Function to allocate the teacher/TA and room number, the faculty and room timetables are made from these allocations
+        by buildViews once everything is generated
 
         Args:
             facultyName (str): Name of teacher/TA
@@ -231,129 +821,172 @@ class Vineek:
             room (int): room/lab number
         """
 
-        if facultyName not in self.facultyTT.keys():
-            self.facultyTT[facultyName] = self.emptyTimetable()
+        self.occupancy.book(day, time, facultyName, room)
+        self.bookings.append((facultyName, day, time, subjectName, room))
 
-        if room not in self.roomTT.keys():
-            self.roomTT[room] = self.emptyTimetable()
 
-        # faculty timetable
-        if (facultyName != '') or (not facultyName.isspace()): # prevent generation of faculty TT with blank names
-            self.facultyTT[facultyName].loc[(time, 'Room'), day] = room
-            self.facultyTT[facultyName].loc[(time, 'Subject'), day] = subjectName
-            self.facultyTT[facultyName].loc[(time, 'Teacher'), day]  = facultyName
+    def buildViews(self):
+        """Make the faculty and room timetables in a single pass over every faculty/room allocation"""
 
-        # room timetable
-        self.roomTT[room].loc[(time, 'Room'), day] = room
-        self.roomTT[room].loc[(time, 'Subject'), day] = subjectName
-        self.roomTT[room].loc[(time, 'Teacher'), day]  = facultyName
+        self.facultyTT, self.roomTT = dict(), dict()
+        intern = self.strings.intern
+        for facultyName, day, time, subjectName, room in self.bookings:
+            codes = (intern(subjectName), intern(facultyName), intern(room))
+            for views, ttName in [(self.facultyTT, facultyName), (self.roomTT, room)]:
+                if ttName not in views:
+                    views[ttName] = self.emptyGrid()
+                views[ttName].cells[self.dayIndex[day], self.timeIndex[time]] = codes
 
 
-    def Labs(self, semesterData, timetable, labTime):
-        """Function that allocates the labs in the semester timetable from the semester data
+    def streamViews(self, stream):
+        """Write the room and faculty timetables one at a time straight from the faculty/room allocations, in the same order
+        as buildViews makes them, so that only a single grid is ever built at once
 
         Args:
-            semesterData (pd.DataFrame): Pandas Dataframe which contains data for that specific semesterData
-            timetable (pd.DataFrame): Pandas Dataframe of the timetable for the semester
-            labTime (str): Timeslot for the initial lab lecture to allocate
+            stream (TimetableStream): where the timetables are written to
+        """
+
+        for view, column in [('rooms', 4), ('faculty', 0)]:
+            allocations = defaultdict(list) # timetable name -> positions of its allocations in self.bookings
+            for bookingNo, booking in enumerate(self.bookings):
+                allocations[booking[column]].append(bookingNo)
+
+            for ttName, bookingNos in allocations.items():
+                if view == 'faculty' and ttName == '':
+                    continue
+                TT = self.emptyGrid()
+                for bookingNo in bookingNos:
+                    facultyName, day, time, subjectName, room = self.bookings[bookingNo]
+                    TT.set(day, time, subjectName, facultyName, room)
+                stream.write(view, ttName, TT)
+
+
+    def restoreGroup(self, timetables, bookings):
+        """Put back the timetables and faculty/room allocations of a course and semester generated before
+
+        Args:
+            timetables (dict): timetable name -> list of placements (day, time, subject, teacher, room)
+            bookings (list(tuple)): (facultyName, day, time, subjectName, room) of every allocation made for it
 
         Returns:
-            (pd.DataFrame, pd.DataFrame): returns the semesterData and timetable
+            (int, int): positions of its allocations in self.bookings
         """
 
-        semesterLabData = semesterData[semesterData['Lab_hrs'] > 0]
-        consecutiveLabTime = self.TIMESLOTS[self.TIMESLOTS.index(labTime) + 1]
+        for timetableName, placements in timetables.items():
+            self.TIMETABLES[timetableName] = self.emptyGrid()
+            for day, time, subject, teacher, room in placements:
+                self.TIMETABLES[timetableName].set(day, time, subject, teacher, room)
 
-        while not self.allClasssesSlotted(semesterLabData, ['Lab_hrs']):
-            for day in self.DAYS:
-                if self.allClasssesSlotted(semesterLabData, ['Lab_hrs']) == True:
-                    break
+        bookingsStart = len(self.bookings)
+        for booking in bookings:
+            self.assignRoomFacultyTT(*booking)
 
-                while True:
-                    randomSubject, randomSubjectType = self.getRandomSubject(semesterLabData, ['Lab_hrs'])
+        return (bookingsStart, len(self.bookings))
 
-                    if semesterLabData.loc[randomSubject, 'Track_Core'] == self.NULLVALUE:
-                        capacity = semesterLabData.loc[randomSubject, 'Lab_Capacity']
-                        teacher = self.getTeacher(semesterData, randomSubject, randomSubjectType)
 
-                        room = self.getClass(semesterLabData, randomSubject, day, labTime, randomSubjectType, capacity)
-                        if room == None:
-                            continue
+    def rebook(self, bookings):
+        """Redo the occupancy from scratch with the given faculty/room allocations
 
-                        if self.noClashesCheck(day, labTime, teacher, room):
-                            for time in [labTime, consecutiveLabTime]:
-                                timetable.loc[(time, 'Room'), day] = room
-                                timetable.loc[(time, 'Teacher'), day] = teacher
-                                timetable.loc[(time, 'Subject'), day] = f"{randomSubject} (Lab)"
+        Args:
+            bookings (list(tuple)): (facultyName, day, time, subjectName, room) of every allocation, in order
+        """
 
-                                self.assignRoomFacultyTT(teacher, day, time, f"{randomSubject} (Lab)", room)
+        self.occupancy = SlotOccupancy(self.NULLVALUE, self.catalog, self.unavailable, self.slotNos)
+        self.bookings = []
+        for booking in bookings:
+            self.assignRoomFacultyTT(*booking)
 
-                            semesterData.loc[randomSubject, randomSubjectType] -= 2
-                            semesterLabData.loc[randomSubject, randomSubjectType] -= 2
 
-                            print('#' * 200)
-                            print(timetable)
-                            print('#' * 200)
-                            print(semesterData)
-                            break
+    def Labs(self, semesterData, pending, timetable):
+        """Function that allocates the labs in the semester timetable from the semester data
 
-                    else:
-                        randomSubject_TrackCore = semesterLabData.loc[randomSubject, 'Track_Core']
-                        trackCoreData = semesterLabData.loc[semesterLabData['Track_Core'] == randomSubject_TrackCore]
-
-                        subjects = trackCoreData.index
-                        teachers = [self.getTeacher(trackCoreData, subject, randomSubjectType) for subject in subjects]
-                        classNos = []
-
-                        capacities = trackCoreData.loc[subjects, 'Lab_Capacity' if randomSubjectType == 'Lab_hrs' else 'Capacity']
-                        for subject, capacity in zip(subjects, capacities):
-                            while True:
-                                classNo = self.getClass(trackCoreData, subject, day, labTime, randomSubjectType, capacity)
-                                if classNo not in classNos:
-                                    classNos.append(classNo)
-                                    break
+        Every (day, start timeslot) a whole lab block fits in is a candidate, the one with the most free rooms left is used so
+        that the busier timeslots are kept for the labs that need them
 
-                        if None in classNos:
-                            """No approriate class found in this timeslot"""
-                            continue
+        Args:
+            semesterData (pd.DataFrame): Pandas Dataframe which contains data for that specific semesterData
+            pending (PendingHours): remaining hours for the semester batch
+            timetable (TimetableGrid): Timetable grid for the semester
 
-                        clashFound = False
-                        for teacher, subject, classNo in zip(teachers, subjects, classNos):
-                            if self.noClashesCheck(day, labTime, teacher, classNo) == False:
-                                clashFound = True
-                                break
+        Raises:
+            SchedulingInfeasible: a lab has no free (day, timeslot) left in the batch's timetable
+
+        Returns:
+            (PendingHours, TimetableGrid): returns the remaining hours and timetable
+        """
 
-                        if clashFound == True:
+        semesterLabData = semesterData[semesterData['Lab_hrs'] > 0]
+
+        while not self.allClasssesSlotted(pending, ['Lab_hrs']):
+            randomSubject, randomSubjectType = self.getRandomSubject(pending, ['Lab_hrs'])
+            length = semesterLabData.loc[randomSubject, 'Lab_Block']
+
+            if semesterLabData.loc[randomSubject, 'Track_Core'] == self.NULLVALUE:
+                subjects = [randomSubject]
+                labName = f"{randomSubject} (Lab)"
+            else:
+                randomSubject_TrackCore = semesterLabData.loc[randomSubject, 'Track_Core']
+                trackCoreData = semesterLabData.loc[semesterLabData['Track_Core'] == randomSubject_TrackCore]
+                subjects = [subject for subject in trackCoreData.index if pending.hours(subject, randomSubjectType) > 0 and trackCoreData.loc[subject, 'Lab_Block'] == length]
+                labName = f"{randomSubject_TrackCore} (Lab) - {', '.join(subjects)}"
+            teachers = [self.getTeacher(semesterLabData, subject, randomSubjectType) for subject in subjects]
+
+            """RANKING EVERY (DAY, TIMESLOT) THE LAB FITS IN"""
+            candidates = []
+            for day in self.DAYS:
+                labsThatDay = sum(1 for time in self.TIMESLOTS if '(Lab)' in timetable.get(day, time, 'Subject'))
+                for labTime in self.labStartTimes(length, day):
+                    times = self.labBlockTimes(day, labTime, length)
+                    if not all(timetable.isEmpty(day, time) for time in times):
+                        continue
+                    self.stats.attempt()
+
+                    if not self.occupancy.available(day, times, ', '.join(teachers)):
+                        self.stats.reject('teacher unavailable', day=day, time=labTime, subject=labName)
+                        continue
+
+                    if not all(self.occupancy.teacherFree(day, time, teacher) for time in times for teacher in teachers):
+                        self.stats.reject('teacher clash', day=day, time=labTime, subject=labName)
+                        continue
+
+                    if len(subjects) == 1:
+                        pools = self.freeClasses(semesterLabData, randomSubject, day, times, randomSubjectType, semesterLabData.loc[randomSubject, 'Lab_Capacity'])
+                        if len(pools) == 0:
+                            self.stats.reject('room unavailable', day=day, time=labTime, subject=labName)
                             continue
+                        freeRooms = sum(len(rooms) for rooms in pools)
+                        classNos = [self.random.choice(pools[0])]
+                    else:
+                        classNos, freeRooms = self.getTrackCoreClasses(trackCoreData, subjects, day, times, randomSubjectType)
+                        if classNos is None:
+                            continue
+
+                    candidates.append((-freeRooms, labsThatDay, self.random.random(), day, times, classNos))
 
-                        for teacher, subject, classNo in zip(teachers, subjects, classNos):
-                            for time in [labTime, consecutiveLabTime]:
-                                timetable.loc[(time, 'Room'), day] = ', '.join(classNos)
-                                timetable.loc[(time, 'Teacher'), day] = ', '.join(teachers)
-                                trackCoreLabName = f"{randomSubject_TrackCore} (Lab) - {', '.join(subjects)}"
-                                timetable.loc[(time, 'Subject'), day] = trackCoreLabName
+            if len(candidates) == 0:
+                raise SchedulingInfeasible(f"No free timeslot left for the {length} hour lab block of {labName}")
 
-                                self.assignRoomFacultyTT(teacher, day, time, f"{randomSubject_TrackCore} (Lab) - {subject}", classNo)
+            _, _, _, day, times, classNos = min(candidates)
 
-                            semesterData.loc[subject, randomSubjectType] -= 2
-                            semesterLabData.loc[subject, randomSubjectType] -= 2
+            for time in times:
+                timetable.set(day, time, labName, ', '.join(teachers), ', '.join(classNos))
+                for teacher, subject, classNo in zip(teachers, subjects, classNos):
+                    self.assignRoomFacultyTT(teacher, day, time, labName if len(subjects) == 1 else f"{randomSubject_TrackCore} (Lab) - {subject}", classNo)
 
-                        print('#' * 200)
-                        print(timetable)
-                        print('#' * 200)
-                        print(semesterData)
-                        break
+            for subject in subjects:
+                pending.place(subject, randomSubjectType, length)
 
-            if self.allClasssesSlotted(semesterLabData, ['Lab_hrs']): break
+            self.stats.placed(day=day, time=times[0], subject=labName)
+            self.showProgress(timetable, pending)
 
-        return (semesterData, timetable)
+        return (pending, timetable)
 
 
     def noConsecutiveLectures(self, timetable, day, time, teacher):
         """Check whether the next and previous lecture of the current timeslot contains the same teacher to prevent teachers from having consecutive lectures
 
         Args:
-            timetable (pd.DataFrame): Pandas Dataframe of the semester timetable
+            timetable (TimetableGrid): Timetable grid of the semester
             day (str): Day of the weeek
             time (str): Timeslot
             teacher (str): Name of the teacher/TA
@@ -362,193 +995,459 @@ class Vineek:
             bool: Whether the previous or next lecture from the given timeslot contains the same teacher
         """
 
-        if time == self.TIMESLOTS[0]:
+        dayNo, timeNo = self.dayIndex[day], self.timeIndex[time]
+        previousTimeNo = self.times.previous[dayNo][timeNo]
+        if previousTimeNo is None: # first lecture of the day
             return True
 
-        previousTime = self.TIMESLOTS[self.TIMESLOTS.index(time)-1]
-        if timetable.loc[(previousTime, 'Teacher'), day] == teacher: # check if the previous lecture is the same
+        if timetable.get(day, self.TIMESLOTS[previousTimeNo], 'Teacher') == teacher: # check if the previous lecture is the same
             return False
 
         # if this is not the last lecture of the day
-        if time != self.TIMESLOTS[-1]:
-            nextTime = self.TIMESLOTS[self.TIMESLOTS.index(time)+1]
-            if timetable.loc[(nextTime, 'Teacher'), day] == teacher: # check if the next lecture is the same
+        nextTimeNo = self.times.next[dayNo][timeNo]
+        if nextTimeNo is not None:
+            if timetable.get(day, self.TIMESLOTS[nextTimeNo], 'Teacher') == teacher: # check if the next lecture is the same
                 return False
 
         return True
 
 
-    def LecturesTuts(self, semesterData, timetable):
+    def LecturesTuts(self, semesterData, pending, timetable):
         """Function that allocates the lectures/tutorials in the semester timetable from the semester data
 
         Args:
             semesterData (pd.DataFrame): Pandas Dataframe which contains data for that specific semesterData
-            timetable (pd.DataFrame): Pandas Dataframe of the timetable for the semester
+            pending (PendingHours): remaining hours for the semester batch
+            timetable (TimetableGrid): Timetable grid for the semester
+
+        Raises:
+            SchedulingInfeasible: IDLESWEEPS passes over the week in a row placed nothing, the free timeslots left can't take the
+                remaining lectures/tutorials
 
         Returns:
-            (pd.DataFrame, pd.DataFrame): returns the semesterData and timetable
+            (PendingHours, TimetableGrid): returns the remaining hours and timetable
         """
 
-        while not self.allClasssesSlotted(semesterData, ['Lecture_hrs', 'Tut_hrs']):
+        notTrackcore = all(x == self.NULLVALUE for x in semesterData.loc[:, 'Track_Core'])
+        idleSweeps, lastHours = 0, pending.count(['Lecture_hrs', 'Tut_hrs']) + 1
+
+        while not self.allClasssesSlotted(pending, ['Lecture_hrs', 'Tut_hrs']):
+            """GIVING UP WHEN NOTHING FITS ANYMORE"""
+            remainingHours = pending.count(['Lecture_hrs', 'Tut_hrs'])
+            idleSweeps, lastHours = (0 if remainingHours < lastHours else idleSweeps + 1), remainingHours
+            if idleSweeps >= self.IDLESWEEPS:
+                remaining = sorted({subject for subject, subjectType in pending.remaining if subjectType in ['Lecture_hrs', 'Tut_hrs']})
+                raise SchedulingInfeasible(f"No free timeslot left for the remaining {remainingHours} hours of lectures/tutorials of {', '.join(remaining)}, "
+                                           f"{self.IDLESWEEPS} passes over the week in a row couldn't place any of them")
+
             for time, day in product(self.TIMESLOTS, self.DAYS):
-                if self.allClasssesSlotted(semesterData, ['Lecture_hrs', 'Tut_hrs']): break
+                if self.allClasssesSlotted(pending, ['Lecture_hrs', 'Tut_hrs']): break
 
-                if timetable.loc[(time, 'Room'), day] == self.NULLVALUE:
+                if timetable.isEmpty(day, time) and self.times.isOpen(self.dayIndex[day], self.timeIndex[time]):
                     for _ in range(len(semesterData)):
-                        randomSubject, randomSubjectType = self.getRandomSubject(semesterData, ['Lecture_hrs', 'Tut_hrs'])
-                        notTrackcore = all(x == self.NULLVALUE for x in semesterData.loc[:, 'Track_Core'])
+                        randomSubject, randomSubjectType = self.getRandomSubject(pending, ['Lecture_hrs', 'Tut_hrs'])
+                        self.stats.attempt()
 
                         if notTrackcore == True:
                             capacity = semesterData.loc[randomSubject, 'Capacity']
                             teacher = self.getTeacher(semesterData, randomSubject, randomSubjectType)
+                            if not self.occupancy.available(day, [time], teacher):
+                                self.stats.reject('teacher unavailable', day=day, time=time, subject=randomSubject)
+                                continue
+
                             room = self.getClass(semesterData, randomSubject, day, time, randomSubjectType, capacity)
 
                             if room is None:
+                                self.stats.reject('room unavailable', day=day, time=time, subject=randomSubject)
                                 continue
 
-                            if not self.noConsecutiveLectures(timetable, day, time, teacher): continue
-
-                            if self.noClashesCheck(day, time, teacher, room):
-                                timetable.loc[(time, 'Room'), day] = room
-                                timetable.loc[(time, 'Teacher'), day] = teacher
+                            if not self.noConsecutiveLectures(timetable, day, time, teacher):
+                                self.stats.reject('consecutive lectures', day=day, time=time, subject=randomSubject)
+                                continue
 
+                            clash = self.clashReason(day, time, teacher, room)
+                            if clash is None:
                                 subjectName = randomSubject if randomSubjectType != 'Tut_hrs' else f"{randomSubject} (Tut)"
-                                timetable.loc[(time, 'Subject'), day] = subjectName
+                                timetable.set(day, time, subjectName, teacher, room)
 
                                 self.assignRoomFacultyTT(teacher, day, time, subjectName, room)
-                                semesterData.loc[randomSubject, randomSubjectType] -=1
+                                pending.place(randomSubject, randomSubjectType)
+                                self.stats.placed(day=day, time=time, subject=subjectName)
 
-                                print('#' * 200)
-                                print(timetable)
-                                print('#' * 200)
-                                print(semesterData)
+                                self.showProgress(timetable, pending)
                                 break
 
+                            self.stats.reject(clash, day=day, time=time, subject=randomSubject)
+
                         else:
                             """FOR TRACKCORES/OELS"""
                             randomSubject_TrackCore = semesterData.loc[randomSubject, 'Track_Core']
                             trackCoreData = semesterData[semesterData['Track_Core'] == randomSubject_TrackCore]
 
-                            teachers, subjects, classNos = [], [], []
+                            teachers, subjects = [], []
                             for subject in trackCoreData.index:
                                 if subject not in subjects:
                                     teacher = self.getTeacher(trackCoreData, subject, randomSubjectType)
-                                    if (teacher not in teachers) and (trackCoreData.loc[subject, randomSubjectType] > 0):
+                                    if (teacher not in teachers) and (pending.hours(subject, randomSubjectType) > 0):
                                         teachers.append(teacher)
                                         subjects.append(subject)
 
-                                        capacity = trackCoreData.loc[subject, 'Lab_Capacity' if randomSubjectType == 'Lab_hrs' else 'Capacity']
-                                        classNo = self.getClass(trackCoreData, subject, day, time, randomSubjectType, capacity)
-                                        classNos.append(classNo)
+                            if not self.occupancy.available(day, [time], ', '.join(teachers)):
+                                self.stats.reject('teacher unavailable', day=day, time=time, subject=randomSubject_TrackCore)
+                                continue
 
-                            if None in classNos:
+                            classNos, _ = self.getTrackCoreClasses(trackCoreData, subjects, day, [time], randomSubjectType)
+                            if classNos is None:
                                 continue
-                            classNos = [str(int(float(classNo))) for classNo in classNos]
 
-                            noconsecutiveLectures = True
-                            noClashesCheck = True
+                            clash = None
                             for teacher, subject, classNo in zip(teachers, subjects, classNos):
                                 if not self.noConsecutiveLectures(timetable, day, time, teacher):
-                                    noconsecutiveLectures = False
+                                    clash = 'consecutive lectures'
+                                    break
 
-                                if not self.noClashesCheck(day, time, teacher, classNo):
-                                    noClashesCheck = False
+                                clash = self.clashReason(day, time, teacher, classNo)
+                                if clash is not None:
+                                    break
 
-                            if (not noconsecutiveLectures) or (not noClashesCheck):
+                            if clash is not None:
+                                self.stats.reject(clash, day=day, time=time, subject=randomSubject_TrackCore)
                                 continue
 
                             for subject in subjects:
-                                semesterData.loc[subject, randomSubjectType] -= 1
-
-                            timetable.loc[(time, 'Room'), day] = ', '.join([str(classNo) for classNo in classNos])
-                            timetable.loc[(time, 'Teacher'), day] = ', '.join(teachers)
+                                pending.place(subject, randomSubjectType)
 
                             if randomSubjectType == 'Tut_hrs':
-                                timetable.loc[(time, 'Subject'), day] = f"{semesterData.loc[randomSubject, 'Track_Core']} (Tut) - {', '.join(subjects)}"
+                                trackCoreName = f"{semesterData.loc[randomSubject, 'Track_Core']} (Tut) - {', '.join(subjects)}"
                             else:
-                                timetable.loc[(time, 'Subject'), day] = f"{semesterData.loc[randomSubject, 'Track_Core']} - {', '.join(subjects)}"
+                                trackCoreName = f"{semesterData.loc[randomSubject, 'Track_Core']} - {', '.join(subjects)}"
+
+                            timetable.set(day, time, trackCoreName, ', '.join(teachers), ', '.join([str(classNo) for classNo in classNos]))
 
                             for teacher, subject, classNo in zip(teachers, subjects, classNos):
                                 self.assignRoomFacultyTT(teacher, day, time, f"{randomSubject_TrackCore} - {subject} {'(Tut)' if randomSubjectType == 'Tut_hrs' else ''}", classNo)
 
-                            print('#' * 200)
-                            print(timetable)
-                            print('#' * 200)
-
-                            print(semesterData)
+                            self.stats.placed(day=day, time=time, subject=trackCoreName)
+                            self.showProgress(timetable, pending)
                             break
 
-        return semesterData, timetable
+        return pending, timetable
 
 
-    def saveTables(self):
-        """Function to save the timetables for all types of lectures, rooms and faculties into an organised excel directory """
+    def tables(self):
+        """Get all the generated timetables in the same layout as the saved excel files
 
-        ttPath = self.DIR / 'Vineek Timetables'
-        ttPath.mkdir(parents=True, exist_ok=True)
+        Returns:
+            dict: 'batches', 'rooms' and 'faculty', each a dict of timetable name -> pd.DataFrame
+        """
 
-        roomPath = self.DIR / 'Vineek Room Timetables'
-        roomPath.mkdir(parents=True, exist_ok=True)
+        return {'batches': {ttName: TT.toDataFrame() for ttName, TT in self.TIMETABLES.items()},
+                'rooms': {ttName: TT.toDataFrame() for ttName, TT in self.roomTT.items()},
+                'faculty': {ttName: TT.toDataFrame() for ttName, TT in self.facultyTT.items() if ttName != ''}}
 
-        facultyPath = self.DIR / 'Vineek Faculty Timetables'
-        facultyPath.mkdir(parents=True, exist_ok=True)
 
-        # saving lecture, room and faculty timetables
-        for ttName, TT in self.TIMETABLES.items():
-            TT.to_excel(ttPath / f"{ttName}.xlsx", merge_cells=True)
-        print(f"\nAll lecture timetables have been saved in {ttPath}\n")
+    def views(self):
+        """All generated timetable grids grouped by view, faculty timetables with blank names are left out
 
-        for ttName, TT in self.roomTT.items():
-            TT.to_excel(roomPath / f"{ttName}.xlsx", merge_cells=True)
-        print(f"\nAll room timetables have been saved in {roomPath}\n")
+        Returns:
+            dict: 'batches', 'rooms' and 'faculty', each a dict of timetable name -> TimetableGrid
+        """
 
-        for ttName, TT in self.facultyTT.items():
-            if ttName != '':
-                TT.to_excel(facultyPath / f"{ttName}.xlsx", merge_cells=True)
-        print(f"\nAll faculty timetables have been saved in {facultyPath}\n")
+        return {'batches': self.TIMETABLES,
+                'rooms': self.roomTT,
+                'faculty': {ttName: TT for ttName, TT in self.facultyTT.items() if ttName != ''}}
 
 
-    def main(self):
-        labTime = self.getLabTimes()
+    def saveTables(self, DIR=None, FORMATS=('files',), WORKERS=1):
+        """Function to save the timetables for all types of lectures, rooms and faculties into an organised excel directory
+
+        Args:
+            DIR (str, optional): folder to save the timetables in. Defaults to the folder of the timetable data excel file.
+            FORMATS (list(str), optional): any of 'files' (one excel file per timetable), 'workbooks' (one workbook per view
+                with a sheet per timetable), 'csv', 'jsonl' and 'parquet' (one flat file of every placement). Defaults to ('files',).
+            WORKERS (int, optional): worker processes writing the separate excel files, None for one per core. Defaults to 1.
+
+        Returns:
+            dict: what was saved -> where it was saved
+        """
+
+        DIR = self.DIR if DIR is None else Path(DIR)
+        DIR.mkdir(parents=True, exist_ok=True)
+        saved = dict()
+
+        with self.stats.phase('export'):
+            if 'files' in FORMATS:
+                saved.update(self.writeTables(DIR, WORKERS))
+
+            if 'workbooks' in FORMATS:
+                for view, timetables in self.views().items():
+                    saved[f"{view} workbook"] = DIR / f"Vineek {view.capitalize()} Timetables.xlsx"
+                    writeWorkbook(saved[f"{view} workbook"], timetables, self.DAYS)
+
+            for fileFormat in ['csv', 'jsonl', 'parquet']:
+                if fileFormat in FORMATS:
+                    saved[fileFormat] = DIR / f"Vineek Placements.{fileFormat}"
+                    writePlacements(saved[fileFormat], placementRecords(self.views()), fileFormat)
+
+        return saved
+
+
+    def writeTables(self, DIR, WORKERS=1, NAMES=None):
+        """Write every batch, room and faculty timetable into its own excel file
+
+        Args:
+            DIR (Path): folder to save the timetable folders in
+            WORKERS (int, optional): worker processes writing the files, None for one per core. Defaults to 1.
+            NAMES (dict, optional): 'batches', 'rooms' and 'faculty' -> names of the only timetables of that view to write. Defaults to all of them.
+
+        Returns:
+            dict: 'batches', 'rooms' and 'faculty' -> folder of those timetables
+        """
+
+        folders = {view: DIR / folder for view, folder in FOLDERS.items()}
+        for folder in folders.values():
+            folder.mkdir(parents=True, exist_ok=True)
+
+        # saving lecture, room and faculty timetables, the DataFrames are only made a few chunks of files at a time
+        jobs = ((folders[view] / f"{ttName}.xlsx", TT.toDataFrame()) for view, timetables in self.views().items() for ttName, TT in timetables.items()
+                if NAMES is None or ttName in NAMES.get(view, ()))
+        writeSeparateFiles(jobs, WORKERS)
+
+        return folders
+
+
+    def schedulePenalty(self):
+        """Quality of the generated timetables, lower is better
+
+        Returns:
+            int: number of free timeslots in between classes of a day, summed over all batch and faculty timetables
+        """
 
+        openSlots = array([[self.times.isOpen(dayNo, timeNo) for timeNo in range(len(self.TIMESLOTS))] for dayNo in range(len(self.DAYS))])
+        return sum(TT.gaps(openSlots) for TT in list(self.TIMETABLES.values()) + list(self.facultyTT.values()))
+
+
+    def scheduleGroup(self, semesterData, timetableNames):
+        """Generate the timetables of every batch of a course and semester around everything generated so far
+
+        Args:
+            semesterData (pd.DataFrame): semester data indexed by Course_Name
+            timetableNames (list(str)): name of the timetable of every batch
+        """
+
+        for timetableName in timetableNames:
+            timetable = self.emptyGrid()
+
+            if self.ENGINE == 'solver':
+                """LABS, LECTURES AND TUTORIALS ALL AT ONCE"""
+                with self.stats.phase('solver'):
+                    timetable = self.solver.scheduleBatch(semesterData, timetable)
+
+            else:
+                pending = PendingHours(semesterData, self.SUBJECTTYPES, self.random)
+
+                """LABS"""
+                with self.stats.phase('labs'):
+                    pending, timetable = self.Labs(semesterData, pending, timetable)
+
+                """FOR LECTURES AND TUTORIALS"""
+                with self.stats.phase('lectures/tutorials'):
+                    pending, timetable = self.LecturesTuts(semesterData, pending, timetable)
+
+            """SAVING THE TIMETABLE"""
+            self.TIMETABLES[timetableName] = timetable
+
+
+    def generate(self, batchCounts, stream=None):
+        """Generate the timetables for every course and semester without asking or saving anything
+
+        Args:
+            batchCounts (dict): (Dept_id, Semester) -> number of batches, courses and semesters that are left out have 1 batch
+            stream (TimetableStream, optional): write the batch timetables of every course and semester to it as soon as they're
+                finished and the room and faculty timetables at the end, none of them are kept. Only the faculty/room allocations
+                stay in memory, which grow with the number of classes rather than the number of batches, rooms and teachers. Can't
+                be used with OPTIMIZE, which needs every timetable. Defaults to keeping them all.
+
+        Raises:
+            InfeasibleTimetableData: some batch, teacher/TA or room is needed for more hours than a week has
+            ValueError: both a stream and OPTIMIZE were given
+
+        Returns:
+            dict: timetable name -> TimetableGrid of every batch, empty when they were written to a stream
+        """
+
+        if stream is not None and self.OPTIMIZE:
+            raise ValueError("The timetables can't be optimized when they're streamed, the optimizer needs all of them at once")
+
+        self.reset()
+        self.stats.reset()
+        self.random.seed(self.SEED)
+        groups = dict()
         for courseSem, semesterDataMain in self.subjectsData.groupby(by=['Dept_id', 'Semester']):
             semesterDataMain.set_index('Course_Name', inplace=True)
-            semesterDataMain.fillna(self.NULLVALUE, inplace=True)
+            groups[courseSem] = semesterDataMain
+
+        """CHECKING THAT THE TIMETABLES CAN EXIST AT ALL"""
+        with self.stats.phase('feasibility'):
+            problems = checkFeasibility(self, groups, batchCounts)
+        if problems:
+            raise InfeasibleTimetableData(problems)
+
+        """REUSING UNCHANGED TIMETABLES"""
+        cache, groupKeys, reschedule, neighbours = None, dict(), set(groups), set()
+        if self.CACHE is not None:
+            with self.stats.phase('cache'):
+                cache = ScheduleCache(self.CACHE, ScheduleCache.contentKey(self.classesData, sorted(self.unavailable.items()), self.times.grids, self.DAYS, self.NULLVALUE, self.ENGINE, self.SEED, self.BESTFIT, self.OPTIMIZE, self.optimizer.weights,
+                                                                      self.PARALLEL != 1)) # components are generated with their own random engines
+                groupKeys = {courseSem: ScheduleCache.contentKey(semesterData, batchCounts.get(courseSem, 1)) for courseSem, semesterData in groups.items()}
+                groupResources = {courseSem: semesterResources(self, semesterData, pools=False) for courseSem, semesterData in groups.items()}
+                reschedule = cache.affectedGroups(groupKeys, groupResources)
+                # kept groups that pick rooms from the same pools as the ones generated again, only generated again too when those
+                # can't be placed around them
+                poolResources = {courseSem: semesterResources(self, semesterData) for courseSem, semesterData in groups.items()}
+                neighbours = {courseSem for courseSem in set(groups) - reschedule if any(poolResources[courseSem] & poolResources[other] for other in reschedule)}
+
+                # the kept timetables are put back first so that their rooms and teachers are taken before anything new is placed
+                for courseSem in [courseSem for courseSem in groups if courseSem not in reschedule]:
+                    self.restoreGroup(cache.groups[courseSem]['timetables'], cache.groups[courseSem]['bookings'])
+
+        timetableNames, groupTimetables, groupBookings = [], dict(), dict()
+        for courseSem in groups:
+            batchCount = batchCounts.get(courseSem, 1)
+            groupTimetables[courseSem] = [f"{courseSem[0]} - Semester {courseSem[1]}" + ('' if batchCount < 2 else f" - Batch {batchNo+1}") for batchNo in range(batchCount)]
+            timetableNames += groupTimetables[courseSem]
+
+        def groupPlacements(courseSem):
+            return {timetableName: [tuple(placement.values()) for placement in self.TIMETABLES[timetableName].placements()] for timetableName in groupTimetables[courseSem]}
+
+        def storeGroup(courseSem):
+            bookingsStart, bookingsEnd = groupBookings[courseSem]
+            cache.store(courseSem, groupKeys[courseSem], groupResources[courseSem], groupPlacements(courseSem), self.bookings[bookingsStart:bookingsEnd])
+
+        def release(courseSem):
+            """Write the batch timetables of a finished course and semester to the stream and let go of their grids"""
+            if stream is None:
+                return
+            if cache is not None and courseSem in groupBookings: # stored now, the grids are gone by the end
+                storeGroup(courseSem)
+            with self.stats.phase('export'):
+                for timetableName in groupTimetables[courseSem]:
+                    stream.write('batches', timetableName, self.TIMETABLES.pop(timetableName))
+
+        for courseSem in [courseSem for courseSem in groups if courseSem not in reschedule | neighbours]: # neighbours may still be generated again
+            release(courseSem)
+
+        """CARRYING ON FROM AN INTERRUPTED RUN"""
+        journal, resumed = None, dict()
+        if self.JOURNAL is not None:
+            with self.stats.phase('journal'):
+                journal = PlacementJournal(self.JOURNAL, ScheduleCache.contentKey(self.subjectsData, self.classesData, sorted(self.unavailable.items()), self.times.grids, self.DAYS, self.NULLVALUE, self.ENGINE,
+                                                                                  self.SEED, self.BESTFIT, self.PARALLEL != 1, sorted(batchCounts.items()), sorted(reschedule)))
+                resumed = journal.groups
+                if self.PARALLEL == 1: # in parallel they're merged in along with the generated components instead
+                    for courseSem, group in resumed.items():
+                        groupBookings[courseSem] = self.restoreGroup(group['timetables'], group['bookings'])
+                        release(courseSem)
+                    if journal.randomState is not None:
+                        self.random.setstate(journal.randomState) # the rest of the groups get the same random numbers as in a run that wasn't interrupted
+
+        def finished(groupResults, randomState=None):
+            if journal is not None:
+                with self.stats.phase('journal'):
+                    journal.record(groupResults, randomState)
+
+        def generateGroups():
+            for courseSem, semesterDataMain in groups.items():
+                if courseSem not in reschedule or courseSem in groupBookings or self.PARALLEL != 1:
+                    continue
+
+                bookingsStart = len(self.bookings)
+                self.scheduleGroup(semesterDataMain, groupTimetables[courseSem])
+                groupBookings[courseSem] = (bookingsStart, len(self.bookings))
+                finished({courseSem: {'timetables': groupPlacements(courseSem), 'bookings': self.bookings[bookingsStart:]}}, self.random.getstate())
+                release(courseSem)
+
+            """GENERATING INDEPENDENT COURSES AND SEMESTERS AT THE SAME TIME"""
+            if self.PARALLEL != 1:
+                results = {**resumed, **scheduleComponents(self, groups, groupTimetables, reschedule - set(resumed), self.PARALLEL, onFinished=finished)}
+                for courseSem in [courseSem for courseSem in groups if courseSem in results]: # merged in input order
+                    groupBookings[courseSem] = self.restoreGroup(results[courseSem]['timetables'], results[courseSem]['bookings'])
+                    release(courseSem)
+
+        try:
+            generateGroups()
+        except (SchedulingInfeasible, TimeoutError):
+            if not neighbours - reschedule:
+                raise
+
+            # the kept groups picking rooms from the same pools may hold the ones a changed group needs, so they're generated
+            # again too. The groups generated so far stay, they can't clash with anything once those are taken away
+            if journal is not None:
+                journal.close(remove=True) # a run carried on from it would keep the neighbours
+                journal = None
+            reschedule |= neighbours
+            bookings = self.bookings
+            self.rebook([booking for courseSem in groups if courseSem not in reschedule for booking in cache.groups[courseSem]['bookings']])
+            for courseSem, (bookingsStart, bookingsEnd) in list(groupBookings.items()):
+                groupBookings[courseSem] = self.restoreGroup(dict(), bookings[bookingsStart:bookingsEnd])
+            resumed.clear() # in parallel they're generated again along with the neighbours of their component
+            generateGroups()
+
+        for courseSem in [courseSem for courseSem in groups if courseSem in neighbours - reschedule]: # kept after all
+            release(courseSem)
+
+        self.TIMETABLES = {timetableName: self.TIMETABLES[timetableName] for timetableName in timetableNames if timetableName in self.TIMETABLES}
+        self.timetableGroups = {timetableName: groups[courseSem] for courseSem in groups for timetableName in groupTimetables[courseSem]}
+
+        """IMPROVING THE GENERATED TIMETABLES"""
+        self.optimization = None
+        if self.OPTIMIZE:
+            with self.stats.phase('optimize'):
+                # the timetables kept from the cache stay as they are, the allocations keep their order so groupBookings still holds
+                self.optimization = self.optimizer.optimize(self.timetableGroups,
+                                                            frozen={timetableName for courseSem in groups if courseSem not in reschedule for timetableName in groupTimetables[courseSem]},
+                                                            timeLimit=self.OPTIMIZE, seed=self.SEED)
+
+        if cache is not None:
+            if stream is None:
+                for courseSem in groupBookings:
+                    storeGroup(courseSem)
+            cache.save(groups)
+        self.rescheduled = reschedule # (Dept_id, Semester) of every group that was generated rather than taken from the cache
+
+        if stream is None:
+            self.buildViews()
+        else:
+            with self.stats.phase('export'):
+                self.streamViews(stream)
+        if journal is not None:
+            journal.close(remove=True) # finished, there's nothing left to carry on from
 
+        return self.TIMETABLES
+
+
+    def main(self):
+        """Interactive part of the program, asks for the number of batches, generates and saves all the timetables"""
+
+        batchCounts = dict()
+        for courseSem in self.subjectsData.groupby(by=['Dept_id', 'Semester']).groups:
             while True:
                 try:
-                    batchCount = int(input(f"How many batches are there for {courseSem[0]} - Semester {courseSem[1]}? (Maximum can be 4!): "))
-                    if batchCount > 4: raise ValueError("Number of batches too high!")
+                    batchCount = int(input(f"How many batches are there for {courseSem[0]} - Semester {courseSem[1]}?: "))
+                    if batchCount < 1: raise ValueError("There has to be at least one batch!")
+                    batchCounts[courseSem] = batchCount
                     break
                 except:
                     print("\nPlease enter a valid number of batches!")
 
-            for batchNo in range(batchCount):
-                sleep(1)
-                timetable = self.emptyTimetable()
-
-                """LABS"""
-                semesterData, timetable = self.Labs(semesterDataMain.copy(), timetable, next(labTime))
-
-                print('#' * 200)
-                print(timetable)
-                print('#' * 200)
-                print(semesterData)
-
-                """FOR LECTURES AND TUTORIALS"""
-                semesterData, timetable = self.LecturesTuts(semesterData, timetable)
-
-                """SAVING THE TIMETABLE"""
-                timetableName = f"{courseSem[0]} - Semester {courseSem[1]}"
-                if batchCount < 2:
-                    self.TIMETABLES[timetableName] = timetable
-                else:
-                    timetableName += f" - Batch {batchNo+1}"
-                    self.TIMETABLES[timetableName] = timetable
+        self.generate(batchCounts)
 
         print("\nTimetables generated, saving them in their respective folders...\n")
         sleep(1)
-        self.saveTables() # creating room & faculty timetables then saving them on top of the timetables for lectures
+        saved = self.saveTables(WORKERS=None) # creating room & faculty timetables then saving them on top of the timetables for lectures
+        print(f"\nAll lecture timetables have been saved in {saved['batches']}\n")
+        print(f"\nAll room timetables have been saved in {saved['rooms']}\n")
+        print(f"\nAll faculty timetables have been saved in {saved['faculty']}\n")
 
         input("\nAll timetables generated!")
 
@@ -563,5 +1462,216 @@ TIMESLOTS = ['9:30 AM - 10:30 AM',
 
 DAYS = ['Mon', 'Tue', 'Wed', 'Thurs', 'Fri']
 
-Vineek(TIMESLOTS = TIMESLOTS,
-       DAYS = DAYS)
\ No newline at end of file
+ENGINE = 'random' # or 'solver' for the deterministic backtracking solver that never freezes
+
+
+def parseBatchCounts(batches):
+    """Turn batch counts keyed by timetable name, like {'B.Tech CSE - Semester 2': 3}, into (Dept_id, Semester) keys
+
+    Args:
+        batches (dict): '<Dept_id> - Semester <Semester>' -> number of batches
+
+    Returns:
+        dict: (Dept_id, Semester) -> number of batches
+    """
+
+    batchCounts = dict()
+    for courseSem, batchCount in batches.items():
+        dept, semester = courseSem.rsplit(' - Semester ', 1)
+        batchCounts[(dept, int(semester) if semester.isdigit() else semester)] = int(batchCount)
+
+    return batchCounts
+
+
+def loadConfig(path):
+    """Read a JSON run config, any of its keys can be left out:
+    {"TIMESLOTS": [...], "DAYS": [...], "ENGINE": "solver", "TIMELIMIT": 60, "SEED": 1, "BATCHES": {"B.Tech CSE - Semester 2": 3},
+     "OPTIMIZE": 10, "WEIGHTS": {"batchGaps": 1, "facultyGaps": 1, "batchDayLoad": 0.1, "facultyDayLoad": 0.1}}
+
+    Args:
+        path (str): path to the config file
+
+    Returns:
+        dict: config with BATCHES keyed by (Dept_id, Semester)
+    """
+
+    with open(path) as configFile:
+        config = loadJson(configFile)
+
+    config['BATCHES'] = parseBatchCounts(config.get('BATCHES', dict()))
+    return config
+
+
+def generateTimetables(FILE, OUTPUT=None, BATCHES=None, TIMESLOTS=TIMESLOTS, DAYS=DAYS, REPORT=None, HOOKS=(), FORMATS=('files',), WORKERS=1, TABLES=True, STREAM=False, **options):
+    """Headless entry point, generates the timetables without asking anything and saves them only if an output folder is given
+
+    Args:
+        FILE (str): path to the timetable data excel file
+        OUTPUT (str, optional): folder to save the timetables in. Defaults to not saving them.
+        BATCHES (dict, optional): (Dept_id, Semester) -> number of batches. Defaults to 1 batch each.
+        TIMESLOTS (list(str) or dict, optional): timeslots of a day, or day -> timeslots of that day. Defaults to TIMESLOTS.
+        DAYS (list(str), optional): days of the week. Defaults to DAYS.
+        REPORT (str, optional): path to write the JSON run report to. Defaults to not writing it.
+        HOOKS (list(callable), optional): hook(event, details) functions called on every attempt, rejection, placement and phase. Defaults to none.
+        FORMATS (list(str), optional): output formats, see Vineek.saveTables. Defaults to ('files',).
+        WORKERS (int, optional): worker processes writing separate excel files, None for one per core. Defaults to 1.
+        TABLES (bool, optional): return the timetables as DataFrames, which holds a DataFrame of every batch, room and teacher
+            in memory at once. Defaults to True.
+        STREAM (bool, optional): save every timetable to OUTPUT as soon as it's finished instead of keeping them all until the
+            end, for institutions with hundreds of batches. Can't be used with parquet or OPTIMIZE, nothing is returned. Defaults to False.
+        options: any other arguments for Vineek, like ENGINE, TIMELIMIT, SEED, VERBOSE, CACHE, OPTIMIZE, WEIGHTS, PARALLEL and JOURNAL
+
+    Raises:
+        ValueError: STREAM was given without an OUTPUT folder, along with OPTIMIZE or with a format that can't be streamed
+
+    Returns:
+        dict: 'batches', 'rooms' and 'faculty', each a dict of timetable name -> pd.DataFrame, None when TABLES is False or the timetables were streamed
+    """
+
+    if STREAM and OUTPUT is None:
+        raise ValueError("The timetables can only be streamed into an OUTPUT folder")
+
+    vineek = Vineek(TIMESLOTS, DAYS, FILE=FILE, **options)
+    for hook in HOOKS:
+        vineek.stats.addHook(hook)
+
+    if STREAM:
+        stream = TimetableStream(OUTPUT, DAYS, FORMATS, WORKERS)
+        vineek.generate(BATCHES or dict(), stream)
+        with vineek.stats.phase('export'):
+            stream.close()
+    else:
+        vineek.generate(BATCHES or dict())
+        if OUTPUT is not None:
+            vineek.saveTables(OUTPUT, FORMATS, WORKERS)
+    if REPORT is not None:
+        vineek.stats.saveReport(REPORT, engine=vineek.ENGINE, seed=vineek.SEED, optimization=vineek.optimization)
+
+    return vineek.tables() if TABLES and not STREAM else None
+
+
+def generatePortfolio(FILE, OUTPUT, BATCHES=None, SEEDS=4, MODE='first', TIMESLOTS=TIMESLOTS, DAYS=DAYS, FORMATS=('files',), WORKERS=1, **options):
+    """Generate with several seeds at once, one process each, and save the timetables of the first or best one, see runPortfolio
+
+    Args:
+        FILE (str): path to the timetable data excel file
+        OUTPUT (str): folder to save the timetables in
+        BATCHES (dict, optional): (Dept_id, Semester) -> number of batches. Defaults to 1 batch each.
+        SEEDS (int, optional): number of seeds run at the same time. Defaults to 4.
+        MODE (str, optional): 'first' keeps the first timetables that are finished, 'best' waits for every seed and keeps the
+            ones with the fewest gaps. Defaults to 'first'.
+        TIMESLOTS (list(str) or dict, optional): timeslots of a day, or day -> timeslots of that day. Defaults to TIMESLOTS.
+        DAYS (list(str), optional): days of the week. Defaults to DAYS.
+        FORMATS (list(str), optional): output formats, see Vineek.saveTables. Defaults to ('files',).
+        WORKERS (int, optional): worker processes writing separate excel files, None for one per core. Defaults to 1.
+        options: any other arguments for Vineek, like ENGINE, TIMELIMIT, OPTIMIZE and WEIGHTS. With a SEED, the seeds SEED,
+            SEED + 1, ... are run instead of random ones
+
+    Returns:
+        dict: what runPortfolio returns, nothing is saved when 'best' is None
+    """
+
+    SEED = options.pop('SEED', None)
+    seeds = None if SEED is None else [SEED + seedNo for seedNo in range(SEEDS)]
+    portfolio = runPortfolio(FILE, BATCHES or dict(), seeds, SEEDS, MODE, TIMESLOTS=TIMESLOTS, DAYS=DAYS, **options)
+
+    best = portfolio['best']
+    if best is not None:
+        vineek = Vineek(TIMESLOTS, DAYS, FILE=FILE, SEED=best['seed'], **options)
+        vineek.TIMETABLES, vineek.facultyTT, vineek.roomTT = best['TIMETABLES'], best['facultyTT'], best['roomTT']
+        vineek.saveTables(OUTPUT, FORMATS, WORKERS)
+
+    return portfolio
+
+
+def interactive(TIMESLOTS=TIMESLOTS, DAYS=DAYS, ENGINE=ENGINE):
+    """The original interactive program, a thin shell around Vineek that works with the excel file on the desktop"""
+
+    if osName == 'nt':
+        DIR = Path(f"C:\\Users\\{getlogin()}\\Desktop") # get the directory to the current windows user's desktop
+    else:
+        DIR = Path.home() / 'Desktop'
+    FILE = DIR / 'Time-table.xlsx'
+
+    # Rules for timetable detail data entry
+    print("Welcome to the Vineek timetable generation algorithm! Do note that if it looks like the program is stuck, simply close the window and start it up again!\n\nCredits:\nAshwin Rajesh Jawalikar\nGurvinder Kaur\n\nRules:\n- All the timetables, along with the initial excel sheet to provide the necessary data will be on the desktop. If not, the file directory path for them will be shown\n- 'Lecture_hrs', 'Tut_hrs', 'Lab_hrs' represents the amount of lectures of each respective type of lecture there is for a particular subject.\n- If a subject does not have any lab or tutorial lectures, the 'TA' column for that subject should be left as blank\n- Continuing from the previous point, put a 0 respective columns of 'Lecture_hrs', 'Lab_hrs', 'Tut_hrs' if the subject doesn't have any of those respective type of classes\n- 'Assigned_Room' and 'Assigned_Lab' columns are for pre-allocating specific rooms for a subject, either for a lecture or for a lab/tutorial session respectively\n- Please do not use the same values for 'Course_id' and 'Track_Core' columns\n- Please do make sure all variables in the 'Course_id' feature are unique as they play a integral role for track cores\n- Speaking of track cores, if a subject is common in a track core, allocate them in the same slot, assuming they also have the same teacher.\n- Try to keep the sample size small. To do this, try to only specific specific rooms to use for a specific course as the algorithm may panic and/or freeze\n- All the final outputs are in an excel format for further modifications and/or to cross reference to make more subjective changes\n -If you do wish to change the timeslots for all lectures, or even timeslots for labs as the amount of labs (assuming there are labs for the subject, are in multiples of 2) will be held consecutively, they can be changed within the code itself but in a very easy format just by editing the timeslots respectively near the end of the .py script.\n- Be gentle, she's a shy kind-hearted soul\n")
+
+    if FILE.is_file():
+        print(f"File found {FILE}")
+        input("Excel found for timetable data found, please make sure everything is entered correctly before pressing Enter...")
+        system('cls' if osName == 'nt' else 'clear')
+    else:
+        Vineek.createTTDataExcelFile(FILE)
+        input(f'Excel file created, path: {FILE}...please input details approriately to start generating timetables. The program is now going to exit, simply start the program again after entering the necessary timetable data.')
+        exit()
+
+    try:
+        Vineek(TIMESLOTS, DAYS, ENGINE=ENGINE, FILE=FILE, CACHE=DIR / 'Vineek Schedule Cache.pkl', JOURNAL=DIR / 'Vineek Journal.jsonl').main() # absolute war
+    except (InvalidTimetableData, SchedulingInfeasible, TimeoutError) as error:
+        input(f"{error}\n\nThe program is now going to exit, simply start the program again after fixing the timetable data.")
+        exit()
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description="Vineek timetable generator. Without --input the interactive program is started")
+    parser.add_argument('--input', help="path to the timetable data excel file, runs without asking anything")
+    parser.add_argument('--output', help="folder to save the timetables in, defaults to the folder of the input file")
+    parser.add_argument('--config', help="JSON config with TIMESLOTS, DAYS, ENGINE, TIMELIMIT, SEED and BATCHES")
+    parser.add_argument('--batches', nargs='*', default=[], metavar="'DEPT - Semester N=COUNT'", help="number of batches of a course and semester")
+    parser.add_argument('--engine', choices=['random', 'solver'], help="scheduling engine")
+    parser.add_argument('--seed', type=int, help="seed of the random engine")
+    parser.add_argument('--time-limit', type=int, help="seconds the solver engine may search for a single batch")
+    parser.add_argument('--report', help="path to write a JSON report of attempts, rejections and time spent per phase")
+    parser.add_argument('--verbose', action='store_true', help="print the whole timetable after every placement")
+    parser.add_argument('--format', nargs='+', default=['files'], choices=['files', 'workbooks', 'csv', 'jsonl', 'parquet'],
+                        help="files: an excel file per timetable, workbooks: a workbook per view with a sheet per timetable, csv/jsonl/parquet: every placement in one flat file")
+    parser.add_argument('--exact-capacity', action='store_true', help="only use rooms of exactly the capacity a class needs")
+    parser.add_argument('--cache', help="schedule cache file, only the courses and semesters affected by an edit of the input are generated again")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes writing separate excel files, defaults to one per core")
+    parser.add_argument('--parallel', type=int, metavar='WORKERS', help="generate courses and semesters that share no teacher/TA or room in that many processes at once, 0 for one per core")
+    parser.add_argument('--journal', help="placement journal file, a run that was interrupted carries on from the last course and semester it finished")
+    parser.add_argument('--optimize', type=float, metavar='SECONDS', help="seconds to spend cutting down gaps and heavy days of the generated timetables")
+    parser.add_argument('--serve', metavar='stdio|PORT', help="keep the generated timetables in memory and answer JSON queries and manual moves on stdin/stdout or on a localhost port")
+    parser.add_argument('--stream', action='store_true', help="save the timetables of every course and semester as soon as they're generated instead of keeping them all in memory, "
+                                                               "for institutions with hundreds of batches (not with --optimize, --serve or parquet)")
+    parser.add_argument('--portfolio', type=int, metavar='SEEDS', help="generate with that many seeds at once, one process each, and save the timetables of the first one that finishes")
+    parser.add_argument('--portfolio-mode', choices=['first', 'best'], default='first', help="best waits for every seed of --portfolio and saves the timetables with the fewest gaps")
+    args = parser.parse_args()
+
+    if args.input is None:
+        interactive()
+    else:
+        config = loadConfig(args.config) if args.config else {'BATCHES': dict()}
+        config['BATCHES'].update(parseBatchCounts(dict(batch.rsplit('=', 1) for batch in args.batches)))
+        for option, value in [('ENGINE', args.engine), ('SEED', args.seed), ('TIMELIMIT', args.time_limit), ('CACHE', args.cache), ('OPTIMIZE', args.optimize), ('JOURNAL', args.journal)]:
+            if value is not None:
+                config[option] = value
+
+        if args.exact_capacity:
+            config['BESTFIT'] = False
+        if args.parallel is not None:
+            config['PARALLEL'] = args.parallel or None
+
+        if args.stream and (args.serve is not None or config.get('OPTIMIZE') or 'parquet' in args.format):
+            parser.error("--stream can't be used with --serve or --optimize, which need every timetable in memory at once, or with parquet")
+        if args.portfolio is not None and (args.portfolio < 1 or args.serve is not None or args.stream or 'CACHE' in config or 'JOURNAL' in config):
+            parser.error("--portfolio needs at least 1 seed and can't be used with --serve, --stream, --cache or --journal")
+
+        try:
+            if args.portfolio is not None:
+                portfolio = generatePortfolio(args.input, args.output or Path(args.input).parent, config.pop('BATCHES'), args.portfolio, args.portfolio_mode,
+                                              VERBOSE=args.verbose, FORMATS=args.format, WORKERS=args.workers, **config)
+                if portfolio['best'] is None:
+                    parser.exit(1, "No seed gave timetables:\n" + '\n'.join(f"Seed {seed}: {error}" for seed, error in portfolio['failures'].items()) + '\n')
+                print(f"Saved the timetables of seed {portfolio['best']['seed']} (penalty {portfolio['best']['penalty']}) out of {len(portfolio['results'])} finished seeds")
+            elif args.serve is None:
+                generateTimetables(args.input, OUTPUT=args.output or Path(args.input).parent, REPORT=args.report, VERBOSE=args.verbose,
+                                   FORMATS=args.format, WORKERS=args.workers, TABLES=False, STREAM=args.stream, **config)
+            else:
+                BATCHES = config.pop('BATCHES')
+                vineek = Vineek(config.pop('TIMESLOTS', TIMESLOTS), config.pop('DAYS', DAYS), FILE=args.input, VERBOSE=args.verbose, **config)
+                with redirect_stdout(stderr): # stdout is kept for the answers
+                    vineek.generate(BATCHES)
+                ScheduleService(vineek, args.output or Path(args.input).parent).serve(args.serve)
+        except (InvalidTimetableData, InvalidTimeslots, SchedulingInfeasible, TimeoutError) as error: # the solver finding no timetable is reported like broken data
+            parser.exit(1, f"{error}\n")
@@ -0,0 +1,314 @@
+from argparse import ArgumentParser
+from contextlib import redirect_stdout
+from csv import DictWriter
+from json import dumps
+from multiprocessing import Process, Queue
+from os import devnull
+from pathlib import Path
+from queue import Empty
+from random import Random
+from statistics import median
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from pandas import DataFrame, ExcelWriter
+
+
+TIMESLOTS = ['9:30 AM - 10:30 AM',
+             '10:30 AM - 11:30 AM',
+             '11:30 AM - 12:30 PM',
+             '1:30 PM - 2:30 PM',
+             '2:30 PM - 3:30 PM',
+             '3:30 PM - 4:30 PM',
+             '4:30 PM - 5:30 PM']
+
+DAYS = ['Mon', 'Tue', 'Wed', 'Thurs', 'Fri']
+
+CLASSCAPACITIES = [120, 60, 30]
+LABCAPACITY = 60
+TIMEDCALLS = ['freeClasses', 'getTrackCoreClasses', 'clashReason'] # hot helpers of the random engine, timed on top of the phases (freeClasses includes its calls from getTrackCoreClasses)
+
+
+def syntheticInstitution(departments=2, semesters=2, batches=2, subjects=6, trackCores=1, trackCoreSize=3, faculty=None,
+                         sharedTAs=0.2, roomsPerPool=None, tightness=0.6, labShare=0.5, TIMESLOTS=TIMESLOTS, DAYS=DAYS, seed=0):
+    """Made up Timetable and Rooms sheets of any size, following every rule of the README
+
+    Args:
+        departments (int, optional): number of Dept_id. Defaults to 2.
+        semesters (int, optional): semesters of every department. Defaults to 2.
+        batches (int, optional): batches of every department and semester. Defaults to 2.
+        subjects (int, optional): regular subjects of a semester. Defaults to 6.
+        trackCores (int, optional): track cores of a semester. Defaults to 1.
+        trackCoreSize (int, optional): subjects sharing each track core. Defaults to 3.
+        faculty (int, optional): size of the teacher pool, fewer teachers means more of them teach in several semesters. Defaults to one per subject.
+        sharedTAs (float, optional): share of the labs/tutorials whose TA also helps in other semesters. Defaults to 0.2.
+        roomsPerPool (int, optional): rooms of every type and capacity. Defaults to one per department, semester and batch.
+        tightness (float, optional): share of the week's timeslots a batch is busy. Defaults to 0.6.
+        labShare (float, optional): share of the subjects with labs, there are never more lab blocks than days. Defaults to 0.5.
+        TIMESLOTS (list(str), optional): timeslots of a day. Defaults to TIMESLOTS.
+        DAYS (list(str), optional): days of the week. Defaults to DAYS.
+        seed (int, optional): seed of the made up data. Defaults to 0.
+
+    Returns:
+        (pd.DataFrame, pd.DataFrame, dict): Timetable sheet, Rooms sheet and (Dept_id, Semester) -> number of batches
+    """
+
+    random = Random(seed)
+    units = subjects + trackCores # a track core takes up the timeslots of a single subject, all its subjects are held together
+    faculty = faculty or departments * semesters * (subjects + trackCores * trackCoreSize)
+    roomsPerPool = roomsPerPool or departments * semesters * batches
+    sharedPool = [f"Shared TA {taNo + 1}" for taNo in range(max(1, departments))]
+    hoursPerUnit = tightness * len(TIMESLOTS) * len(DAYS) / units
+
+    rows, taCount = [], 0
+    for deptNo in range(departments):
+        for semester in range(1, semesters + 1):
+            labUnits = set(random.sample(range(units), min(len(DAYS), round(units * labShare))))
+
+            for unitNo in range(units):
+                labHours = 2 if unitNo in labUnits else 0
+                tutHours = random.randint(0, 1)
+                lectureHours = max(1, round(hoursPerUnit - labHours - tutHours))
+
+                isTrackCore = unitNo >= subjects
+                members = trackCoreSize if isTrackCore else 1
+                for memberNo, teacher in enumerate(random.sample(range(faculty), min(members, faculty))):
+                    taNeeded = labHours + tutHours > 0
+                    if taNeeded and random.random() < sharedTAs:
+                        TA = random.choice(sharedPool)
+                    elif taNeeded:
+                        taCount += 1
+                        TA = f"TA {taCount}"
+                    else:
+                        TA = None
+
+                    courseNo = f"{deptNo + 1}{semester:02d}{unitNo:02d}{memberNo}"
+                    rows.append({'Dept_id': f"Dept {deptNo + 1}",
+                                 'Course_id': f"C{courseNo}",
+                                 'Track_Core': f"TC{courseNo[:-1]}" if isTrackCore else None,
+                                 'Course_Name': f"Subject {unitNo + 1}" + (f"{chr(ord('a') + memberNo)}" if isTrackCore else ''),
+                                 'Faculty': f"Faculty {teacher + 1}",
+                                 'TA': TA,
+                                 'Semester': semester,
+                                 'Lecture_hrs': lectureHours,
+                                 'Tut_hrs': tutHours,
+                                 'Capacity': random.choice(CLASSCAPACITIES),
+                                 'Lab_hrs': labHours,
+                                 'Lab_Capacity': LABCAPACITY if labHours else None,
+                                 'Assigned_Room': None,
+                                 'Assigned_Lab': None})
+
+    rooms = [{'Room_No': 100 * (poolNo + 1) + roomNo, 'Capacity': capacity, 'Type': roomType}
+             for poolNo, (roomType, capacity) in enumerate([('Class', capacity) for capacity in CLASSCAPACITIES] + [('Lab', LABCAPACITY)])
+             for roomNo in range(roomsPerPool)]
+
+    batchCounts = {(f"Dept {deptNo + 1}", semester): batches for deptNo in range(departments) for semester in range(1, semesters + 1)}
+    return DataFrame(rows), DataFrame(rooms), batchCounts
+
+
+def writeSyntheticExcel(FILE, subjectsData, classesData):
+    """Save made up sheets as a timetable data excel file"""
+
+    with ExcelWriter(FILE) as writer:
+        subjectsData.to_excel(writer, sheet_name='Timetable', index=False)
+        classesData.to_excel(writer, sheet_name='Rooms', index=False)
+
+
+def timeCalls(vineek, names):
+    """Wrap methods of a Vineek instance so that the time spent in them is added to its stats like a phase
+
+    Args:
+        vineek (Vineek): instance to time
+        names (list(str)): names of the methods
+    """
+
+    for name in names:
+        def timed(*args, method=getattr(vineek, name), name=name, **kwargs):
+            start = perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                vineek.stats.phaseTimes[name] += perf_counter() - start
+
+        setattr(vineek, name, timed)
+
+
+def runOnce(FILE, batchCounts, engine, seed, timeLimit, formats):
+    """Generate and save the timetables of a single seed, timing every phase
+
+    Args:
+        FILE (str): path to the timetable data excel file
+        batchCounts (dict): (Dept_id, Semester) -> number of batches
+        engine (str): 'random' or 'solver'
+        seed (int): seed of the random engine
+        timeLimit (int): seconds the solver engine may search for a single batch
+        formats (list(str)): formats to save in, see Vineek.saveTables
+
+    Returns:
+        dict: whether it worked, the generation time, penalty, counters and seconds spent in every phase and timed call
+    """
+
+    from Vineek import Vineek
+
+    with open(devnull, 'w') as quiet, redirect_stdout(quiet):
+        vineek = Vineek(TIMESLOTS, DAYS, ENGINE=engine, SEED=seed, TIMELIMIT=timeLimit, FILE=FILE)
+        timeCalls(vineek, TIMEDCALLS)
+
+        start = perf_counter()
+        try:
+            vineek.generate(batchCounts)
+        except Exception as error: # the solver gives up with SchedulingInfeasible or TimeoutError
+            return {'ok': False, 'error': repr(error), 'seconds': perf_counter() - start}
+        seconds = perf_counter() - start
+
+        with TemporaryDirectory() as DIR:
+            vineek.saveTables(DIR, formats)
+
+    report = vineek.stats.report()
+    return {'ok': True, 'seconds': seconds, 'penalty': vineek.schedulePenalty(), 'attempts': report['attempts'],
+            'placements': report['placements'], 'phaseSeconds': report['phaseSeconds']}
+
+
+def runChild(results, args):
+    results.put(runOnce(*args))
+
+
+def runWithTimeout(args, timeout):
+    """runOnce in its own process, killed after the timeout as the random engine can get stuck forever"""
+
+    results = Queue()
+    process = Process(target=runChild, args=(results, args), daemon=True)
+    process.start()
+    try:
+        return results.get(timeout=timeout)
+    except Empty:
+        return {'ok': False, 'error': 'timeout', 'seconds': timeout}
+    finally:
+        process.terminate()
+        process.join()
+
+
+def summarize(records):
+    """Success rate and time to solution of every scale and engine
+
+    Args:
+        records (list(dict)): results of runBenchmark
+
+    Returns:
+        list(dict): one row per scale and engine
+    """
+
+    groups = dict()
+    for record in records:
+        groups.setdefault((record['scale'], record['engine']), []).append(record)
+
+    summary = []
+    for (scale, engine), runs in groups.items():
+        solved = [run for run in runs if run['ok']]
+        row = {'scale': scale, 'engine': engine, 'subjects': runs[0]['subjects'], 'batches': runs[0]['batches'],
+               'runs': len(runs), 'successRate': len(solved) / len(runs),
+               'medianSeconds': median(run['seconds'] for run in solved) if solved else None,
+               'medianPenalty': median(run['penalty'] for run in solved) if solved else None}
+        for phase in ['labs', 'lectures/tutorials', 'solver', 'export'] + TIMEDCALLS:
+            row[f"{phase} seconds"] = median(run['phaseSeconds'].get(phase, 0) for run in solved) if solved else None
+        summary.append(row)
+
+    return summary
+
+
+def plotScaling(summary, path):
+    """Plot the median time to solution against the number of batches, only if matplotlib is installed
+
+    Returns:
+        bool: whether the plot was saved
+    """
+
+    try:
+        from matplotlib import pyplot
+    except ImportError:
+        return False
+
+    figure, axes = pyplot.subplots()
+    for engine in dict.fromkeys(row['engine'] for row in summary):
+        rows = [row for row in summary if row['engine'] == engine and row['medianSeconds'] is not None]
+        axes.plot([row['batches'] for row in rows], [row['medianSeconds'] for row in rows], marker='o', label=engine)
+
+    axes.set_xlabel('batches')
+    axes.set_ylabel('median seconds to generate')
+    axes.legend()
+    figure.savefig(path)
+    pyplot.close(figure)
+    return True
+
+
+def runBenchmark(scales=(1, 2, 4), seeds=5, engines=('random', 'solver'), timeout=60, timeLimit=60, formats=('files',), output='benchmark', **institution):
+    """Run every engine over many seeds on made up institutions of growing size
+
+    Args:
+        scales (list(int), optional): number of departments of every institution. Defaults to (1, 2, 4).
+        seeds (int, optional): seeds per engine and scale. Defaults to 5.
+        engines (list(str), optional): engines to compare. Defaults to ('random', 'solver').
+        timeout (int, optional): seconds before a run counts as failed. Defaults to 60.
+        timeLimit (int, optional): seconds the solver engine may search for a single batch. Defaults to 60.
+        formats (list(str), optional): formats to save in, see Vineek.saveTables. Defaults to ('files',).
+        output (str, optional): folder for the made up excel files, results.jsonl, summary.csv and scaling.png. Defaults to 'benchmark'.
+        institution: any other arguments for syntheticInstitution
+
+    Returns:
+        list(dict): summary, one row per scale and engine
+    """
+
+    output = Path(output)
+    output.mkdir(parents=True, exist_ok=True)
+    records = []
+
+    with open(output / 'results.jsonl', 'w') as resultsFile:
+        for scale in scales:
+            subjectsData, classesData, batchCounts = syntheticInstitution(departments=scale, **institution)
+            FILE = output / f"synthetic-{scale}.xlsx"
+            writeSyntheticExcel(FILE, subjectsData, classesData)
+
+            for engine in engines:
+                for seed in range(seeds):
+                    record = {'scale': scale, 'engine': engine, 'seed': seed, 'subjects': len(subjectsData), 'batches': sum(batchCounts.values()),
+                              **runWithTimeout((str(FILE), batchCounts, engine, seed, timeLimit, formats), timeout)}
+                    records.append(record)
+                    resultsFile.write(dumps(record) + '\n')
+                    print(f"scale {scale} {engine} seed {seed}: {'%.2fs' % record['seconds'] if record['ok'] else record['error']}")
+
+    summary = summarize(records)
+    with open(output / 'summary.csv', 'w', newline='') as summaryFile:
+        writer = DictWriter(summaryFile, fieldnames=list(summary[0]))
+        writer.writeheader()
+        writer.writerows(summary)
+
+    plotScaling(summary, output / 'scaling.png')
+    return summary
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description="Benchmark the Vineek engines on made up institutions of growing size")
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 2, 4], help="number of departments of every institution")
+    parser.add_argument('--seeds', type=int, default=5, help="seeds per engine and scale")
+    parser.add_argument('--engines', nargs='+', default=['random', 'solver'], choices=['random', 'solver'])
+    parser.add_argument('--timeout', type=int, default=60, help="seconds before a run counts as failed")
+    parser.add_argument('--time-limit', type=int, default=60, help="seconds the solver engine may search for a single batch")
+    parser.add_argument('--format', nargs='+', default=['files'], choices=['files', 'workbooks', 'csv', 'jsonl', 'parquet'])
+    parser.add_argument('--output', default='benchmark', help="folder for the made up excel files and the results")
+    parser.add_argument('--semesters', type=int, default=2)
+    parser.add_argument('--batches', type=int, default=2)
+    parser.add_argument('--subjects', type=int, default=6, help="regular subjects of a semester")
+    parser.add_argument('--track-cores', type=int, default=1)
+    parser.add_argument('--track-core-size', type=int, default=3)
+    parser.add_argument('--faculty', type=int, help="size of the teacher pool")
+    parser.add_argument('--shared-tas', type=float, default=0.2, help="share of labs/tutorials with a TA shared across semesters")
+    parser.add_argument('--rooms-per-pool', type=int, help="rooms of every type and capacity")
+    parser.add_argument('--tightness', type=float, default=0.6, help="share of the week's timeslots a batch is busy")
+    parser.add_argument('--data-seed', type=int, default=0, help="seed of the made up data")
+    args = parser.parse_args()
+
+    summary = runBenchmark(args.scales, args.seeds, args.engines, args.timeout, args.time_limit, args.format, args.output,
+                           semesters=args.semesters, batches=args.batches, subjects=args.subjects, trackCores=args.track_cores,
+                           trackCoreSize=args.track_core_size, faculty=args.faculty, sharedTAs=args.shared_tas,
+                           roomsPerPool=args.rooms_per_pool, tightness=args.tightness, seed=args.data_seed)
+
+    print(DataFrame(summary).to_string(index=False))
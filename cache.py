@@ -0,0 +1,104 @@
+from hashlib import sha256
+from pathlib import Path
+from pickle import dump as dumpPickle, load as loadPickle, UnpicklingError
+
+
+class ScheduleCache:
+    VERSION = 4
+
+    def __init__(self, path, configKey):
+        """Timetables of every Dept_id/Semester group from the previous run, so that only the groups affected by an edit are generated again
+
+        The whole cache is thrown away when the rooms, timeslots, days, engine or seed change, as every group depends on them
+
+        Args:
+            path (str): path of the cache file, it is created on the first save
+            configKey (str): hash of everything shared by all groups, see contentKey
+        """
+
+        self.path = Path(path)
+        self.configKey = configKey
+        self.groups = dict() # (Dept_id, Semester) -> {'key', 'resources', 'timetables', 'bookings'}
+
+        if self.path.is_file():
+            try:
+                with open(self.path, 'rb') as cacheFile:
+                    cached = loadPickle(cacheFile)
+            except (OSError, EOFError, UnpicklingError, AttributeError, ImportError):
+                cached = dict() # an unreadable cache is the same as no cache
+
+            if cached.get('version') == self.VERSION and cached.get('configKey') == configKey:
+                self.groups = cached['groups']
+
+
+    @staticmethod
+    def contentKey(*parts):
+        """Hash of DataFrames and plain values, a DataFrame is hashed by its csv form so it only changes when its contents do
+
+        Returns:
+            str: hex digest
+        """
+
+        digest = sha256()
+        for part in parts:
+            digest.update((part.to_csv() if hasattr(part, 'to_csv') else repr(part)).encode())
+            digest.update(b'\0')
+
+        return digest.hexdigest()
+
+
+    def affectedGroups(self, groupKeys, groupResources):
+        """Groups that have to be generated again: new groups, groups whose rows changed and groups sharing a teacher/TA or a room with them
+
+        A kept group shares a room when it booked one of the rooms a changed group is assigned. The other rooms of the pools
+        they pick from don't count, most groups share those, Vineek.generate only widens to them when a changed group can't
+        be placed around the kept ones
+
+        Args:
+            groupKeys (dict): (Dept_id, Semester) -> contentKey of its rows and batch count
+            groupResources (dict): (Dept_id, Semester) -> set of teachers/TAs and assigned rooms named in its rows, see partition.groupResources
+
+        Returns:
+            set: (Dept_id, Semester) of every group to generate again
+        """
+
+        changed = {courseSem for courseSem, key in groupKeys.items() if self.groups.get(courseSem, dict()).get('key') != key}
+        removed = set(self.groups) - set(groupKeys)
+
+        # resources of the changed groups, both the ones named in the new rows and the ones named before the edit
+        changedResources = set()
+        for courseSem in changed | removed:
+            changedResources |= groupResources.get(courseSem, set()) | self.groups.get(courseSem, dict()).get('resources', set())
+
+        def keptResources(courseSem):
+            return groupResources[courseSem] | {f"Room {room}" for _, _, _, _, room in self.groups[courseSem]['bookings']}
+
+        return changed | {courseSem for courseSem in set(groupKeys) - changed if keptResources(courseSem) & changedResources}
+
+
+    def store(self, courseSem, key, resources, timetables, bookings):
+        """Remember the generated timetables of a group
+
+        Args:
+            courseSem (tuple): (Dept_id, Semester)
+            key (str): contentKey of its rows and batch count
+            resources (set): teachers/TAs and assigned rooms named in its rows
+            timetables (dict): timetable name -> list of placements (day, time, subject, teacher, room)
+            bookings (list(tuple)): (facultyName, day, time, subjectName, room) of every faculty/room allocation made for the group
+        """
+
+        self.groups[courseSem] = {'key': key, 'resources': resources, 'timetables': timetables, 'bookings': bookings}
+
+
+    def save(self, courseSems):
+        """Write the cache file, keeping only the given groups so that removed groups don't linger
+
+        Args:
+            courseSems (iterable(tuple)): (Dept_id, Semester) of every group in the input
+        """
+
+        courseSems = set(courseSems)
+        self.groups = {courseSem: group for courseSem, group in self.groups.items() if courseSem in courseSems}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'wb') as cacheFile:
+            dumpPickle({'version': self.VERSION, 'configKey': self.configKey, 'groups': self.groups}, cacheFile)
@@ -0,0 +1,307 @@
+from concurrent.futures import ProcessPoolExecutor
+from csv import DictWriter
+from json import dumps
+from os import cpu_count
+from pathlib import Path
+from openpyxl import Workbook
+from pandas import DataFrame
+
+
+PLACEMENTCOLUMNS = ['view', 'timetable', 'day', 'time', 'subject', 'teacher', 'room']
+FOLDERS = {'batches': 'Vineek Timetables', 'rooms': 'Vineek Room Timetables', 'faculty': 'Vineek Faculty Timetables'} # view -> folder of its separate excel files
+
+
+def sheetName(name, usedNames):
+    """Turn a timetable name into a unique excel sheet name, which can't be longer than 31 characters or contain []:*?/\\
+
+    Args:
+        name (str): timetable name
+        usedNames (set): sheet names already taken in the workbook, the new name is added to it
+
+    Returns:
+        str: sheet name
+    """
+
+    name = ''.join('_' if character in '[]:*?/\\' else character for character in str(name)).strip("'") or 'Blank'
+    candidate, copyNo = name[:31], 1
+    while candidate.lower() in usedNames:
+        copyNo += 1
+        candidate = f"{name[:31 - len(str(copyNo)) - 1]}~{copyNo}"
+
+    usedNames.add(candidate.lower())
+    return candidate
+
+
+def writeWorkbook(path, timetables, DAYS):
+    """Write many timetables into a single workbook, one sheet per timetable, with a constant memory streaming writer
+
+    The first sheet lists which sheet holds which timetable, as long names have to be shortened
+
+    Args:
+        path (Path): path of the workbook
+        timetables (dict): timetable name -> TimetableGrid
+        DAYS (list(str)): days of the week
+    """
+
+    workbook, indexSheet, usedNames = openWorkbook()
+    for ttName, TT in timetables.items():
+        appendSheet(workbook, indexSheet, usedNames, ttName, TT, DAYS)
+
+    workbook.save(path)
+
+
+def openWorkbook():
+    """Start a constant memory streaming workbook with an empty index sheet, see writeWorkbook
+
+    Returns:
+        (Workbook, WriteOnlyWorksheet, set): workbook, its index sheet and the sheet names taken so far
+    """
+
+    workbook = Workbook(write_only=True)
+    indexSheet = workbook.create_sheet('Index')
+    indexSheet.append(['Sheet', 'Timetable'])
+    return workbook, indexSheet, {'index'}
+
+
+def appendSheet(workbook, indexSheet, usedNames, ttName, TT, DAYS):
+    """Add a timetable to a workbook from openWorkbook as its own sheet and list it in the index sheet
+
+    Args:
+        workbook (Workbook): streaming workbook
+        indexSheet (WriteOnlyWorksheet): its index sheet
+        usedNames (set): sheet names already taken in the workbook, the new name is added to it
+        ttName (str): timetable name
+        TT (TimetableGrid): timetable
+        DAYS (list(str)): days of the week
+    """
+
+    name = sheetName(ttName, usedNames)
+    indexSheet.append([name, ttName])
+
+    sheet = workbook.create_sheet(name)
+    sheet.append(['Time', 'Details'] + list(DAYS))
+    for row in TT.rows():
+        sheet.append(row)
+
+
+def placementRecords(views):
+    """Every allocated cell of every timetable as a flat record
+
+    Args:
+        views (dict): view ('batches', 'rooms' or 'faculty') -> dict of timetable name -> TimetableGrid
+
+    Yields:
+        dict: record with the PLACEMENTCOLUMNS keys
+    """
+
+    for view, timetables in views.items():
+        for ttName, TT in timetables.items():
+            for placement in TT.placements():
+                yield {'view': view, 'timetable': ttName, **placement}
+
+
+def writePlacements(path, records, fileFormat):
+    """Write placement records as 'csv', 'jsonl' or 'parquet', csv and jsonl are streamed one record at a time
+
+    Args:
+        path (Path): path of the file
+        records (iterable(dict)): records from placementRecords
+        fileFormat (str): 'csv', 'jsonl' or 'parquet', parquet needs pyarrow or fastparquet installed
+    """
+
+    if fileFormat == 'parquet':
+        DataFrame(list(records), columns=PLACEMENTCOLUMNS).to_parquet(path, index=False)
+
+    elif fileFormat == 'csv':
+        with open(path, 'w', newline='', encoding='utf-8') as placementFile:
+            writer = DictWriter(placementFile, fieldnames=PLACEMENTCOLUMNS)
+            writer.writeheader()
+            writer.writerows(records)
+
+    elif fileFormat == 'jsonl':
+        with open(path, 'w', encoding='utf-8') as placementFile:
+            for record in records:
+                placementFile.write(dumps(record) + '\n')
+
+    else:
+        raise ValueError(f"Unknown placement file format {fileFormat}")
+
+
+def writeExcelFiles(jobs):
+    """Write each timetable into its own excel file, this is what every worker process runs
+
+    Args:
+        jobs (list(tuple)): (path, pd.DataFrame) of every file to write
+    """
+
+    for path, TT in jobs:
+        TT.to_excel(path, merge_cells=True)
+
+
+class ExcelFileWriter:
+    CHUNK = 32 # files handed to a worker process at once
+
+    def __init__(self, workers=None):
+        """Writes each timetable into its own excel file as they come in, spread over worker processes
+
+        Only the chunk being filled and one chunk per worker are ever waiting to be written, so the timetables don't all have
+        to be turned into DataFrames first
+
+        Args:
+            workers (int, optional): number of worker processes, 1 writes everything in this process. Defaults to the number of cores.
+        """
+
+        self.workers = workers or cpu_count()
+        self.jobs = [] # (path, pd.DataFrame) of the chunk being filled
+        self.pending = [] # chunks being written by the workers, oldest first
+        self.executor = None
+
+
+    def add(self, path, TT):
+        """Write a timetable into its own excel file, once its chunk is full
+
+        Args:
+            path (Path): path of the file
+            TT (pd.DataFrame): timetable
+        """
+
+        self.jobs.append((path, TT))
+        if len(self.jobs) >= self.CHUNK:
+            self.flush()
+
+
+    def flush(self, last=False):
+        """Hand the chunk being filled to a worker, waiting for the oldest chunk first when every worker is busy
+
+        Args:
+            last (bool, optional): nothing else is coming, a single chunk isn't worth starting worker processes for. Defaults to False.
+        """
+
+        if len(self.jobs) == 0:
+            return
+
+        if self.workers <= 1 or (last and self.executor is None):
+            writeExcelFiles(self.jobs)
+        else:
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(max_workers=self.workers)
+            if len(self.pending) >= self.workers:
+                self.pending.pop(0).result()
+            self.pending.append(self.executor.submit(writeExcelFiles, self.jobs))
+
+        self.jobs = []
+
+
+    def close(self):
+        """Write everything that's still waiting and stop the worker processes"""
+
+        self.flush(last=True)
+        for future in self.pending:
+            future.result()
+        if self.executor is not None:
+            self.executor.shutdown()
+        self.pending, self.executor = [], None
+
+
+def writeSeparateFiles(jobs, workers=None):
+    """Write each timetable into its own excel file, spread over worker processes
+
+    Args:
+        jobs (iterable(tuple)): (path, pd.DataFrame) of every file to write, a generator only has a few chunks of DataFrames made at a time
+        workers (int, optional): number of worker processes, 1 writes everything in this process. Defaults to the number of cores.
+    """
+
+    writer = ExcelFileWriter(workers)
+    for path, TT in jobs:
+        writer.add(path, TT)
+    writer.close()
+
+
+class TimetableStream:
+    def __init__(self, DIR, DAYS, FORMATS=('files',), WORKERS=1):
+        """Saves every timetable as soon as it's finished instead of once they've all been generated, into the same files as
+        Vineek.saveTables. Nothing is kept once it's written, so memory doesn't grow with the number of batches, rooms and teachers
+
+        Args:
+            DIR (Path): folder to save the timetables in
+            DAYS (list(str)): days of the week
+            FORMATS (list(str), optional): any of 'files', 'workbooks', 'csv' and 'jsonl'. Defaults to ('files',).
+            WORKERS (int, optional): worker processes writing the separate excel files, None for one per core. Defaults to 1.
+
+        Raises:
+            ValueError: parquet or an unknown format was asked for, parquet can't be written a record at a time
+        """
+
+        unknownFormats = [fileFormat for fileFormat in FORMATS if fileFormat not in ['files', 'workbooks', 'csv', 'jsonl']]
+        if unknownFormats:
+            raise ValueError(f"Timetables can't be streamed as {', '.join(unknownFormats)}, only as files, workbooks, csv and jsonl")
+
+        self.DIR = Path(DIR)
+        self.DIR.mkdir(parents=True, exist_ok=True)
+        self.DAYS = DAYS
+        self.FORMATS = FORMATS
+        self.saved = dict() # what was saved -> where it was saved
+
+        self.files = None
+        if 'files' in FORMATS:
+            self.files = ExcelFileWriter(WORKERS)
+            for view, folder in FOLDERS.items():
+                self.saved[view] = self.DIR / folder
+                self.saved[view].mkdir(parents=True, exist_ok=True)
+
+        self.workbooks = dict() # view -> (workbook, index sheet, sheet names taken)
+        if 'workbooks' in FORMATS:
+            for view in FOLDERS:
+                self.saved[f"{view} workbook"] = self.DIR / f"Vineek {view.capitalize()} Timetables.xlsx"
+                self.workbooks[view] = openWorkbook()
+
+        self.placementFiles = dict() # 'csv' or 'jsonl' -> open file
+        for fileFormat in ['csv', 'jsonl']:
+            if fileFormat in FORMATS:
+                self.saved[fileFormat] = self.DIR / f"Vineek Placements.{fileFormat}"
+                self.placementFiles[fileFormat] = open(self.saved[fileFormat], 'w', newline='' if fileFormat == 'csv' else None, encoding='utf-8')
+        self.csvWriter = None
+        if 'csv' in self.placementFiles:
+            self.csvWriter = DictWriter(self.placementFiles['csv'], fieldnames=PLACEMENTCOLUMNS)
+            self.csvWriter.writeheader()
+
+
+    def write(self, view, ttName, TT):
+        """Save a finished timetable in every format
+
+        Args:
+            view (str): 'batches', 'rooms' or 'faculty'
+            ttName (str): timetable name
+            TT (TimetableGrid): timetable
+        """
+
+        if self.files is not None:
+            self.files.add(self.saved[view] / f"{ttName}.xlsx", TT.toDataFrame())
+
+        if view in self.workbooks:
+            appendSheet(*self.workbooks[view], ttName, TT, self.DAYS)
+
+        if self.placementFiles:
+            for placement in TT.placements():
+                record = {'view': view, 'timetable': ttName, **placement}
+                if self.csvWriter is not None:
+                    self.csvWriter.writerow(record)
+                if 'jsonl' in self.placementFiles:
+                    self.placementFiles['jsonl'].write(dumps(record) + '\n')
+
+
+    def close(self):
+        """Finish writing everything
+
+        Returns:
+            dict: what was saved -> where it was saved, like Vineek.saveTables
+        """
+
+        if self.files is not None:
+            self.files.close()
+        for view, (workbook, _, _) in self.workbooks.items():
+            workbook.save(self.saved[f"{view} workbook"])
+        for placementFile in self.placementFiles.values():
+            placementFile.close()
+
+        return self.saved
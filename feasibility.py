@@ -0,0 +1,112 @@
+from collections import defaultdict
+from loader import InvalidTimetableData
+
+
+class InfeasibleTimetableData(InvalidTimetableData):
+    def __init__(self, problems):
+        """Raised before anything is scheduled when no clash-free timetables can exist for the data, whatever the engine does
+
+        Args:
+            problems (list(str)): every over-committed resource, one line each
+        """
+
+        super().__init__(problems, "No clash-free timetables can be made from this data, please fix the timetable data excel file:")
+
+
+def labBlocksPerWeek(vineek, length=2):
+    """Most lab blocks of that many hours a single batch can have in a week
+
+    Args:
+        vineek (Vineek): Vineek instance holding the timeslots
+        length (int, optional): hours of the lab block. Defaults to 2.
+
+    Returns:
+        int: lab blocks per week
+    """
+
+    blocks = 0
+    for dayNo in range(len(vineek.DAYS)):
+        lastEnd = -1
+        for timeNos in vineek.times.dayBlocks(dayNo, length).values(): # as many lab timeslots as possible that don't overlap
+            if timeNos[0] > lastEnd:
+                blocks, lastEnd = blocks + 1, timeNos[-1]
+
+    return blocks
+
+
+def availableSlots(vineek, name):
+    """Timeslots of the week a teacher/TA or room can be used in, every one but the ones of the Unavailable sheet"""
+
+    weekMask = vineek.times.weekMask()
+    return bin(weekMask).count('1') - bin(vineek.unavailable.get(name, 0) & weekMask).count('1')
+
+
+def checkFeasibility(vineek, groups, batchCounts):
+    """Count what every batch, teacher/TA, assigned room and room pool needs against what a week has, without placing anything
+
+    These are only necessary conditions, data that passes can still turn out to have no clash-free timetables
+
+    Args:
+        vineek (Vineek): Vineek instance holding the timeslots, days, rooms and engine
+        groups (dict): (Dept_id, Semester) -> semester data indexed by Course_Name
+        batchCounts (dict): (Dept_id, Semester) -> number of batches
+
+    Returns:
+        list(str): every over-committed resource, empty if none are
+    """
+
+    weekSlots = vineek.times.weekSlots()
+    problems = []
+
+    teacherHours = defaultdict(int) # teacher/TA -> hours a week
+    teacherGroups = defaultdict(set) # teacher/TA -> timetables they teach in
+    roomDemand = defaultdict(int) # candidate rooms of a class -> hours a week of classes that can only use those rooms
+    unknownRooms = set()
+
+    for courseSem, semesterData in groups.items():
+        batchCount = batchCounts.get(courseSem, 1)
+        groupName = f"{courseSem[0]} - Semester {courseSem[1]}"
+        units = vineek.solver.buildUnits(semesterData) # the same blocks the engines place, track core subjects share a block
+
+        batchHours = sum(unit.length for unit in units)
+        if batchHours > weekSlots:
+            problems.append(f"{groupName} needs {batchHours} timeslots a week for every batch but a week only has {weekSlots}")
+
+        for length in sorted({unit.length for unit in units if unit.subjectType == 'Lab_hrs'}):
+            labCount = sum(1 for unit in units if unit.subjectType == 'Lab_hrs' and unit.length == length)
+            labBlocks = labBlocksPerWeek(vineek, length)
+            if labCount > labBlocks:
+                reason = "no" if labBlocks == 0 else "only one" if labBlocks == 1 else f"only {labBlocks}"
+                problems.append(f"{groupName} needs {labCount} lab blocks of {length} hours a week for every batch but {reason} such block{'' if labBlocks == 1 else 's'} fit{'s' if labBlocks == 1 else ''} in a week")
+
+        for unit in units:
+            for teacher in unit.teachers:
+                for name in vineek.occupancy.splitNames(teacher):
+                    teacherHours[name] += unit.length * batchCount
+                    teacherGroups[name].add(groupName)
+
+            for subject, _, rooms in unit.members:
+                roomType = 'Lab' if unit.subjectType == 'Lab_hrs' else 'Class'
+                if len(rooms) == 0:
+                    unknownRooms.add(f"{subject} of {groupName} needs a {roomType} room with a capacity of "
+                                     f"{semesterData.loc[subject, 'Lab_Capacity' if roomType == 'Lab' else 'Capacity']} but there isn't one")
+                else:
+                    roomDemand[frozenset(rooms)] += unit.length * batchCount
+
+    problems += sorted(unknownRooms)
+
+    for teacher, hours in teacherHours.items():
+        teacherSlots = availableSlots(vineek, teacher)
+        if hours > teacherSlots:
+            reason = f"a week only has {weekSlots} timeslots" if teacherSlots == weekSlots else f"they're only available for {teacherSlots} timeslots a week"
+            problems.append(f"{teacher} has {hours} hours a week over {', '.join(sorted(teacherGroups[teacher]))} but {reason}")
+
+    # every set of rooms has to hold all the classes that can't go anywhere else, like an assigned room or a pool of rooms that are big enough
+    for rooms in roomDemand:
+        hours = sum(demand for rooms_, demand in roomDemand.items() if rooms_ <= rooms)
+        roomSlots = sum(availableSlots(vineek, room) for room in rooms)
+        if hours > roomSlots:
+            roomNames = f"Room {next(iter(rooms))}" if len(rooms) == 1 else f"The {len(rooms)} rooms {', '.join(sorted(rooms)[:5])}{', ...' if len(rooms) > 5 else ''}"
+            problems.append(f"{roomNames} would be needed for {hours} hours a week but only {roomSlots} are available")
+
+    return problems
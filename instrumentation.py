@@ -0,0 +1,114 @@
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from json import dump as dumpJson
+from time import perf_counter
+
+
+class RunStats:
+    GENERATIONPHASES = ['labs', 'lectures/tutorials', 'solver']
+
+    def __init__(self):
+        """Counters and timers of a generation run, with hooks that get called on every event
+
+        Events passed to hooks are 'attempt', 'reject', 'place' and 'phase', along with a dict of details
+        """
+
+        self.hooks = []
+        self.reset()
+
+
+    def reset(self):
+        """Clear all counters and timers, the hooks are kept"""
+
+        self.attempts = 0 # candidate placements tried
+        self.placements = 0 # lectures, tutorials and lab blocks allocated into a batch timetable
+        self.rejections = Counter() # reason -> number of rejected candidate placements
+        self.phaseTimes = defaultdict(float) # phase -> seconds spent in it
+
+
+    def addHook(self, hook):
+        """Register a callable hook(event, details) that is called on every event
+
+        Args:
+            hook (callable): function taking the event name and a dict of details
+        """
+
+        self.hooks.append(hook)
+
+
+    def emit(self, event, **details):
+        for hook in self.hooks:
+            hook(event, details)
+
+
+    def attempt(self):
+        """Count a candidate placement being tried"""
+
+        self.attempts += 1
+        if self.hooks:
+            self.emit('attempt')
+
+
+    def reject(self, reason, **details):
+        """Count a candidate placement being rejected
+
+        Args:
+            reason (str): why it was rejected, like 'room unavailable', 'teacher clash', 'consecutive lectures' or 'track core room collision'
+            details: day, time, subject or anything else worth passing to the hooks
+        """
+
+        self.rejections[reason] += 1
+        if self.hooks:
+            self.emit('reject', reason=reason, **details)
+
+
+    def placed(self, **details):
+        """Count a lecture, tutorial or lab block being allocated
+
+        Args:
+            details: day, time, subject or anything else worth passing to the hooks
+        """
+
+        self.placements += 1
+        if self.hooks:
+            self.emit('place', **details)
+
+
+    @contextmanager
+    def phase(self, name):
+        """Time everything done inside the with block as part of a phase like 'labs', 'lectures/tutorials' or 'export'"""
+
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = perf_counter() - start
+            self.phaseTimes[name] += elapsed
+            if self.hooks:
+                self.emit('phase', phase=name, seconds=elapsed)
+
+
+    def report(self, **extra):
+        """Summary of the run
+
+        Args:
+            extra: anything else to put in the report, like the engine and seed
+
+        Returns:
+            dict: JSON serialisable report
+        """
+
+        generationTime = sum(self.phaseTimes[phase] for phase in self.GENERATIONPHASES if phase in self.phaseTimes)
+        return {**extra,
+                'attempts': self.attempts,
+                'placements': self.placements,
+                'rejections': dict(self.rejections),
+                'phaseSeconds': dict(self.phaseTimes),
+                'placementsPerSecond': self.placements / generationTime if generationTime > 0 else None}
+
+
+    def saveReport(self, path, **extra):
+        """Write the report as a JSON file"""
+
+        with open(path, 'w') as reportFile:
+            dumpJson(self.report(**extra), reportFile, indent=4)
@@ -0,0 +1,123 @@
+from json import dumps, loads
+from os import fsync
+from pathlib import Path
+
+
+class PlacementJournal:
+    VERSION = 1
+
+    def __init__(self, path, configKey):
+        """Append-only journal of the timetables of every course and semester generated so far, so that an interrupted run
+        can pick up again after the last course and semester it finished
+
+        Every line is a JSON record: a header with the configKey first, then for every finished course and semester a
+        ["cell", timetable, day, time, subject, teacher, room] record for every allocated timeslot of its batches, a
+        ["book", faculty, day, time, subject, room] record for every faculty/room allocation and a closing
+        ["group", Dept_id, Semester] record. A ["done", random state] record ends every checkpoint, which holds one course and
+        semester or a whole component of them when they're generated in parallel. Records after the last "done" record belong to a
+        checkpoint that never finished and are thrown away
+
+        Args:
+            path (str): path of the journal file, it is created when it doesn't exist yet
+            configKey (str): hash of the data, batches and settings of the run, a journal of any other run is started over
+        """
+
+        self.path = Path(path)
+        self.configKey = configKey
+        self.groups = dict() # (Dept_id, Semester) -> {'timetables', 'bookings'} of every finished group, in order
+        self.randomState = None # state of the random engine at the last checkpoint
+        end = self.read()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if end is None:
+            self.groups, self.randomState = dict(), None
+            self.journalFile = open(self.path, 'w')
+            self.write([{'version': self.VERSION, 'configKey': configKey}])
+        else:
+            self.journalFile = open(self.path, 'r+')
+            self.journalFile.seek(end)
+            self.journalFile.truncate() # the unfinished group
+
+
+    def read(self):
+        """Load the finished groups of the journal file
+
+        Returns:
+            int: position right after the last "done" record, None if there's no journal of this run to continue
+        """
+
+        if not self.path.is_file():
+            return None
+
+        with open(self.path) as journalFile:
+            try:
+                header = loads(journalFile.readline())
+            except ValueError:
+                return None
+            if not isinstance(header, dict) or header.get('version') != self.VERSION or header.get('configKey') != self.configKey:
+                return None
+
+            end = journalFile.tell()
+            timetables, bookings, groups = dict(), [], dict()
+            for line in iter(journalFile.readline, ''):
+                try:
+                    record = loads(line)
+                except ValueError:
+                    break # cut off halfway through a write
+
+                if record[0] == 'cell':
+                    timetables.setdefault(record[1], []).append(tuple(record[2:]))
+                elif record[0] == 'book':
+                    bookings.append(tuple(record[1:]))
+                elif record[0] == 'group':
+                    groups[tuple(record[1:])] = {'timetables': timetables, 'bookings': bookings}
+                    timetables, bookings = dict(), []
+                elif record[0] == 'done':
+                    randomState = record[1]
+                    self.groups.update(groups)
+                    self.randomState = None if randomState is None else (randomState[0], tuple(randomState[1]), randomState[2])
+                    groups = dict()
+                    end = journalFile.tell()
+
+        return end
+
+
+    def write(self, records):
+        """Append records and make sure they're on the disk"""
+
+        self.journalFile.write(''.join(dumps(record, separators=(',', ':')) + '\n' for record in records))
+        self.journalFile.flush()
+        fsync(self.journalFile.fileno())
+
+
+    def record(self, groups, randomState=None):
+        """Append a checkpoint of finished courses and semesters
+
+        Args:
+            groups (dict): (Dept_id, Semester) -> 'timetables' (timetable name -> list of placements (day, time, subject, teacher, room)
+                of every batch) and 'bookings' ((facultyName, day, time, subjectName, room) of every faculty/room allocation made for it)
+            randomState (tuple, optional): state of the random engine right after them, to continue with. Defaults to None.
+        """
+
+        records = []
+        for (dept, semester), group in groups.items():
+            records += [['cell', timetableName, *placement] for timetableName, placements in group['timetables'].items() for placement in placements]
+            records += [['book', *booking] for booking in group['bookings']]
+            records.append(['group', dept, int(semester) if str(semester).isdigit() else semester])
+        records.append(['done', randomState])
+        self.write(records)
+
+        self.groups.update(groups)
+        self.randomState = randomState
+
+
+    def close(self, remove=False):
+        """Close the journal file
+
+        Args:
+            remove (bool, optional): delete it too, once the whole run has finished there's nothing left to continue. Defaults to False.
+        """
+
+        self.journalFile.close()
+        if remove:
+            self.path.unlink()
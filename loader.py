@@ -0,0 +1,328 @@
+from hashlib import sha256
+from os import getpid
+from pathlib import Path
+from pickle import dump as dumpPickle, load as loadPickle, UnpicklingError
+from warnings import warn
+from pandas import ExcelFile, DataFrame, read_excel, to_numeric
+from timemodel import Timeslot, InvalidTimeslots
+
+
+TIMETABLECOLUMNS = ['Dept_id', 'Course_id', 'Track_Core', 'Course_Name', 'Faculty', 'TA', 'Semester', 'Lecture_hrs',
+                    'Tut_hrs', 'Capacity', 'Lab_hrs', 'Lab_Capacity', 'Assigned_Room', 'Assigned_Lab']
+OPTIONALCOLUMNS = {'Lab_Block': 2} # column -> value used when the column or the cell is empty
+ROOMSCOLUMNS = ['Room_No', 'Capacity', 'Type']
+UNAVAILABLECOLUMNS = ['Name', 'Day', 'Time'] # optional 'Unavailable' sheet, a blank Day or Time is every day or timeslot
+
+TEXTCOLUMNS = ['Dept_id', 'Course_id', 'Track_Core', 'Course_Name', 'Faculty', 'TA']
+NUMBERCOLUMNS = ['Semester', 'Lecture_hrs', 'Tut_hrs', 'Capacity', 'Lab_hrs', 'Lab_Capacity', 'Lab_Block']
+ROOMCOLUMNS = ['Assigned_Room', 'Assigned_Lab']
+
+CACHEVERSION = 3
+
+
+class InvalidTimetableData(Exception):
+    def __init__(self, problems, header="Please fix the timetable data excel file:"):
+        """Raised when the timetable data excel file breaks the rules of the README
+
+        Args:
+            problems (list(str)): every problem found, one line each
+            header (str, optional): line shown above the problems. Defaults to asking to fix the excel file.
+        """
+
+        self.problems = problems
+        super().__init__(f"{header}\n- " + "\n- ".join(problems))
+
+
+def roomNumber(value, NULLVALUE=''):
+    """Room number as it's used in the timetables, 306.0 and '306' both become '306'
+
+    Args:
+        value: room number from the excel file
+        NULLVALUE (str, optional): value of empty cells. Defaults to ''.
+
+    Returns:
+        str: room number, NULLVALUE if the cell is empty
+    """
+
+    if value is None or value != value or str(value).strip() == '': # NaN != NaN
+        return NULLVALUE
+
+    try:
+        return str(int(float(value)))
+    except ValueError:
+        return str(value).strip()
+
+
+def rowNumbers(mask):
+    """Excel row numbers of the rows selected by a boolean mask, the header is row 1"""
+
+    return ', '.join(str(index + 2) for index in mask[mask].index)
+
+
+def normalize(subjectsData, classesData, NULLVALUE=''):
+    """Give every column a single type so that nothing has to be converted while generating: text and room numbers become
+    stripped strings with NULLVALUE for empty cells and hours, semesters and capacities become integers with 0 for empty cells
+
+    Args:
+        subjectsData (pd.DataFrame): 'Timetable' sheet
+        classesData (pd.DataFrame): 'Rooms' sheet
+        NULLVALUE (str, optional): value of empty cells. Defaults to ''.
+
+    Returns:
+        (pd.DataFrame, pd.DataFrame, list(str)): normalized subjects and rooms, along with every cell that isn't a number when it should be
+    """
+
+    problems = []
+    subjectsData, classesData = subjectsData.reset_index(drop=True), classesData.reset_index(drop=True)
+
+    missing = [f"'{column}' column is missing from the Timetable sheet" for column in TIMETABLECOLUMNS if column not in subjectsData.columns] + \
+              [f"'{column}' column is missing from the Rooms sheet" for column in ROOMSCOLUMNS if column not in classesData.columns]
+    if missing:
+        raise InvalidTimetableData(missing)
+
+    for column, default in OPTIONALCOLUMNS.items():
+        if column not in subjectsData.columns:
+            subjectsData[column] = default
+        subjectsData[column] = subjectsData[column].where(subjectsData[column].notna() & (subjectsData[column].astype(str).str.strip() != ''), default)
+
+    for column in TEXTCOLUMNS:
+        text = subjectsData[column].astype(str).str.strip()
+        subjectsData[column] = text.where(subjectsData[column].notna() & (text != ''), NULLVALUE)
+
+    for data, sheet, columns in [(subjectsData, 'Timetable', NUMBERCOLUMNS), (classesData, 'Rooms', ['Capacity'])]:
+        for column in columns:
+            numbers = to_numeric(data[column], errors='coerce')
+            notNumbers = numbers.isna() & data[column].notna()
+            if notNumbers.any():
+                problems.append(f"'{column}' of the {sheet} sheet has to be a number (rows {rowNumbers(notNumbers)})")
+            data[column] = numbers.fillna(0).astype(int)
+
+    for column in ROOMCOLUMNS:
+        subjectsData[column] = [roomNumber(room, NULLVALUE) for room in subjectsData[column]]
+
+    classesData['Room_No'] = [roomNumber(room, NULLVALUE) for room in classesData['Room_No']]
+    classesData['Type'] = classesData['Type'].astype(str).str.strip()
+
+    return subjectsData, classesData, problems
+
+
+def normalizeUnavailable(unavailableData, NULLVALUE=''):
+    """Give every column of the 'Unavailable' sheet a single type: names are stripped strings like room numbers and days and
+    times stripped strings, all with NULLVALUE for empty cells. Rows without anything in them are dropped
+
+    Args:
+        unavailableData (pd.DataFrame): 'Unavailable' sheet, None when the excel file doesn't have one
+        NULLVALUE (str, optional): value of empty cells. Defaults to ''.
+
+    Returns:
+        (pd.DataFrame, list(str)): normalized sheet, along with the missing columns
+    """
+
+    if unavailableData is None:
+        return DataFrame(columns=UNAVAILABLECOLUMNS), []
+
+    unavailableData = unavailableData.reset_index(drop=True)
+    missing = [f"'{column}' column is missing from the Unavailable sheet" for column in UNAVAILABLECOLUMNS if column not in unavailableData.columns]
+    if missing:
+        return DataFrame(columns=UNAVAILABLECOLUMNS), missing
+
+    unavailableData = unavailableData[UNAVAILABLECOLUMNS].copy()
+    for column in UNAVAILABLECOLUMNS:
+        unavailableData[column] = [roomNumber(value, NULLVALUE) for value in unavailableData[column]]
+
+    return unavailableData[(unavailableData != NULLVALUE).any(axis=1)], []
+
+
+def validate(subjectsData, classesData, NULLVALUE='', unavailableData=None):
+    """Check the rules of the README on the whole normalized sheets at once
+
+    Args:
+        subjectsData (pd.DataFrame): normalized 'Timetable' sheet
+        classesData (pd.DataFrame): normalized 'Rooms' sheet
+        NULLVALUE (str, optional): value of empty cells. Defaults to ''.
+        unavailableData (pd.DataFrame, optional): normalized 'Unavailable' sheet. Defaults to None.
+
+    Returns:
+        (list(str), list(str)): problems that make the data unusable and warnings about data that can still be used
+    """
+
+    problems, warnings = [], []
+
+    duplicates = subjectsData['Course_id'].duplicated(keep=False) & (subjectsData['Course_id'] != NULLVALUE)
+    for courseId in dict.fromkeys(subjectsData.loc[duplicates, 'Course_id']):
+        problems.append(f"Course_id {courseId} is used by more than one subject (rows {rowNumbers(subjectsData['Course_id'] == courseId)})")
+
+    sameTrackCore = (subjectsData['Track_Core'] != NULLVALUE) & (subjectsData['Track_Core'] == subjectsData['Course_id'])
+    if sameTrackCore.any():
+        problems.append(f"Track_Core can't be the same as the Course_id (rows {rowNumbers(sameTrackCore)})")
+
+    shortBlocks = subjectsData['Lab_Block'] < 2
+    if shortBlocks.any():
+        problems.append(f"Lab_Block has to be at least 2 hours (rows {rowNumbers(shortBlocks)})")
+
+    oddLabs = ~shortBlocks & (subjectsData['Lab_hrs'] % subjectsData['Lab_Block'].clip(lower=2) != 0)
+    if oddLabs.any():
+        problems.append(f"Lab_hrs have to be a multiple of Lab_Block (2 if it's empty) as labs are held a whole block at a time (rows {rowNumbers(oddLabs)})")
+
+    roomNumbers = set(classesData['Room_No'])
+    for column in ROOMCOLUMNS:
+        unknownRooms = (subjectsData[column] != NULLVALUE) & ~subjectsData[column].isin(roomNumbers)
+        if unknownRooms.any():
+            problems.append(f"{column} has rooms that aren't in the Rooms sheet (rows {rowNumbers(unknownRooms)})")
+
+    # a lab or tutorial without a TA can still be scheduled, it just doesn't show up in any faculty timetable
+    noTA = (subjectsData['TA'] == NULLVALUE) & ((subjectsData['Lab_hrs'] > 0) | (subjectsData['Tut_hrs'] > 0))
+    if noTA.any():
+        warnings.append(f"TA is blank for subjects with lab or tutorial hours (rows {rowNumbers(noTA)})")
+
+    if unavailableData is not None and len(unavailableData) > 0:
+        noName = unavailableData['Name'] == NULLVALUE
+        if noName.any():
+            problems.append(f"Name of the Unavailable sheet can't be blank (rows {rowNumbers(noName)})")
+
+        names = roomNumbers | {name.strip() for teacher in list(subjectsData['Faculty']) + list(subjectsData['TA']) for name in str(teacher).split(',')}
+        unknownNames = ~noName & ~unavailableData['Name'].isin(names)
+        if unknownNames.any():
+            warnings.append(f"Unavailable sheet has names that aren't a teacher/TA or room (rows {rowNumbers(unknownNames)})")
+
+    return problems, warnings
+
+
+def compileAvailability(unavailableData, times, DAYS, NULLVALUE=''):
+    """Turn the rows of the 'Unavailable' sheet into a bitmask of every teacher/TA and room over every (day, timeslot)
+
+    A Time can be one of the timeslots or any time range like '2:00 PM - 4:00 PM', which covers every timeslot it overlaps
+
+    Args:
+        unavailableData (pd.DataFrame): normalized 'Unavailable' sheet
+        times (TimeModel): timeslots of the timetables, bit times.slotNo(dayNo, timeNo) stands for a (day, timeslot)
+        DAYS (list(str)): days of the week
+        NULLVALUE (str, optional): value of empty cells. Defaults to ''.
+
+    Raises:
+        InvalidTimetableData: a row has a day that isn't one of the days or a time that can't be read
+
+    Returns:
+        dict: teacher/TA or room -> bits of the (day, timeslot)s it can't be used in
+    """
+
+    unavailable, problems = dict(), []
+    unknownDays = ~unavailableData['Day'].isin(list(DAYS) + [NULLVALUE])
+    if unknownDays.any():
+        problems.append(f"Day of the Unavailable sheet has to be one of {', '.join(DAYS)} or blank for every day (rows {rowNumbers(unknownDays)})")
+
+    for rowNo, (name, day, time) in enumerate(zip(unavailableData['Name'], unavailableData['Day'], unavailableData['Time'])):
+        if unknownDays.iloc[rowNo]:
+            continue
+
+        if time == NULLVALUE:
+            timeNos = range(len(times.labels))
+        elif time in times.index:
+            timeNos = [times.index[time]]
+        else:
+            try:
+                timeslot = Timeslot(time)
+            except InvalidTimeslots as error:
+                problems.append(f"Time of the Unavailable sheet (row {unavailableData.index[rowNo] + 2}) has to be a timeslot, a time range or blank: {error}")
+                continue
+            timeNos = [timeNo for timeNo, slot in enumerate(times.slots) if slot.overlaps(timeslot)]
+
+        bits = 0
+        for dayNo, day_ in enumerate(DAYS):
+            if day in (NULLVALUE, day_):
+                for timeNo in timeNos:
+                    bits |= 1 << times.slotNo(dayNo, timeNo)
+        unavailable[name] = unavailable.get(name, 0) | bits
+
+    if problems:
+        raise InvalidTimetableData(problems)
+
+    return unavailable
+
+
+def fileHash(FILE):
+    """sha256 of the contents of a file"""
+
+    digest = sha256()
+    with open(FILE, 'rb') as dataFile:
+        for block in iter(lambda: dataFile.read(1 << 20), b''):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+
+def loadTimetableData(FILE, NULLVALUE='', cache=True):
+    """Read, normalize and validate the Timetable and Rooms sheets of the timetable data excel file
+
+    The result is cached in a binary file next to the excel file, the excel file is only parsed again once it's been changed
+
+    Args:
+        FILE (str): path to the timetable data excel file
+        NULLVALUE (str, optional): value of empty cells. Defaults to ''.
+        cache (bool, optional): use and update the cache file. Defaults to True.
+
+    Raises:
+        InvalidTimetableData: when the data breaks any of the rules, every problem is listed at once
+
+    Returns:
+        (pd.DataFrame, pd.DataFrame, pd.DataFrame): subjects ('Timetable' sheet), rooms ('Rooms' sheet) and unavailable teachers/TAs and
+            rooms ('Unavailable' sheet, empty when there isn't one)
+    """
+
+    FILE = Path(FILE)
+    cachePath = FILE.with_name(f".{FILE.name}.cache")
+    fileStat = FILE.stat()
+    cached, digest = dict(), None
+
+    if cache and cachePath.is_file():
+        try:
+            with open(cachePath, 'rb') as cacheFile:
+                cached = loadPickle(cacheFile)
+        except (OSError, EOFError, UnpicklingError, AttributeError, ImportError):
+            cached = dict() # an unreadable cache is the same as no cache
+
+        if cached.get('version') == CACHEVERSION and cached.get('NULLVALUE') == NULLVALUE:
+            unchanged = (cached['mtime'], cached['size']) == (fileStat.st_mtime_ns, fileStat.st_size)
+            if not unchanged: # touched but maybe not changed, like a save without edits
+                digest = fileHash(FILE)
+                if cached['hash'] == digest:
+                    unchanged = True
+                    cached.update(mtime=fileStat.st_mtime_ns, size=fileStat.st_size)
+                    saveCache(cachePath, cached)
+
+            if unchanged:
+                for warning in cached['warnings']:
+                    warn(warning)
+                return cached['subjectsData'].copy(), cached['classesData'].copy(), cached['unavailableData'].copy()
+
+    with ExcelFile(FILE) as workbook: # a single pass over the workbook for every sheet
+        sheets = read_excel(workbook, header=0, sheet_name=['Timetable', 'Rooms'] + (['Unavailable'] if 'Unavailable' in workbook.sheet_names else []))
+    subjectsData, classesData, problems = normalize(sheets['Timetable'], sheets['Rooms'], NULLVALUE)
+    unavailableData, unavailableProblems = normalizeUnavailable(sheets.get('Unavailable'), NULLVALUE)
+    moreProblems, warnings = validate(subjectsData, classesData, NULLVALUE, unavailableData)
+    problems += unavailableProblems
+
+    if problems + moreProblems:
+        raise InvalidTimetableData(problems + moreProblems)
+    for warning in warnings:
+        warn(warning)
+
+    if cache:
+        saveCache(cachePath, {'version': CACHEVERSION, 'NULLVALUE': NULLVALUE,
+                              'mtime': fileStat.st_mtime_ns, 'size': fileStat.st_size, 'hash': digest or fileHash(FILE),
+                              'warnings': warnings, 'subjectsData': subjectsData, 'classesData': classesData, 'unavailableData': unavailableData})
+
+    return subjectsData.copy(), classesData.copy(), unavailableData.copy()
+
+
+def saveCache(cachePath, cached):
+    """Write the cache file, a folder that can't be written to just means there's no cache"""
+
+    try:
+        # written to the side first, so that other runs reading the cache never see half a file
+        partPath = cachePath.with_name(f"{cachePath.name}.{getpid()}")
+        with open(partPath, 'wb') as cacheFile:
+            dumpPickle(cached, cacheFile)
+        partPath.replace(cachePath)
+    except OSError:
+        pass
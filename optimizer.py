@@ -0,0 +1,407 @@
+from math import exp
+from random import Random
+from time import perf_counter
+
+
+class DayCosts(dict):
+    def __init__(self, gapWeight, loadWeight, openMask):
+        """Cost of a single day of a timetable, looked up by the bitmask of its taken timeslots and worked out the first time
+        a mask is seen, so that scoring a move never has to look at a whole timetable
+
+        Args:
+            gapWeight (float): cost of every free timeslot in between the first and last class of the day
+            loadWeight (float): cost of the square of the hours of the day, so that spreading classes over the week is cheaper
+            openMask (int): bitmask of the timeslots the day has, only those are counted as free
+        """
+
+        super().__init__()
+        self.gapWeight = gapWeight
+        self.loadWeight = loadWeight
+        self.openMask = openMask
+
+
+    def __missing__(self, mask):
+        hours = bin(mask).count('1')
+        span = (1 << mask.bit_length()) - (mask & -mask) # every timeslot from the first to the last class
+        gaps = bin(span & self.openMask).count('1') - hours if mask else 0
+        cost = self[mask] = self.gapWeight * gaps + self.loadWeight * hours * hours
+        return cost
+
+
+class Block:
+    def __init__(self, timetableNo, dayNo, timeNo, codes, teacherNos, roomNos, isLab, movable):
+        """A lecture, tutorial or lab block of a generated batch timetable, always moved as a whole so labs stay in one piece
+        and the subjects of a track core stay together
+
+        Args:
+            timetableNo (int): number of the batch timetable
+            dayNo (int): day it is held on
+            timeNo (int): first timeslot it takes
+            codes (list(tuple)): interned (subject, teacher, room) of every timeslot it takes
+            teacherNos (tuple(int)): every teacher/TA of the block
+            roomNos (tuple(int)): every room of the block
+            isLab (bool): whether it's a lab block
+            movable (bool): False for blocks of timetables that were kept from the cache
+        """
+
+        self.timetableNo = timetableNo
+        self.dayNo = dayNo
+        self.timeNo = timeNo
+        self.length = len(codes)
+        self.codes = codes
+        self.teacherNos = teacherNos
+        self.roomNos = roomNos
+        self.isLab = isLab
+        self.movable = movable
+        self.origin = (dayNo, timeNo) # where it was generated
+        self.starts = [] # dayNo -> timeNos the block can start at that day
+        self.bookings = [] # positions in vineek.bookings of the faculty/room allocations made for the block
+
+
+class LocalSearchOptimizer:
+    WEIGHTS = {'batchGaps': 1, 'facultyGaps': 1, 'batchDayLoad': 0.1, 'facultyDayLoad': 0.1}
+
+    def __init__(self, vineek, weights=None):
+        """Simulated annealing over the generated timetables that only improves soft constraints
+
+        Blocks are moved to another (day, timeslot) of their batch or swapped with a block of the same length. A move is only
+        made when the batch, teachers/TAs and rooms are free there, no teacher ends up with back to back lectures and labs
+        start at lab timeslots, so the timetables stay just as clash free as they were generated. Every timetable day is kept as a
+        bitmask of its taken timeslots, a move only rescores the days of the batch and teachers of the blocks it moves
+
+        Args:
+            vineek (Vineek): Vineek instance holding the generated timetables
+            weights (dict, optional): cost of 'batchGaps', 'facultyGaps', 'batchDayLoad' and 'facultyDayLoad', the missing ones
+                are taken from WEIGHTS. Defaults to WEIGHTS.
+        """
+
+        self.vineek = vineek
+        self.weights = {**self.WEIGHTS, **(weights or dict())}
+
+
+    def labLength(self, subjectName, semesterData, runLength):
+        """Hours of a lab block from the Lab_Block of its subject (the first member for track cores), the whole run of
+        identical timeslots if the subject can't be found"""
+
+        subject, _, members = subjectName.partition(' (Lab) - ')
+        if members:
+            subject = members.split(', ')[0]
+        else:
+            subject = subject[:-len(' (Lab)')]
+
+        if semesterData is not None and subject in semesterData.index:
+            length = int(semesterData.loc[subject, 'Lab_Block'])
+            if length > 0 and runLength % length == 0:
+                return length
+
+        return runLength
+
+
+    def buildBlocks(self, timetableGroups, frozen):
+        """Split every batch timetable into blocks and fill in the bitmasks of every batch, teacher/TA and room
+
+        Args:
+            timetableGroups (dict): timetable name -> semester data of its course and semester
+            frozen (set): names of the timetables that can't be changed
+        """
+
+        vineek = self.vineek
+        strings = vineek.strings.strings
+        times = vineek.times
+        dayCount, timeCount = len(vineek.DAYS), len(vineek.TIMESLOTS)
+
+        self.timetableNames = list(vineek.TIMETABLES)
+        self.teacherNos, self.roomNos = dict(), dict()
+        self.blocks = []
+        self.cells = [[[None] * timeCount for _ in range(dayCount)] for _ in self.timetableNames] # timetable -> day -> timeslot -> block
+
+        for timetableNo, timetableName in enumerate(self.timetableNames):
+            cells = vineek.TIMETABLES[timetableName].cells
+            semesterData = timetableGroups.get(timetableName)
+            for dayNo in range(dayCount):
+                timeNo = 0
+                while timeNo < timeCount:
+                    codes = tuple(int(code) for code in cells[dayNo, timeNo])
+                    if codes[0] == 0:
+                        timeNo += 1
+                        continue
+
+                    subjectName = strings[codes[0]]
+                    isLab = subjectName.endswith(' (Lab)') or ' (Lab) - ' in subjectName
+                    length = 1
+                    if isLab:
+                        run = [timeNo] # identical timeslots without a break in between
+                        while times.following[dayNo][run[-1]] is not None and tuple(int(code) for code in cells[dayNo, times.following[dayNo][run[-1]]]) == codes:
+                            run.append(times.following[dayNo][run[-1]])
+                        length = self.labLength(subjectName, semesterData, len(run))
+
+                    teacherNos = tuple(self.teacherNos.setdefault(name, len(self.teacherNos)) for name in dict.fromkeys(vineek.occupancy.splitNames(strings[codes[1]])))
+                    roomNos = tuple(self.roomNos.setdefault(room, len(self.roomNos)) for room in dict.fromkeys(vineek.occupancy.splitNames(strings[codes[2]])))
+                    block = Block(timetableNo, dayNo, timeNo, [codes] * length, teacherNos, roomNos, isLab, timetableName not in frozen)
+                    block.starts = [list(times.dayBlocks(dayNo_, length)) for dayNo_ in range(dayCount)]
+                    self.blocks.append(block)
+                    for timeNo_ in times.dayBlocks(dayNo, length)[timeNo]:
+                        self.cells[timetableNo][dayNo][timeNo_] = block
+                    timeNo = times.dayBlocks(dayNo, length)[timeNo][-1] + 1
+
+        # entities the objective is scored on: batches first, then teachers/TAs
+        self.masks = [[0] * dayCount for _ in range(len(self.timetableNames) + len(self.teacherNos))]
+        self.roomMasks = [[0] * dayCount for _ in self.roomNos]
+        batchCosts = [DayCosts(self.weights['batchGaps'], self.weights['batchDayLoad'], openMask) for openMask in times.openMasks]
+        facultyCosts = [DayCosts(self.weights['facultyGaps'], self.weights['facultyDayLoad'], openMask) for openMask in times.openMasks]
+        self.costs = [batchCosts] * len(self.timetableNames) + [facultyCosts] * len(self.teacherNos) # entity -> day -> costs
+
+        # (day, timeslot)s teachers/TAs and rooms can't be used in, apart from the masks so that they aren't scored
+        self.unavailable = [[0] * dayCount for _ in self.timetableNames] + [self.unavailableDays(name) for name in self.teacherNos]
+        self.closedRooms = [self.unavailableDays(room) for room in self.roomNos]
+
+        for block in self.blocks:
+            block.entities = (block.timetableNo,) + tuple(len(self.timetableNames) + teacherNo for teacherNo in block.teacherNos)
+            self.drop(block, block.dayNo, block.timeNo)
+
+        # faculty/room allocations belong to the block of the batch timetable holding that room in that (day, timeslot)
+        roomBlocks = dict()
+        for block in self.blocks:
+            for roomNo in block.roomNos:
+                for timeNo in self.columns(block, block.dayNo, block.timeNo):
+                    roomBlocks[(block.dayNo, timeNo, roomNo)] = block
+        for bookingNo, (_, day, time, _, room) in enumerate(vineek.bookings):
+            block = roomBlocks.get((vineek.dayIndex[day], vineek.timeIndex[time], self.roomNos.get(room)))
+            if block is not None:
+                block.bookings.append(bookingNo)
+
+
+    def unavailableDays(self, name):
+        """Bitmask of the timeslots of every day a teacher/TA or room can't be used in, from vineek.unavailable"""
+
+        vineek = self.vineek
+        bits, dayMask = vineek.unavailable.get(name, 0), (1 << len(vineek.TIMESLOTS)) - 1
+        return [bits >> vineek.times.slotNo(dayNo, 0) & dayMask for dayNo in range(len(vineek.DAYS))]
+
+
+    def columns(self, block, dayNo, timeNo):
+        """Timeslots a block takes when it starts at a (day, timeslot)"""
+
+        return self.vineek.times.dayBlocks(dayNo, block.length)[timeNo]
+
+
+    def lift(self, block):
+        """Take a block out of the bitmasks and cells"""
+
+        timeNos = self.columns(block, block.dayNo, block.timeNo)
+        bits = sum(1 << timeNo for timeNo in timeNos)
+        for entity in block.entities:
+            self.masks[entity][block.dayNo] &= ~bits
+        for roomNo in block.roomNos:
+            self.roomMasks[roomNo][block.dayNo] &= ~bits
+        cells = self.cells[block.timetableNo][block.dayNo]
+        for timeNo in timeNos:
+            cells[timeNo] = None
+
+
+    def drop(self, block, dayNo, timeNo):
+        """Put a block into the bitmasks and cells at a (day, timeslot)"""
+
+        block.dayNo, block.timeNo = dayNo, timeNo
+        timeNos = self.columns(block, dayNo, timeNo)
+        bits = sum(1 << timeNo_ for timeNo_ in timeNos)
+        for entity in block.entities:
+            self.masks[entity][dayNo] |= bits
+        for roomNo in block.roomNos:
+            self.roomMasks[roomNo][dayNo] |= bits
+        cells = self.cells[block.timetableNo][dayNo]
+        for timeNo_ in timeNos:
+            cells[timeNo_] = block
+
+
+    def fits(self, block, dayNo, timeNo):
+        """Check every hard constraint for a lifted block at a (day, timeslot)"""
+
+        return self.clashReason(block, dayNo, timeNo) is None
+
+
+    def clashReason(self, block, dayNo, timeNo, roomNos=None):
+        """Find which hard constraint a lifted block breaks at a (day, timeslot)
+
+        Args:
+            block (Block): lifted block
+            dayNo (int): day
+            timeNo (int): first timeslot
+            roomNos (tuple(int), optional): rooms to hold it in instead of its own. Defaults to its own rooms.
+
+        Returns:
+            str: 'no such timeslot', 'teacher unavailable', 'room closed', 'batch busy', 'teacher clash', 'room unavailable' or
+                'consecutive lectures', None if it fits
+        """
+
+        timeNos = self.vineek.times.dayBlocks(dayNo, block.length).get(timeNo)
+        if timeNos is None:
+            return 'no such timeslot' # closed that day, or a lab block would run over a break
+        bits = sum(1 << timeNo_ for timeNo_ in timeNos)
+        roomNos = block.roomNos if roomNos is None else roomNos
+        if any(self.unavailable[entity][dayNo] & bits for entity in block.entities[1:]):
+            return 'teacher unavailable'
+        if any(self.closedRooms[roomNo][dayNo] & bits for roomNo in roomNos):
+            return 'room closed'
+        if self.masks[block.entities[0]][dayNo] & bits:
+            return 'batch busy'
+        if any(self.masks[entity][dayNo] & bits for entity in block.entities[1:]):
+            return 'teacher clash'
+        if any(self.roomMasks[roomNo][dayNo] & bits for roomNo in roomNos):
+            return 'room unavailable'
+
+        # noConsecutiveLectures, a teacher's lecture/tutorial can't be right before or after another one of their blocks
+        times = self.vineek.times
+        cells = self.cells[block.timetableNo][dayNo]
+        for neighbourNo in (times.previous[dayNo][timeNos[0]], times.next[dayNo][timeNos[-1]]):
+            neighbour = None if neighbourNo is None else cells[neighbourNo]
+            if neighbour is not None and not (block.isLab and neighbour.isLab) and not set(block.teacherNos).isdisjoint(neighbour.teacherNos):
+                return 'consecutive lectures'
+
+        return None
+
+
+    def score(self, blocks, dayNos):
+        """Cost of the given days of the batches and teachers of the given blocks"""
+
+        entities = {entity for block in blocks for entity in block.entities}
+        return sum(self.costs[entity][dayNo][self.masks[entity][dayNo]] for entity in entities for dayNo in dayNos)
+
+
+    def totalScore(self):
+        """Cost of every day of every batch and teacher timetable"""
+
+        return sum(self.costs[entity][dayNo][mask] for entity, masks in enumerate(self.masks) for dayNo, mask in enumerate(masks))
+
+
+    def tryMove(self, blocks, targets, temperature):
+        """Move blocks to new (day, timeslot)s if every hard constraint holds, keeping the move if it's accepted by the
+        annealing rule
+
+        Args:
+            blocks (list(Block)): blocks to move
+            targets (list(tuple)): (dayNo, timeNo) for every block
+            temperature (float): current temperature, worse moves are accepted with probability exp(-delta / temperature)
+
+        Returns:
+            float: change of the total cost, None if the move wasn't made
+        """
+
+        origins = [(block.dayNo, block.timeNo) for block in blocks]
+        dayNos = {dayNo for dayNo, _ in origins + targets}
+        before = self.score(blocks, dayNos)
+
+        for block in blocks:
+            self.lift(block)
+
+        placed = []
+        for block, (dayNo, timeNo) in zip(blocks, targets):
+            if not self.fits(block, dayNo, timeNo):
+                break
+            self.drop(block, dayNo, timeNo)
+            placed.append(block)
+
+        if len(placed) == len(blocks):
+            delta = self.score(blocks, dayNos) - before
+            if delta <= 0 or (temperature > 0 and self.random.random() < exp(-delta / temperature)):
+                return delta
+
+        for block in placed:
+            self.lift(block)
+        for block, (dayNo, timeNo) in zip(blocks, origins):
+            self.drop(block, dayNo, timeNo)
+
+        return None
+
+
+    def optimize(self, timetableGroups, frozen=(), timeLimit=10, maxMoves=None, seed=None):
+        """Improve the generated timetables in place, the faculty and room timetables follow the blocks they belong to
+
+        Args:
+            timetableGroups (dict): timetable name -> semester data of its course and semester
+            frozen (iterable(str), optional): names of the timetables to keep as they are. Defaults to ().
+            timeLimit (float, optional): seconds to search for. Defaults to 10.
+            maxMoves (int, optional): moves to try, the search is only repeatable for a seed when this runs out before the
+                time limit. Defaults to no limit.
+            seed (int, optional): seed of the moves. Defaults to None.
+
+        Returns:
+            dict: moves tried and accepted, along with the cost before and after
+        """
+
+        self.random = Random(seed) # separate from vineek.random so that the engines aren't affected
+        self.buildBlocks(timetableGroups, set(frozen))
+
+        movable = [block for block in self.blocks if block.movable]
+        swappable = dict() # (timetable, length) -> blocks that can trade places
+        for block in movable:
+            swappable.setdefault((block.timetableNo, block.length), []).append(block)
+
+        startScore = bestScore = currentScore = self.totalScore()
+        best = [(block.dayNo, block.timeNo) for block in self.blocks]
+        moves = accepted = 0
+        start = perf_counter()
+        dayCount = len(self.vineek.DAYS)
+
+        # a worse move costing twice the heaviest weight starts out being accepted 1 in e times, cooled down geometrically to almost never
+        startTemperature = 2.0 * max(self.weights.values())
+        temperature = startTemperature
+        while movable and (maxMoves is None or moves < maxMoves):
+            if moves % 1000 == 0:
+                elapsed = perf_counter() - start
+                if elapsed >= timeLimit:
+                    break
+                progress = max(elapsed / timeLimit, moves / maxMoves if maxMoves else 0)
+                temperature = startTemperature * 0.001 ** progress
+
+            moves += 1
+            block = self.random.choice(movable)
+            partners = swappable[(block.timetableNo, block.length)]
+            if len(partners) > 1 and self.random.random() < 0.3:
+                partner = self.random.choice(partners)
+                if partner is block:
+                    continue
+                delta = self.tryMove([block, partner], [(partner.dayNo, partner.timeNo), (block.dayNo, block.timeNo)], temperature)
+            else:
+                dayNo = self.random.randrange(dayCount)
+                target = (dayNo, self.random.choice(block.starts[dayNo])) if block.starts[dayNo] else None
+                if target is None or target == (block.dayNo, block.timeNo):
+                    continue
+                delta = self.tryMove([block], [target], temperature)
+
+            if delta is not None:
+                accepted += 1
+                currentScore += delta
+                if currentScore < bestScore - 1e-9:
+                    bestScore = currentScore
+                    best = [(block.dayNo, block.timeNo) for block in self.blocks]
+
+        for block, (dayNo, timeNo) in zip(self.blocks, best):
+            block.dayNo, block.timeNo = dayNo, timeNo
+        self.apply()
+
+        return {'moves': moves, 'accepted': accepted, 'seconds': perf_counter() - start, 'scoreBefore': startScore, 'scoreAfter': bestScore}
+
+
+    def apply(self):
+        """Write the blocks back into the batch timetables and redo the faculty and room timetables from the moved allocations"""
+
+        vineek = self.vineek
+        timetables = [vineek.TIMETABLES[timetableName] for timetableName in self.timetableNames]
+        for timetable in timetables:
+            timetable.cells[:] = 0
+
+        bookings = list(vineek.bookings)
+        for block in self.blocks:
+            timeNos = self.columns(block, block.dayNo, block.timeNo)
+            for timeNo, codes in zip(timeNos, block.codes):
+                timetables[block.timetableNo].cells[block.dayNo, timeNo] = codes
+
+            day = vineek.DAYS[block.dayNo]
+            originTimeNos = self.columns(block, *block.origin)
+            for bookingNo in block.bookings:
+                facultyName, _, time, subjectName, room = bookings[bookingNo]
+                offset = originTimeNos.index(vineek.timeIndex[time])
+                bookings[bookingNo] = (facultyName, day, vineek.TIMESLOTS[timeNos[offset]], subjectName, room)
+
+        vineek.rebook(bookings)
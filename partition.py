@@ -0,0 +1,153 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from os import cpu_count
+
+
+def groupResources(vineek, semesterData, pools=True):
+    """Every teacher/TA and room a course and semester could use, assigned rooms along with every room of the pools its
+    subjects can pick from
+
+    Args:
+        vineek (Vineek): Vineek instance holding the rooms
+        semesterData (pd.DataFrame): semester data indexed by Course_Name
+        pools (bool, optional): count the rooms of the pools too, only the assigned rooms otherwise. Defaults to True.
+
+    Returns:
+        set(str): teacher/TA names and 'Room <Room_No>' for the rooms
+    """
+
+    resources = {name for teacher in list(semesterData['Faculty']) + list(semesterData['TA']) for name in vineek.occupancy.splitNames(teacher)}
+
+    for roomType, hoursColumns, capacityColumn, assignedColumn in [('Class', ['Lecture_hrs', 'Tut_hrs'], 'Capacity', 'Assigned_Room'),
+                                                                   ('Lab', ['Lab_hrs'], 'Lab_Capacity', 'Assigned_Lab')]:
+        needed = semesterData[hoursColumns].sum(axis=1) > 0
+        for capacity, assignedRoom in zip(semesterData.loc[needed, capacityColumn], semesterData.loc[needed, assignedColumn]):
+            rooms = [assignedRoom] if assignedRoom != vineek.NULLVALUE else vineek.catalog.fittingRooms(roomType, capacity) if pools else []
+            resources.update(f"Room {room}" for room in rooms)
+
+    return resources
+
+
+def conflictComponents(vineek, groups):
+    """Split the courses and semesters into components that share no teacher/TA or room, so that the timetables of one
+    component can never clash with another's
+
+    Args:
+        vineek (Vineek): Vineek instance holding the rooms
+        groups (dict): (Dept_id, Semester) -> semester data indexed by Course_Name
+
+    Returns:
+        list(list(tuple)): (Dept_id, Semester) of every group of every component, components and groups in input order
+    """
+
+    parents = {courseSem: courseSem for courseSem in groups} # union-find over the groups
+
+    def find(courseSem):
+        while parents[courseSem] != courseSem:
+            parents[courseSem] = parents[parents[courseSem]]
+            courseSem = parents[courseSem]
+        return courseSem
+
+    owners = dict() # resource -> first group using it
+    for courseSem, semesterData in groups.items():
+        for resource in groupResources(vineek, semesterData):
+            owner = owners.setdefault(resource, courseSem)
+            parents[find(owner)] = find(courseSem)
+
+    components = dict()
+    for courseSem in groups:
+        components.setdefault(find(courseSem), []).append(courseSem)
+
+    return list(components.values())
+
+
+def scheduleComponent(settings, classesData, unavailable, groups, groupTimetables, bookings):
+    """Generate the timetables of a single component, this is what every worker process runs
+
+    Args:
+        settings (dict): arguments for Vineek, TIMESLOTS, DAYS, NULLVALUE, ENGINE, TIMELIMIT, SEED and BESTFIT
+        classesData (pd.DataFrame): normalized 'Rooms' sheet
+        unavailable (dict): teacher/TA or room -> bits of the (day, timeslot)s it can't be used in
+        groups (dict): (Dept_id, Semester) -> semester data of every group of the component to generate
+        groupTimetables (dict): (Dept_id, Semester) -> timetable names of its batches
+        bookings (list(tuple)): faculty/room allocations made before, from timetables kept from the cache
+
+    Returns:
+        dict: 'groups' maps (Dept_id, Semester) to its 'timetables' (name -> placements) and 'bookings', 'stats' holds the counters
+    """
+
+    from Vineek import Vineek, RoomCatalog
+
+    vineek = Vineek(**settings)
+    vineek.classesData = classesData
+    vineek.catalog = RoomCatalog(classesData, settings['BESTFIT'])
+    vineek.unavailable = unavailable
+    vineek.reset()
+    for facultyName, day, time, _, room in bookings:
+        vineek.occupancy.book(day, time, facultyName, room)
+
+    results = dict()
+    for courseSem, semesterData in groups.items():
+        bookingsStart = len(vineek.bookings)
+        vineek.scheduleGroup(semesterData, groupTimetables[courseSem])
+        results[courseSem] = {'timetables': {timetableName: [tuple(placement.values()) for placement in vineek.TIMETABLES[timetableName].placements()]
+                                             for timetableName in groupTimetables[courseSem]},
+                              'bookings': vineek.bookings[bookingsStart:]}
+
+    stats = vineek.stats
+    return {'groups': results, 'stats': (stats.attempts, stats.placements, stats.rejections, stats.phaseTimes)}
+
+
+def scheduleComponents(vineek, groups, groupTimetables, reschedule, workers=None, onFinished=None):
+    """Generate the timetables of every independent component at the same time, one worker process per component
+
+    Every component is generated with its own copy of the random engine seeded with vineek.SEED, so the timetables only depend
+    on the data and the seed and never on the number of workers
+
+    Args:
+        vineek (Vineek): Vineek instance holding the data and the allocations of the timetables kept from the cache
+        groups (dict): (Dept_id, Semester) -> semester data indexed by Course_Name
+        groupTimetables (dict): (Dept_id, Semester) -> timetable names of its batches
+        reschedule (set): (Dept_id, Semester) of the groups to generate
+        workers (int, optional): number of worker processes, 1 generates the components one after another in this process.
+            Defaults to one per core.
+        onFinished (callable, optional): called with the results of the groups of every component as soon as it's generated. Defaults to None.
+
+    Returns:
+        dict: (Dept_id, Semester) -> 'timetables' (name -> placements) and 'bookings' of every generated group
+    """
+
+    settings = {'TIMESLOTS': vineek.times.grids, 'DAYS': vineek.DAYS, 'NULLVALUE': vineek.NULLVALUE, 'ENGINE': vineek.ENGINE,
+                'TIMELIMIT': vineek.solver.timeLimit, 'SEED': vineek.SEED, 'BESTFIT': vineek.BESTFIT}
+
+    jobs = []
+    for component in conflictComponents(vineek, groups):
+        componentGroups = {courseSem: groups[courseSem] for courseSem in component if courseSem in reschedule}
+        if componentGroups:
+            jobs.append((settings, vineek.classesData, vineek.unavailable, componentGroups, {courseSem: groupTimetables[courseSem] for courseSem in componentGroups}, vineek.bookings))
+
+    # the biggest components first so that the last worker isn't left with the longest one
+    jobs.sort(key=lambda job: -sum(len(semesterData) * len(groupTimetables[courseSem]) for courseSem, semesterData in job[3].items()))
+
+    def finished(output):
+        if onFinished is not None:
+            onFinished(output['groups'])
+        return output
+
+    workers = min(workers or cpu_count(), len(jobs))
+    if workers <= 1:
+        outputs = [finished(scheduleComponent(*job)) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            outputs = [finished(future.result()) for future in as_completed([executor.submit(scheduleComponent, *job) for job in jobs])]
+
+    results = dict()
+    for output in outputs:
+        results.update(output['groups'])
+        attempts, placements, rejections, phaseTimes = output['stats']
+        vineek.stats.attempts += attempts
+        vineek.stats.placements += placements
+        vineek.stats.rejections.update(rejections)
+        for phase, seconds in phaseTimes.items():
+            vineek.stats.phaseTimes[phase] += seconds
+
+    return results
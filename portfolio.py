@@ -0,0 +1,111 @@
+from contextlib import redirect_stdout
+from multiprocessing import Process, Queue
+from os import cpu_count, devnull
+from queue import Empty
+from random import SystemRandom
+from time import perf_counter
+
+
+def runSeed(seed, FILE, batchCounts, vineekArgs):
+    """Run the whole generation pipeline for a single seed, this is what every worker process of the portfolio runs
+
+    Args:
+        seed (int): seed of the random engine
+        FILE (str): path to the timetable data excel file
+        batchCounts (dict): (Dept_id, Semester) -> number of batches
+        vineekArgs (dict): any other arguments for Vineek, like TIMESLOTS, DAYS and ENGINE
+
+    Returns:
+        dict: seed, penalty, time taken and the generated batch, faculty and room timetables
+    """
+
+    from Vineek import Vineek
+
+    start = perf_counter()
+    with open(devnull, 'w') as quiet, redirect_stdout(quiet):
+        vineek = Vineek(SEED=seed, FILE=FILE, **vineekArgs)
+        vineek.generate(batchCounts)
+
+    return {'seed': seed,
+            'penalty': vineek.schedulePenalty(),
+            'elapsed': perf_counter() - start,
+            'TIMETABLES': vineek.TIMETABLES,
+            'facultyTT': vineek.facultyTT,
+            'roomTT': vineek.roomTT}
+
+
+def runWorker(results, seed, FILE, batchCounts, vineekArgs):
+    """runSeed in a worker process, its result or error is sent back along with the seed"""
+
+    try:
+        results.put((seed, runSeed(seed, FILE, batchCounts, vineekArgs), None))
+    except Exception as error:
+        results.put((seed, None, repr(error)))
+
+
+def runPortfolio(FILE, batchCounts, seeds=None, workers=None, mode='first', timeLimit=None, **vineekArgs):
+    """Run independently seeded copies of the generation pipeline in parallel, one per core, and keep the first or best result
+
+    Any result can be reproduced exactly with Vineek(SEED=result['seed'], FILE=FILE, ...).generate(batchCounts)
+
+    Args:
+        FILE (str): path to the timetable data excel file
+        batchCounts (dict): (Dept_id, Semester) -> number of batches
+        seeds (list(int), optional): seeds to run. Defaults to one random seed per worker.
+        workers (int, optional): number of worker processes. Defaults to the number of cores.
+        mode (str, optional): 'first' returns the first complete set of timetables, 'best' waits for every seed and returns the one with the lowest penalty. Defaults to 'first'.
+        timeLimit (float, optional): seconds to wait before giving up on the seeds that are still running. Defaults to no limit.
+        vineekArgs: any other arguments for Vineek, like TIMESLOTS, DAYS and ENGINE
+
+    Returns:
+        dict: 'best' is the chosen result from runSeed (None if every seed failed), 'seeds' lists every seed to run,
+              'results' maps every finished seed to its penalty and time taken and 'failures' maps failed seeds to their error
+    """
+
+    workers = workers or cpu_count()
+    if seeds is None:
+        seeds = [SystemRandom().randrange(2 ** 32) for _ in range(workers)]
+
+    deadline = None if timeLimit is None else perf_counter() + timeLimit
+    results, failures = dict(), dict()
+    best = None
+
+    # a process of its own for every seed rather than a ProcessPoolExecutor: a running future can't be cancelled and shutting
+    # the pool down waits for it, while a stuck seed has to be killed
+    queue = Queue()
+    waiting, processes = list(seeds), dict() # seed -> worker process that hasn't sent its result yet
+    try:
+        while (waiting or processes) and not (mode == 'first' and best is not None):
+            while waiting and len(processes) < workers:
+                seed = waiting.pop(0)
+                processes[seed] = Process(target=runWorker, args=(queue, seed, FILE, batchCounts, vineekArgs), daemon=True)
+                processes[seed].start()
+
+            if deadline is not None and perf_counter() >= deadline: # out of time
+                break
+            try:
+                # checked every second so that a worker that died without sending anything isn't waited on forever
+                seed, result, error = queue.get(timeout=1 if deadline is None else max(0, min(1, deadline - perf_counter())))
+            except Empty:
+                for seed, process in list(processes.items()):
+                    if process.exitcode not in (None, 0):
+                        failures[seed] = f"worker process exited with code {process.exitcode}"
+                        del processes[seed]
+                continue
+
+            processes.pop(seed).join()
+            if error is not None:
+                failures[seed] = error
+                continue
+
+            results[seed] = {'penalty': result['penalty'], 'elapsed': result['elapsed']}
+            if best is None or result['penalty'] < best['penalty']:
+                best = result
+
+    finally:
+        # the random engine can get stuck forever, so the workers that are still going are killed rather than waited on
+        for process in processes.values():
+            process.terminate()
+            process.join()
+
+    return {'best': best, 'seeds': seeds, 'results': results, 'failures': failures}
@@ -0,0 +1,438 @@
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from json import dumps, loads
+from pathlib import Path
+from sys import stdin, stdout
+from optimizer import LocalSearchOptimizer
+
+
+class InvalidRequest(ValueError):
+    """Raised when a query names a timetable, class, day, timeslot or room that doesn't exist or asks for something that can't be done"""
+
+
+class ScheduleService:
+    def __init__(self, vineek, DIR=None):
+        """Generated timetables kept in memory along with the bitmasks of every batch, teacher/TA and room, so that what-if
+        queries and manual moves are answered without generating or reading anything again
+
+        Classes are the blocks of LocalSearchOptimizer, so a lab is always moved as a whole and the subjects of a track core stay
+        together. A move is only made when it keeps every hard constraint the engines keep, the changed batch, room and faculty
+        timetables are remembered so that only those are exported again
+
+        Args:
+            vineek (Vineek): Vineek instance the timetables were generated with
+            DIR (str, optional): folder the timetables are exported to. Defaults to the folder of the timetable data excel file.
+        """
+
+        self.vineek = vineek
+        self.DIR = vineek.DIR if DIR is None else Path(DIR)
+        self.state = LocalSearchOptimizer(vineek)
+        self.state.buildBlocks(vineek.timetableGroups, frozen=set())
+        self.timetableNos = {timetableName: timetableNo for timetableNo, timetableName in enumerate(self.state.timetableNames)}
+        self.changed = {'batches': set(), 'rooms': set(), 'faculty': set()} # timetables changed since the last export
+        self.requests = {'classes': self.classes, 'options': self.options, 'check': self.check, 'move': self.move, 'swap': self.swap, 'export': self.export}
+
+
+    def find(self, timetable, day, time):
+        """Block of the class a batch timetable has in a (day, timeslot)
+
+        Raises:
+            InvalidRequest: there's no such timetable, day or timeslot, or no class in it
+        """
+
+        if timetable not in self.timetableNos:
+            raise InvalidRequest(f"There's no timetable called {timetable}")
+        dayNo, timeNo = self.slot(day, time)
+        block = self.state.cells[self.timetableNos[timetable]][dayNo][timeNo]
+        if block is None:
+            raise InvalidRequest(f"{timetable} has no class on {day} at {time}")
+
+        return block
+
+
+    def slot(self, day, time):
+        """(dayNo, timeNo) of a day and timeslot
+
+        Raises:
+            InvalidRequest: there's no such day or timeslot
+        """
+
+        if day not in self.vineek.dayIndex:
+            raise InvalidRequest(f"There's no day called {day}")
+        if time not in self.vineek.timeIndex:
+            raise InvalidRequest(f"There's no timeslot called {time}")
+
+        return self.vineek.dayIndex[day], self.vineek.timeIndex[time]
+
+
+    def roomNo(self, room):
+        """Number of a room in the room bitmasks, rooms that aren't used by any class yet are added"""
+
+        state = self.state
+        if room not in state.roomNos:
+            state.roomNos[room] = len(state.roomNos)
+            state.roomMasks.append([0] * len(self.vineek.DAYS))
+            state.closedRooms.append(state.unavailableDays(room))
+
+        return state.roomNos[room]
+
+
+    def describe(self, block):
+        """Block as it's shown in the answers"""
+
+        vineek = self.vineek
+        subject, teacher, room = (vineek.strings.strings[code] for code in block.codes[0])
+        return {'timetable': self.state.timetableNames[block.timetableNo], 'day': vineek.DAYS[block.dayNo],
+                'times': [vineek.TIMESLOTS[timeNo] for timeNo in self.state.columns(block, block.dayNo, block.timeNo)],
+                'subject': subject, 'teacher': teacher, 'room': room}
+
+
+    def fittingRooms(self, block):
+        """Rooms a class can be moved to, its assigned room/lab or every room of its type and capacity like the engines pick
+
+        Returns:
+            list(str): room numbers, None for track cores which keep the rooms they have
+        """
+
+        vineek = self.vineek
+        subjectName = vineek.strings.strings[block.codes[0][0]]
+        if len(block.roomNos) != 1 or ' - ' in subjectName:
+            return None
+
+        isLab, isTut = subjectName.endswith(' (Lab)'), subjectName.endswith(' (Tut)')
+        subject = subjectName[:-len(' (Lab)')] if isLab or isTut else subjectName
+        room = vineek.strings.strings[block.codes[0][2]]
+        semesterData = vineek.timetableGroups.get(self.state.timetableNames[block.timetableNo])
+        if semesterData is None or subject not in semesterData.index:
+            return [room]
+
+        assignedRoom = semesterData.loc[subject, 'Assigned_Lab' if isLab else 'Assigned_Room']
+        if assignedRoom != vineek.NULLVALUE:
+            return [assignedRoom]
+
+        rooms = vineek.catalog.fittingRooms('Lab' if isLab else 'Class', semesterData.loc[subject, 'Lab_Capacity' if isLab else 'Capacity'])
+        return rooms if room in rooms else [room] + rooms
+
+
+    def classes(self, timetable, subject=None):
+        """Every class of a batch timetable
+
+        Args:
+            timetable (str): batch timetable name
+            subject (str, optional): only the classes with this in their subject name. Defaults to every class.
+
+        Returns:
+            dict: 'classes' with the day, timeslots, subject, teacher and room of every class
+        """
+
+        if timetable not in self.timetableNos:
+            raise InvalidRequest(f"There's no timetable called {timetable}")
+
+        timetableNo = self.timetableNos[timetable]
+        blocks = sorted((block for block in self.state.blocks if block.timetableNo == timetableNo), key=lambda block: (block.dayNo, block.timeNo))
+        classes = [self.describe(block) for block in blocks]
+        return {'classes': [class_ for class_ in classes if subject is None or subject in class_['subject']]}
+
+
+    def options(self, timetable, day, time):
+        """Every (day, timeslot, room) the class of a batch timetable in a (day, timeslot) can be moved to
+
+        Args:
+            timetable (str): batch timetable name
+            day (str): day the class is on
+            time (str): any timeslot of the class
+
+        Returns:
+            dict: 'class' being moved and its 'options', each a day, the timeslots and a room
+        """
+
+        vineek, state = self.vineek, self.state
+        block = self.find(timetable, day, time)
+        rooms = self.fittingRooms(block)
+        origin = (block.dayNo, block.timeNo)
+        currentRoom = vineek.strings.strings[block.codes[0][2]]
+
+        options = []
+        state.lift(block)
+        try:
+            for dayNo, day_ in enumerate(vineek.DAYS):
+                for timeNo, timeNos in vineek.times.dayBlocks(dayNo, block.length).items():
+                    if state.clashReason(block, dayNo, timeNo, roomNos=()) is not None:
+                        continue
+                    times = [vineek.TIMESLOTS[timeNo_] for timeNo_ in timeNos]
+                    for room in [currentRoom] if rooms is None else rooms:
+                        if (dayNo, timeNo) == origin and room == currentRoom:
+                            continue
+                        if state.clashReason(block, dayNo, timeNo, None if rooms is None else (self.roomNo(room),)) is None:
+                            options.append({'day': day_, 'times': times, 'room': room})
+        finally:
+            state.drop(block, *origin)
+
+        return {'class': self.describe(block), 'options': options}
+
+
+    def check(self, timetable, day, time, to=None, swapWith=None):
+        """Check a move or swap without making it, see move and swap"""
+
+        if (to is None) == (swapWith is None):
+            raise InvalidRequest("Give either where to move the class 'to' or which class to swap it 'with'")
+
+        if to is not None:
+            return self.move(timetable, day, time, to, apply=False)
+        return self.swap(timetable, day, time, swapWith, apply=False)
+
+
+    def move(self, timetable, day, time, to, apply=True):
+        """Move the class of a batch timetable in a (day, timeslot) to another (day, timeslot), and room if one is given
+
+        Args:
+            timetable (str): batch timetable name
+            day (str): day the class is on
+            time (str): any timeslot of the class
+            to (dict): 'day' and first timeslot 'time' to move it to, optionally the 'room'
+            apply (bool, optional): make the move when it keeps every hard constraint, otherwise only check it. Defaults to True.
+
+        Returns:
+            dict: 'ok', the 'reason' when it's not, whether it was 'applied' and the 'classes' as they are after it
+        """
+
+        if not isinstance(to, dict):
+            raise InvalidRequest("'to' has to be an object with the 'day' and 'time' to move to, and optionally the 'room'")
+
+        block = self.find(timetable, day, time)
+        target = self.slot(to.get('day'), to.get('time'))
+        roomNos = None
+        if to.get('room') is not None and to['room'] != self.vineek.strings.strings[block.codes[0][2]]:
+            rooms = self.fittingRooms(block)
+            if rooms is None:
+                raise InvalidRequest("The rooms of a track core can't be changed, only where it's held")
+            if to['room'] not in rooms:
+                return {'ok': False, 'reason': 'room unfit', 'applied': False, 'classes': [self.describe(block)]}
+            roomNos = (self.roomNo(to['room']),)
+
+        return self.attempt([block], [target], [roomNos], apply)
+
+
+    def swap(self, timetable, day, time, swapWith, apply=True):
+        """Swap the (day, timeslot)s of two classes of the same length, their rooms stay the same
+
+        Args:
+            timetable (str): batch timetable name
+            day (str): day the class is on
+            time (str): any timeslot of the class
+            swapWith (dict): 'timetable' (the same one if it's left out), 'day' and 'time' of the other class
+            apply (bool, optional): make the swap when it keeps every hard constraint, otherwise only check it. Defaults to True.
+
+        Returns:
+            dict: 'ok', the 'reason' when it's not, whether it was 'applied' and the 'classes' as they are after it
+        """
+
+        if not isinstance(swapWith, dict):
+            raise InvalidRequest("'with' has to be an object with the 'day' and 'time' of the other class, and optionally its 'timetable'")
+
+        block = self.find(timetable, day, time)
+        other = self.find(swapWith.get('timetable', timetable), swapWith.get('day'), swapWith.get('time'))
+        if other is block:
+            raise InvalidRequest("A class can't be swapped with itself")
+        if other.length != block.length:
+            raise InvalidRequest(f"Only classes of the same length can be swapped, these take {block.length} and {other.length} timeslots")
+
+        return self.attempt([block, other], [(other.dayNo, other.timeNo), (block.dayNo, block.timeNo)], [None, None], apply)
+
+
+    def attempt(self, blocks, targets, roomNos, apply):
+        """Try blocks at new (day, timeslot)s, keeping them there only if every hard constraint holds and apply is set
+
+        Args:
+            blocks (list(Block)): blocks to move
+            targets (list(tuple)): (dayNo, timeNo) for every block
+            roomNos (list(tuple)): new room numbers for every block, None to keep its rooms
+            apply (bool): keep the move
+
+        Returns:
+            dict: 'ok', the 'reason' when it's not, whether it was 'applied' and the 'classes' as they are after it
+        """
+
+        state = self.state
+        origins = [(block.dayNo, block.timeNo, block.roomNos) for block in blocks]
+        for block in blocks:
+            state.lift(block)
+
+        reason, placed = None, []
+        for block, (dayNo, timeNo), roomNos_ in zip(blocks, targets, roomNos):
+            reason = state.clashReason(block, dayNo, timeNo, roomNos_)
+            if reason is not None:
+                break
+            block.roomNos = block.roomNos if roomNos_ is None else roomNos_
+            state.drop(block, dayNo, timeNo)
+            placed.append(block)
+
+        if reason is None and apply:
+            self.write(blocks, origins)
+            return {'ok': True, 'applied': True, 'classes': [self.describe(block) for block in blocks]}
+
+        for block in placed:
+            state.lift(block)
+        for block, (dayNo, timeNo, roomNos_) in zip(blocks, origins):
+            block.roomNos = roomNos_
+            state.drop(block, dayNo, timeNo)
+
+        return {'ok': reason is None, **({} if reason is None else {'reason': reason}), 'applied': False, 'classes': [self.describe(block) for block in blocks]}
+
+
+    def write(self, blocks, origins):
+        """Carry moved blocks over into the batch timetables, faculty/room allocations, occupancy and faculty and room timetables
+
+        Everything the blocks held is cleared before anything is written, so blocks swapping places don't wipe each other out
+
+        Args:
+            blocks (list(Block)): moved blocks
+            origins (list(tuple)): (dayNo, timeNo, roomNos) every block was at before
+        """
+
+        vineek, state = self.vineek, self.state
+        roomNames = {roomNo: room for room, roomNo in state.roomNos.items()}
+        moves = [] # (bookingNo, new booking) of every allocation of the blocks
+
+        for block, (dayNo, timeNo, roomNos) in zip(blocks, origins):
+            timetableName = state.timetableNames[block.timetableNo]
+            originTimeNos = state.columns(block, dayNo, timeNo)
+            for timeNo_ in originTimeNos:
+                vineek.TIMETABLES[timetableName].cells[dayNo, timeNo_] = 0
+            self.changed['batches'].add(timetableName)
+
+            newRoom = None if block.roomNos == roomNos else roomNames[block.roomNos[0]]
+            if newRoom is not None:
+                block.codes = [(subjectCode, teacherCode, vineek.strings.intern(newRoom)) for subjectCode, teacherCode, _ in block.codes]
+
+            timeNos = state.columns(block, block.dayNo, block.timeNo)
+            for bookingNo in block.bookings:
+                facultyName, day, time, subjectName, room = vineek.bookings[bookingNo]
+                vineek.occupancy.release(day, time, facultyName, room)
+                for views, ttName in [(vineek.facultyTT, facultyName), (vineek.roomTT, room)]:
+                    views[ttName].cells[vineek.dayIndex[day], vineek.timeIndex[time]] = 0
+                newTime = vineek.TIMESLOTS[timeNos[originTimeNos.index(vineek.timeIndex[time])]]
+                moves.append((bookingNo, (facultyName, vineek.DAYS[block.dayNo], newTime, subjectName, room if newRoom is None else newRoom)))
+                self.changed['rooms'].add(room)
+                if facultyName != '': # blank teachers have no faculty timetable, see Vineek.views
+                    self.changed['faculty'].add(facultyName)
+
+        for block in blocks:
+            for timeNo, codes in zip(state.columns(block, block.dayNo, block.timeNo), block.codes):
+                vineek.TIMETABLES[state.timetableNames[block.timetableNo]].cells[block.dayNo, timeNo] = codes
+
+        intern = vineek.strings.intern
+        for bookingNo, booking in moves:
+            facultyName, day, time, subjectName, room = vineek.bookings[bookingNo] = booking
+            vineek.occupancy.book(day, time, facultyName, room)
+            codes = (intern(subjectName), intern(facultyName), intern(room))
+            for view, views, ttName in [('faculty', vineek.facultyTT, facultyName), ('rooms', vineek.roomTT, room)]:
+                if ttName not in views:
+                    views[ttName] = vineek.emptyGrid()
+                views[ttName].cells[vineek.dayIndex[day], vineek.timeIndex[time]] = codes
+                if not (view == 'faculty' and ttName == ''):
+                    self.changed[view].add(ttName)
+
+
+    def export(self, DIR=None):
+        """Save the batch, room and faculty timetables changed since the last export over their excel files
+
+        Args:
+            DIR (str, optional): folder to save the timetable folders in. Defaults to the folder of the service.
+
+        Returns:
+            dict: 'exported' number of timetables of every view
+        """
+
+        DIR = self.DIR if DIR is None else Path(DIR)
+        if DIR is None:
+            raise InvalidRequest("There's no folder to export to, give one as 'DIR'")
+
+        DIR.mkdir(parents=True, exist_ok=True)
+        with self.vineek.stats.phase('export'):
+            self.vineek.writeTables(DIR, NAMES=self.changed)
+        exported = {view: len(names) for view, names in self.changed.items()}
+        self.changed = {'batches': set(), 'rooms': set(), 'faculty': set()}
+
+        return {'exported': exported}
+
+
+    def handle(self, request):
+        """Answer a single query
+
+        Args:
+            request (dict): 'op' ('classes', 'options', 'check', 'move', 'swap' or 'export') along with its arguments, 'with'
+                stands for swapWith
+
+        Returns:
+            dict: the answer, with 'ok' False and an 'error' when the query can't be answered
+        """
+
+        arguments = {('swapWith' if key == 'with' else key): value for key, value in request.items() if key != 'op'}
+        if request.get('op') not in self.requests:
+            return {'ok': False, 'error': f"Unknown op {request.get('op')}, it has to be one of {', '.join(self.requests)}"}
+
+        try:
+            return {'ok': True, **self.requests[request['op']](**arguments)}
+        except (InvalidRequest, TypeError) as error:
+            return {'ok': False, 'error': str(error)}
+        except Exception as error: # a broken query must never end the service
+            return {'ok': False, 'error': f"Couldn't answer the query: {error!r}"}
+
+
+    def serveStdio(self, inFile=stdin, outFile=stdout):
+        """Answer JSON queries one per line until the input ends or an {"op": "quit"} query"""
+
+        for line in inFile:
+            if not line.strip():
+                continue
+            try:
+                request = loads(line)
+            except ValueError as error:
+                answer = {'ok': False, 'error': f"Not JSON: {error}"}
+            else:
+                if not isinstance(request, dict):
+                    answer = {'ok': False, 'error': "Queries have to be JSON objects"}
+                elif request.get('op') == 'quit':
+                    break
+                else:
+                    answer = self.handle(request)
+
+            outFile.write(dumps(answer) + '\n')
+            outFile.flush()
+
+
+    def serveHttp(self, port, host='127.0.0.1'):
+        """Answer JSON queries POSTed to http://host:port/<op> until the process is stopped, one query at a time"""
+
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                try:
+                    request = loads(self.rfile.read(int(self.headers.get('Content-Length') or 0)) or b'{}')
+                except ValueError as error:
+                    answer = {'ok': False, 'error': f"Not JSON: {error}"}
+                else:
+                    answer = service.handle({**request, 'op': self.path.strip('/')}) if isinstance(request, dict) else {'ok': False, 'error': "Queries have to be JSON objects"}
+
+                body = dumps(answer).encode()
+                self.send_response(400 if 'error' in answer else 200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        with HTTPServer((host, port), Handler) as server:
+            server.serve_forever()
+
+
+    def serve(self, how):
+        """Answer queries on stdin/stdout for 'stdio', otherwise on that localhost port"""
+
+        if how == 'stdio':
+            self.serveStdio()
+        else:
+            self.serveHttp(int(how))
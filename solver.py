@@ -0,0 +1,408 @@
+from time import perf_counter
+
+
+class SchedulingInfeasible(Exception):
+    """Raised when it is proven that no clash-free timetable exists for a batch"""
+
+
+def matchRooms(candidates):
+    """Give every member of a block a different room with a maximum bipartite matching (augmenting paths), rooms earlier in a
+    member's list are tried first
+
+    Args:
+        candidates (list(list)): free rooms every member can use, in order of preference
+
+    Returns:
+        list: room for every member, None if no such assignment exists
+    """
+
+    owners = dict() # room -> member using it
+
+    def augment(memberNo, seen):
+        for room in candidates[memberNo]:
+            if room not in seen:
+                seen.add(room)
+                if room not in owners or augment(owners[room], seen):
+                    owners[room] = memberNo
+                    return True
+        return False
+
+    for memberNo in range(len(candidates)):
+        if not augment(memberNo, set()):
+            return None
+
+    rooms = [None] * len(candidates)
+    for room, memberNo in owners.items():
+        rooms[memberNo] = room
+
+    return rooms
+
+
+class Unit:
+    def __init__(self, members, subjectType, trackCore, length):
+        """A lecture, tutorial or lab block that has to be placed in one (day, timeslot) of a batch timetable
+
+        Args:
+            members (list(tuple)): (subject, teacher, candidate rooms) of every subject held in that block, more than one for track cores
+            subjectType (str): Type of lecture, 'Lecture_hrs', 'Tut_hrs' or 'Lab_hrs'
+            trackCore (str): Track core of the subjects, NULLVALUE if not a track core
+            length (int): Number of consecutive timeslots the block takes
+        """
+
+        self.members = members
+        self.subjectType = subjectType
+        self.trackCore = trackCore
+        self.length = length
+        self.teachers = {teacher for _, teacher, _ in members if teacher.strip() != ''}
+        self.key = (subjectType, tuple(subject for subject, _, _ in members)) # identical units share the same key
+        self.values = [] # (dayNo, timeNo) of the first timeslot of every possible placement
+        self.rooms = dict() # value -> rooms for every member in that placement
+        self.cells = dict() # value -> set of (dayNo, timeNo) taken by the block
+        self.adjacent = dict() # value -> set of (dayNo, timeNo) right before and after the block
+
+
+class BacktrackingScheduler:
+    def __init__(self, vineek, timeLimit=60):
+        """Deterministic scheduling engine that places every lecture, tutorial and lab block of a batch at once
+
+        Every block is a variable over (day, timeslot, rooms). The search uses forward checking, backed by a count of the
+        timeslots left for the batch and for every teacher, most constrained first variable ordering and conflict-directed
+        backjumping, so it either finds a clash-free timetable or proves that none exists given the previously generated
+        timetables
+
+        Args:
+            vineek (Vineek): Vineek instance holding the timeslots, rooms data and the occupancy of the previously generated timetables
+            timeLimit (int, optional): Maximum number of seconds to search for a single batch. Defaults to 60.
+        """
+
+        self.vineek = vineek
+        self.timeLimit = timeLimit
+
+
+    def candidateRooms(self, semesterData, subject, subjectType):
+        """Rooms a subject can be held in, either its assigned room/lab or every room of the right type and capacity, best fit first"""
+
+        isLab = subjectType == 'Lab_hrs'
+        assignedRoom = semesterData.loc[subject, 'Assigned_Lab' if isLab else 'Assigned_Room']
+        if assignedRoom != self.vineek.NULLVALUE:
+            return [assignedRoom]
+
+        capacity = semesterData.loc[subject, 'Lab_Capacity' if isLab else 'Capacity']
+        return self.vineek.catalog.fittingRooms('Lab' if isLab else 'Class', capacity)
+
+
+    def buildUnits(self, semesterData):
+        """Split the hours of a semester into blocks, track core subjects of the same type with different teachers share a block
+
+        Args:
+            semesterData (pd.DataFrame): Pandas Dataframe which contains data for that specific semester
+
+        Returns:
+            list(Unit): blocks to place
+        """
+
+        units = []
+        for subjectType in ['Lab_hrs', 'Lecture_hrs', 'Tut_hrs']:
+            lengths = {subject: semesterData.loc[subject, 'Lab_Block'] if subjectType == 'Lab_hrs' else 1
+                       for subject, hours in semesterData[subjectType].items() if hours > 0}
+            remaining = {subject: -(-int(semesterData.loc[subject, subjectType]) // length) for subject, length in lengths.items()}
+
+            # track core subjects are only held together when their lab blocks are just as long
+            for trackCore, length in dict.fromkeys((semesterData.loc[subject, 'Track_Core'], length) for subject, length in lengths.items()):
+                subjects = [subject for subject in remaining if semesterData.loc[subject, 'Track_Core'] == trackCore and lengths[subject] == length]
+
+                while any(remaining[subject] > 0 for subject in subjects):
+                    members, teachers = [], set()
+                    for subject in subjects:
+                        teacher = self.vineek.getTeacher(semesterData, subject, subjectType)
+                        if remaining[subject] > 0 and teacher not in teachers:
+                            members.append((subject, teacher, self.candidateRooms(semesterData, subject, subjectType)))
+                            teachers.add(teacher)
+                            remaining[subject] -= 1
+
+                            if trackCore == self.vineek.NULLVALUE:
+                                break # subjects that are not track cores are never held together
+
+                    units.append(Unit(members, subjectType, trackCore, length))
+
+        return units
+
+
+    def pickRooms(self, unit, day, times):
+        """Pick a different free room for every member of a block for all of its timeslots
+
+        Returns:
+            list: room for every member, None if no such combination exists
+        """
+
+        occupancy = self.vineek.occupancy
+        freeRooms = [[room for room in rooms if all(occupancy.roomFree(day, time, room) for time in times)] for _, _, rooms in unit.members]
+        if not all(freeRooms):
+            self.vineek.stats.reject('room unavailable', day=day, time=times[0], subject=unit.key)
+            return None
+
+        rooms = matchRooms(freeRooms)
+        if rooms is None:
+            self.vineek.stats.reject('track core room collision', day=day, time=times[0], subject=unit.key)
+
+        return rooms
+
+
+    def buildDomain(self, unit):
+        """Fill in every (day, timeslot) placement of a block where its teachers and rooms are free in all of its timeslots"""
+
+        vineek = self.vineek
+        stats = vineek.stats
+
+        for dayNo, day in enumerate(vineek.DAYS):
+            for timeNo, timeNos in vineek.times.dayBlocks(dayNo, unit.length).items():
+                time = vineek.TIMESLOTS[timeNo]
+                times = [vineek.TIMESLOTS[timeNo_] for timeNo_ in timeNos]
+                stats.attempt()
+                if not vineek.occupancy.available(day, times, ', '.join(unit.teachers)):
+                    stats.reject('teacher unavailable', day=day, time=time, subject=unit.key)
+                    continue
+
+                if not all(vineek.occupancy.teacherFree(day, time_, teacher) for time_ in times for teacher in unit.teachers):
+                    stats.reject('teacher clash', day=day, time=time, subject=unit.key)
+                    continue
+
+                rooms = self.pickRooms(unit, day, times)
+                if rooms is None:
+                    continue
+
+                value = (dayNo, timeNo)
+                unit.values.append(value)
+                unit.rooms[value] = rooms
+                unit.cells[value] = {(dayNo, timeNo_) for timeNo_ in timeNos}
+                unit.adjacent[value] = {(dayNo, timeNo_) for timeNo_ in (vineek.times.previous[dayNo][timeNos[0]], vineek.times.next[dayNo][timeNos[-1]]) if timeNo_ is not None}
+
+
+    @staticmethod
+    def compatible(unit, value, otherUnit, otherValue, chain):
+        """Check the constraints between two placed blocks of the same batch
+
+        Args:
+            unit (Unit): first block
+            value (tuple): placement of the first block
+            otherUnit (Unit): second block
+            otherValue (tuple): placement of the second block
+            chain (int): 1 if the first block must be placed before the identical second block, -1 if after, 0 if they are not identical
+
+        Returns:
+            bool: whether both placements can be used together
+        """
+
+        if not unit.cells[value].isdisjoint(otherUnit.cells[otherValue]):
+            return False
+
+        # noConsecutiveLectures, a teacher's lecture/tutorial can't be right before or after another one of their blocks
+        if (unit.subjectType != 'Lab_hrs' or otherUnit.subjectType != 'Lab_hrs') and not unit.teachers.isdisjoint(otherUnit.teachers):
+            if not unit.adjacent[value].isdisjoint(otherUnit.cells[otherValue]):
+                return False
+
+        # identical blocks are interchangeable, only one ordering of them is searched
+        return (chain == 0) or (chain == 1 and value < otherValue) or (chain == -1 and value > otherValue)
+
+
+    def solve(self, units):
+        """Assign a placement to every block
+
+        Args:
+            units (list(Unit)): blocks with their domains built
+
+        Raises:
+            SchedulingInfeasible: no clash-free assignment exists
+            TimeoutError: the search took longer than the time limit
+
+        Returns:
+            dict: unit number -> placement
+        """
+
+        deadline = perf_counter() + self.timeLimit
+        stats = self.vineek.stats
+        domains = [set(unit.values) for unit in units]
+        pastFc = [[] for _ in units] # unit number -> assigned unit numbers that removed values from its domain
+        assignment = dict()
+        dayLoad = dict() # (subject key, dayNo) -> blocks placed, used to spread identical blocks over the week
+
+        chainPosition = dict()
+        for unitNo, unit in enumerate(units):
+            chainPosition[unitNo] = sum(1 for other in units[:unitNo] if other.key == unit.key)
+
+        def chain(unitNo, otherNo):
+            if units[unitNo].key != units[otherNo].key:
+                return 0
+            return 1 if chainPosition[unitNo] < chainPosition[otherNo] else -1
+
+        degree = [sum(1 for other in units if other is not unit and not unit.teachers.isdisjoint(other.teachers)) for unit in units]
+
+        teacherUnits = dict() # teacher -> unit numbers of their lectures and tutorials
+        for unitNo, unit in enumerate(units):
+            if unit.subjectType != 'Lab_hrs':
+                for teacher in unit.teachers:
+                    teacherUnits.setdefault(teacher, []).append(unitNo)
+
+        def overbooked(unitNos, teachers):
+            """Find blocks that can't all be placed in what is left of their domains, which pairwise checks miss: every block of
+            the batch needs timeslots of its own, and a day only fits as many lectures/tutorials of a teacher as it has usable
+            timeslots that are not right after each other
+
+            Args:
+                unitNos (list(int)): unassigned blocks
+                teachers (iterable(str)): teachers whose lectures/tutorials are counted
+
+            Returns:
+                tuple: (unit numbers of the blocks that don't fit, reason), None if every count fits
+            """
+
+            cells = set()
+            for unitNo in unitNos:
+                for value in domains[unitNo]:
+                    cells |= units[unitNo].cells[value]
+            if sum(units[unitNo].length for unitNo in unitNos) > len(cells):
+                return unitNos, f"{sum(units[unitNo].length for unitNo in unitNos)} timeslots of classes but only {len(cells)} usable timeslots"
+
+            left = set(unitNos)
+            for teacher in teachers:
+                teacherNos = [unitNo for unitNo in teacherUnits.get(teacher, []) if unitNo in left]
+                usable = {value for unitNo in teacherNos for value in domains[unitNo]}
+
+                capacity = 0
+                for dayNo, timeNos in enumerate(self.vineek.times.dayTimes):
+                    last = None # taking the earliest usable timeslot each time fits the most of them in a day
+                    for timeNo in timeNos:
+                        if (dayNo, timeNo) in usable and (last is None or self.vineek.times.previous[dayNo][timeNo] != last):
+                            capacity += 1
+                            last = timeNo
+
+                if len(teacherNos) > capacity:
+                    return teacherNos, f"{teacher} has {len(teacherNos)} lectures/tutorials but only {capacity} usable timeslots that are not right after each other"
+
+            return None
+
+        def search():
+            if perf_counter() > deadline:
+                raise TimeoutError(f"No timetable found within {self.timeLimit} seconds")
+
+            unassigned = [unitNo for unitNo in range(len(units)) if unitNo not in assignment]
+            if len(unassigned) == 0:
+                return None
+
+            # most constrained first, ties broken by the number of blocks sharing a teacher
+            unitNo = min(unassigned, key=lambda unitNo: (len(domains[unitNo]), -degree[unitNo], unitNo))
+            unit = units[unitNo]
+            conflicts = set(pastFc[unitNo])
+            values = sorted(domains[unitNo], key=lambda value: (dayLoad.get((unit.key, value[0]), 0), value))
+
+            for value in values:
+                stats.attempt()
+                assignment[unitNo] = value
+                dayLoad[(unit.key, value[0])] = dayLoad.get((unit.key, value[0]), 0) + 1
+
+                reductions, wipeout, stuck = [], None, None
+                for otherNo in unassigned:
+                    if otherNo == unitNo:
+                        continue
+
+                    removed = {otherValue for otherValue in domains[otherNo]
+                               if not self.compatible(unit, value, units[otherNo], otherValue, chain(unitNo, otherNo))}
+                    if len(removed) > 0:
+                        domains[otherNo] -= removed
+                        pastFc[otherNo].append(unitNo)
+                        reductions.append((otherNo, removed))
+
+                        if len(domains[otherNo]) == 0:
+                            wipeout = otherNo
+                            break
+
+                if wipeout is None:
+                    stuck = overbooked([otherNo for otherNo in unassigned if otherNo != unitNo],
+                                       {teacher for otherNo, _ in reductions for teacher in units[otherNo].teachers})
+
+                if wipeout is None and stuck is None:
+                    result = search()
+                    if result is None:
+                        return None
+                    if unitNo not in result: # this block is not part of the conflict, jump straight back
+                        self.undo(domains, pastFc, reductions)
+                        del assignment[unitNo]
+                        dayLoad[(unit.key, value[0])] -= 1
+                        return result
+                    conflicts |= result - {unitNo}
+                elif wipeout is not None:
+                    stats.reject('forward check dead end', subject=unit.key)
+                    conflicts |= set(pastFc[wipeout]) - {unitNo}
+                else:
+                    stats.reject('not enough timeslots left', subject=unit.key)
+                    conflicts |= {pastNo for otherNo in stuck[0] for pastNo in pastFc[otherNo]} - {unitNo}
+
+                self.undo(domains, pastFc, reductions)
+                del assignment[unitNo]
+                dayLoad[(unit.key, value[0])] -= 1
+
+            return conflicts
+
+        stuck = overbooked(list(range(len(units))), teacherUnits)
+        if stuck is not None:
+            raise SchedulingInfeasible(f"Not enough timeslots left for these classes: {stuck[1]}")
+
+        if search() is not None:
+            raise SchedulingInfeasible("No clash-free placement exists for these classes with the rooms and teachers left by the previously generated timetables")
+
+        return dict(assignment)
+
+
+    @staticmethod
+    def undo(domains, pastFc, reductions):
+        """Put back the values removed from the domains by the forward check of an assignment"""
+
+        for otherNo, removed in reductions:
+            domains[otherNo] |= removed
+            pastFc[otherNo].pop()
+
+
+    def scheduleBatch(self, semesterData, timetable):
+        """Allocate all the labs, lectures and tutorials of a batch into its timetable
+
+        Args:
+            semesterData (pd.DataFrame): Pandas Dataframe which contains data for that specific semester
+            timetable (TimetableGrid): Timetable grid for the batch
+
+        Raises:
+            SchedulingInfeasible: no clash-free timetable exists for this batch
+            TimeoutError: the search took longer than the time limit
+
+        Returns:
+            TimetableGrid: filled in timetable
+        """
+
+        vineek = self.vineek
+        units = self.buildUnits(semesterData)
+        for unit in units:
+            self.buildDomain(unit)
+
+        assignment = self.solve(units)
+
+        for unitNo, (dayNo, timeNo) in assignment.items():
+            unit = units[unitNo]
+            day = vineek.DAYS[dayNo]
+            rooms = unit.rooms[(dayNo, timeNo)]
+            label = {'Lab_hrs': ' (Lab)', 'Tut_hrs': ' (Tut)', 'Lecture_hrs': ''}[unit.subjectType]
+            subjects = [subject for subject, _, _ in unit.members]
+            teachers = [teacher for _, teacher, _ in unit.members]
+
+            if unit.trackCore == vineek.NULLVALUE:
+                subjectName = f"{subjects[0]}{label}"
+            else:
+                subjectName = f"{unit.trackCore}{label} - {', '.join(subjects)}"
+
+            vineek.stats.placed(day=day, time=vineek.TIMESLOTS[timeNo], subject=subjectName)
+            for time in [vineek.TIMESLOTS[timeNo_] for timeNo_ in vineek.times.dayBlocks(dayNo, unit.length)[timeNo]]:
+                timetable.set(day, time, subjectName, ', '.join(teachers), ', '.join(rooms))
+
+                for subject, teacher, room in zip(subjects, teachers, rooms):
+                    memberName = subjectName if unit.trackCore == vineek.NULLVALUE else f"{unit.trackCore}{label} - {subject}"
+                    vineek.assignRoomFacultyTT(teacher, day, time, memberName, room)
+
+        return timetable
@@ -0,0 +1,42 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from loader import TIMETABLECOLUMNS, ROOMSCOLUMNS, UNAVAILABLECOLUMNS
+
+SAMPLEFILE = ROOT / 'Time-table.xlsx'
+DEFAULTS = {'Track_Core': '', 'TA': '', 'Lecture_hrs': 0, 'Tut_hrs': 0, 'Capacity': 60, 'Lab_hrs': 0, 'Lab_Capacity': 30, 'Assigned_Room': '', 'Assigned_Lab': ''}
+
+
+@pytest.fixture
+def sampleFile():
+    """Path of the sample timetable data excel file shipped with the repository"""
+
+    return str(SAMPLEFILE)
+
+
+@pytest.fixture
+def writeData(tmp_path):
+    """Write a timetable data excel file into a temporary folder
+
+    Returns:
+        function: takes the subjects as dicts of TIMETABLECOLUMNS (the columns left out get DEFAULTS), the rooms as
+                  (Room_No, Capacity, Type), optionally the (Name, Day, Time) rows of an 'Unavailable' sheet and a file name,
+                  and returns the path of the file
+    """
+
+    def write(subjects, rooms, unavailable=(), name='Time-table.xlsx'):
+        path = tmp_path / name
+        with pd.ExcelWriter(path) as writer:
+            pd.DataFrame([{**DEFAULTS, **subject} for subject in subjects], columns=TIMETABLECOLUMNS).to_excel(writer, sheet_name='Timetable', index=False)
+            pd.DataFrame(rooms, columns=ROOMSCOLUMNS).to_excel(writer, sheet_name='Rooms', index=False)
+            if unavailable:
+                pd.DataFrame(unavailable, columns=UNAVAILABLECOLUMNS).to_excel(writer, sheet_name='Unavailable', index=False)
+        return str(path)
+
+    return write
@@ -0,0 +1,53 @@
+import pytest
+
+from Vineek import Vineek, TIMESLOTS, DAYS
+
+
+def lectures(dept, teachers, hours=1):
+    """One course per teacher of a department, each with that many lectures"""
+
+    return [{'Dept_id': dept, 'Course_id': f"{dept} {teacher}", 'Course_Name': f"Course {teacher}", 'Faculty': teacher,
+             'Semester': 1, 'Lecture_hrs': hours} for teacher in teachers]
+
+
+def placements(vineek, timetableName):
+    return sorted(tuple(placement.values()) for placement in vineek.TIMETABLES[timetableName].placements())
+
+
+@pytest.mark.parametrize('engine', ['random', 'solver'])
+def test_keeps_groups_that_share_only_a_room_pool(writeData, tmp_path, engine):
+    rooms = [(101, 60, 'Class'), (102, 60, 'Class'), (103, 60, 'Class')]
+    options = {'SEED': 1, 'ENGINE': engine, 'CACHE': str(tmp_path / 'schedule.pkl')}
+
+    subjects = lectures('CSE', ['Asha', 'Bela', 'Chetan']) + lectures('ECE', ['Dev', 'Esha', 'Farid'])
+    first = Vineek(TIMESLOTS, DAYS, FILE=writeData(subjects, rooms), **options)
+    first.generate(dict())
+
+    subjects[0]['Course_Name'] = 'Renamed course'
+    second = Vineek(TIMESLOTS, DAYS, FILE=writeData(subjects, rooms), **options)
+    second.generate(dict())
+
+    assert second.rescheduled == {('CSE', 1)}
+    assert placements(second, 'ECE - Semester 1') == placements(first, 'ECE - Semester 1')
+
+
+@pytest.mark.parametrize('engine', ['random', 'solver'])
+def test_regenerates_pool_neighbours_when_a_changed_group_does_not_fit(writeData, tmp_path, engine):
+    rooms = [(101, 60, 'Class')]
+    options = {'SEED': 1, 'ENGINE': engine, 'CACHE': str(tmp_path / 'schedule.pkl')}
+    # the CSE teachers can only teach on Monday, ECE's lectures fill up most of the week in the only room
+    cseTeachers = [f"CSE teacher {teacherNo}" for teacherNo in range(7)]
+    unavailable = [(teacher, day, '') for teacher in cseTeachers for day in DAYS[1:]]
+    eceSubjects = lectures('ECE', [f"ECE teacher {teacherNo}" for teacherNo in range(25)])
+
+    first = Vineek(TIMESLOTS, DAYS, FILE=writeData(lectures('CSE', cseTeachers[:1]) + eceSubjects, rooms, unavailable), **options)
+    first.generate(dict())
+    assert any(placement[0] == DAYS[0] for placement in placements(first, 'ECE - Semester 1'))
+
+    # every Monday timeslot is needed now, ECE has to make room
+    second = Vineek(TIMESLOTS, DAYS, FILE=writeData(lectures('CSE', cseTeachers) + eceSubjects, rooms, unavailable), **options)
+    second.generate(dict())
+
+    assert second.rescheduled == {('CSE', 1), ('ECE', 1)}
+    assert len(placements(second, 'CSE - Semester 1')) == 7
+    assert all(placement[0] != DAYS[0] for placement in placements(second, 'ECE - Semester 1'))
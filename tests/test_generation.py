@@ -0,0 +1,76 @@
+from collections import Counter
+
+import pytest
+
+from Vineek import Vineek, TIMESLOTS, DAYS
+
+BATCHES = {('B.Tech CSE', 2): 2, ('B.Tech CSE', 4): 2, ('B.Tech CSE', 6): 2}
+
+
+def allocations(vineek):
+    """(teacher/TA, day, timeslot, room) of every member of every class in the batch timetables"""
+
+    cells = Counter()
+    for timetable in vineek.TIMETABLES.values():
+        for placement in timetable.placements(): # track cores hold their teachers and rooms in the same order
+            for teacher, room in zip(placement['teacher'].split(', '), placement['room'].split(', ')):
+                cells[(teacher, placement['day'], placement['time'], room)] += 1
+    return cells
+
+
+def placements(vineek):
+    return {timetableName: sorted(tuple(placement.values()) for placement in timetable.placements()) for timetableName, timetable in vineek.TIMETABLES.items()}
+
+
+@pytest.mark.parametrize('engine', ['random', 'solver'])
+def test_sample_has_no_clashes(sampleFile, engine):
+    vineek = Vineek(TIMESLOTS, DAYS, SEED=2, FILE=sampleFile, ENGINE=engine)
+    vineek.generate(BATCHES)
+
+    teachers, rooms = Counter(), Counter()
+    for teacher, day, time, room in allocations(vineek).elements():
+        teachers.update((name, day, time) for name in vineek.occupancy.splitNames(teacher))
+        rooms[(room, day, time)] += 1
+
+    assert sum(allocations(vineek).values()) > 0
+    assert [key for key, count in teachers.items() if count > 1] == []
+    assert [key for key, count in rooms.items() if count > 1] == []
+
+
+def test_journal_resumes_like_an_uninterrupted_run(sampleFile, tmp_path):
+    options = {'SEED': 2, 'FILE': sampleFile, 'JOURNAL': str(tmp_path / 'run.jsonl')}
+    uninterrupted = Vineek(TIMESLOTS, DAYS, **options)
+    uninterrupted.generate(BATCHES)
+
+    interrupted = Vineek(TIMESLOTS, DAYS, **options)
+    scheduleGroup, groupsScheduled = interrupted.scheduleGroup, []
+
+    def stopOnSecondGroup(semesterData, timetableNames):
+        if len(groupsScheduled) == 1:
+            raise KeyboardInterrupt
+        groupsScheduled.append(timetableNames)
+        scheduleGroup(semesterData, timetableNames)
+
+    interrupted.scheduleGroup = stopOnSecondGroup
+    with pytest.raises(KeyboardInterrupt):
+        interrupted.generate(BATCHES)
+
+    resumed = Vineek(TIMESLOTS, DAYS, **options)
+    scheduleGroup, groupsScheduled = resumed.scheduleGroup, []
+    resumed.scheduleGroup = lambda semesterData, timetableNames: groupsScheduled.append(timetableNames) or scheduleGroup(semesterData, timetableNames)
+    resumed.generate(BATCHES)
+
+    assert len(groupsScheduled) == len(BATCHES) - 1 # the first one comes from the journal
+    assert placements(resumed) == placements(uninterrupted)
+    assert not (tmp_path / 'run.jsonl').exists()
+
+
+@pytest.mark.parametrize('engine', ['random', 'solver'])
+def test_optimizer_keeps_bookings_consistent_with_the_timetables(sampleFile, engine):
+    vineek = Vineek(TIMESLOTS, DAYS, SEED=3, FILE=sampleFile, ENGINE=engine, OPTIMIZE=1)
+    vineek.generate(BATCHES)
+
+    assert vineek.optimization is not None
+    assert allocations(vineek) == Counter((facultyName, day, time, room) for facultyName, day, time, _, room in vineek.bookings)
+    for facultyName, day, time, subjectName, room in vineek.bookings:
+        assert vineek.roomTT[room].get(day, time, 'Subject') == subjectName
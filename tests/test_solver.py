@@ -0,0 +1,32 @@
+import pytest
+
+from Vineek import Vineek, TIMESLOTS, DAYS
+from solver import SchedulingInfeasible
+
+
+def lecturesOnly(writeData, lectures, teachers=1):
+    """Vineek for one batch whose only classes are that many lectures of every teacher"""
+
+    subjects = [{'Dept_id': 'CSE', 'Course_id': f'CSE {teacherNo}', 'Course_Name': f'Course {teacherNo}', 'Faculty': f'Teacher {teacherNo}',
+                 'Semester': 2, 'Lecture_hrs': lectures} for teacherNo in range(teachers)]
+    return Vineek(TIMESLOTS, DAYS, SEED=0, FILE=writeData(subjects, [(101, 60, 'Class'), (102, 60, 'Class')]), ENGINE='solver', TIMELIMIT=10)
+
+
+@pytest.mark.parametrize('lectures, teachers', [(18, 1), (20, 1), (15, 2)])
+def test_fills_a_teacher_week(writeData, lectures, teachers):
+    vineek = lecturesOnly(writeData, lectures, teachers)
+    timetable, = vineek.generate({('CSE', 2): 1}).values()
+
+    placements = list(timetable.placements())
+    assert len(placements) == lectures * teachers
+    for placement in placements: # noConsecutiveLectures
+        timeNo = TIMESLOTS.index(placement['time'])
+        neighbours = [TIMESLOTS[timeNo_] for timeNo_ in (timeNo - 1, timeNo + 1) if 0 <= timeNo_ < len(TIMESLOTS)]
+        assert all(timetable.get(placement['day'], time, 'Teacher') != placement['teacher'] for time in neighbours)
+
+
+def test_proves_a_full_teacher_week_infeasible(writeData):
+    vineek = lecturesOnly(writeData, 21) # 4 lectures that aren't right after each other fit in the 7 timeslots of a day
+
+    with pytest.raises(SchedulingInfeasible, match='Teacher 0 has 21 lectures/tutorials'):
+        vineek.generate({('CSE', 2): 1})
@@ -0,0 +1,167 @@
+from re import compile as compileRegex
+
+
+CLOCK = compileRegex(r'^\s*(\d{1,2})(?::(\d{2}))?\s*([AaPp][Mm])?\s*$')
+SEPARATOR = compileRegex(r'\s*[-–]\s*')
+
+
+class InvalidTimeslots(ValueError):
+    """Raised when the timeslots can't be read as times of the day or overlap each other"""
+
+
+def parseClock(text):
+    """Minutes since midnight of a time like '9:30 AM', '12 PM' or '13:30'
+
+    Args:
+        text (str): time of the day
+
+    Raises:
+        InvalidTimeslots: it isn't a time of the day
+
+    Returns:
+        int: minutes since midnight
+    """
+
+    match = CLOCK.match(text)
+    if match is None:
+        raise InvalidTimeslots(f"'{text}' isn't a time like '9:30 AM' or '13:30'")
+
+    hours, minutes, meridiem = int(match.group(1)), int(match.group(2) or 0), (match.group(3) or '').upper()
+    if meridiem:
+        if not 1 <= hours <= 12:
+            raise InvalidTimeslots(f"'{text}' isn't a time like '9:30 AM' or '13:30'")
+        hours = hours % 12 + (12 if meridiem == 'PM' else 0)
+    if hours > 23 or minutes > 59:
+        raise InvalidTimeslots(f"'{text}' isn't a time like '9:30 AM' or '13:30'")
+
+    return hours * 60 + minutes
+
+
+class Timeslot:
+    def __init__(self, label):
+        """A timeslot like '9:30 AM - 10:30 AM' as an interval of minutes since midnight
+
+        Args:
+            label (str): timeslot as it's shown in the timetables
+
+        Raises:
+            InvalidTimeslots: it isn't a start and end time, or it ends before it starts
+        """
+
+        parts = SEPARATOR.split(label.strip())
+        if len(parts) != 2:
+            raise InvalidTimeslots(f"Timeslot '{label}' isn't a start and end time like '9:30 AM - 10:30 AM'")
+
+        self.label = label
+        self.start, self.end = parseClock(parts[0]), parseClock(parts[1])
+        if self.end <= self.start:
+            raise InvalidTimeslots(f"Timeslot '{label}' ends before it starts")
+
+
+    def overlaps(self, other):
+        """Check if two timeslots share any minute"""
+
+        return self.start < other.end and other.start < self.end
+
+
+    def __repr__(self):
+        return f"Timeslot({self.label!r})"
+
+
+class TimeModel:
+    def __init__(self, TIMESLOTS, DAYS):
+        """Timeslots parsed once into minute intervals, with every lookup the engines need worked out up front
+
+        Every timeslot of every day is a column of the timetables, in order of the time of the day. A day can have its own
+        timeslots, the columns of the other days are closed on it
+
+        Args:
+            TIMESLOTS (list(str) or dict): timeslots of a day, or day -> timeslots of that day. Days left out of the dict have no timeslots.
+            DAYS (list(str)): days of the week
+
+        Raises:
+            InvalidTimeslots: a timeslot can't be read, timeslots of a day overlap or the dict has a day that isn't in DAYS
+        """
+
+        self.grids = dict(TIMESLOTS) if isinstance(TIMESLOTS, dict) else {day: list(TIMESLOTS) for day in DAYS} # day -> timeslots
+        unknownDays = [day for day in self.grids if day not in DAYS]
+        if unknownDays:
+            raise InvalidTimeslots(f"Timeslots are given for {', '.join(map(str, unknownDays))} which aren't in the days")
+
+        slots = {label: Timeslot(label) for grid in self.grids.values() for label in grid}
+        self.slots = sorted(slots.values(), key=lambda slot: (slot.start, slot.end))
+        self.labels = [slot.label for slot in self.slots]
+        self.index = {label: timeNo for timeNo, label in enumerate(self.labels)} # timeslot -> column
+
+        self.dayTimes = [] # dayNo -> columns of the day, in order
+        self.openMasks = [] # dayNo -> bitmask of the columns of the day
+        self.previous = [] # dayNo -> column -> column of the timeslot before it that day, None for the first one
+        self.next = [] # dayNo -> column -> column of the timeslot after it that day, None for the last one
+        self.following = [] # dayNo -> column -> column of the timeslot starting right as it ends that day, None after a break
+        for day in DAYS:
+            timeNos = sorted(self.index[label] for label in dict.fromkeys(self.grids.get(day, [])))
+            for timeNo, nextTimeNo in zip(timeNos, timeNos[1:]):
+                if self.slots[timeNo].overlaps(self.slots[nextTimeNo]):
+                    raise InvalidTimeslots(f"Timeslots '{self.labels[timeNo]}' and '{self.labels[nextTimeNo]}' of {day} overlap")
+
+            previous, following, next_ = [None] * len(self.labels), [None] * len(self.labels), [None] * len(self.labels)
+            for timeNo, nextTimeNo in zip(timeNos, timeNos[1:]):
+                previous[nextTimeNo], next_[timeNo] = timeNo, nextTimeNo
+                if self.slots[timeNo].end == self.slots[nextTimeNo].start:
+                    following[timeNo] = nextTimeNo
+
+            self.dayTimes.append(timeNos)
+            self.openMasks.append(sum(1 << timeNo for timeNo in timeNos))
+            self.previous.append(previous)
+            self.next.append(next_)
+            self.following.append(following)
+
+        self.blocks = dict() # (dayNo, length) -> column -> columns of the uninterrupted block starting there
+
+
+    def isOpen(self, dayNo, timeNo):
+        """Check if a column is one of the timeslots of that day"""
+
+        return self.openMasks[dayNo] >> timeNo & 1 == 1
+
+
+    def dayBlocks(self, dayNo, length):
+        """Every run of that many timeslots of a day without a break in between, like the timeslots of a lab
+
+        Args:
+            dayNo (int): day
+            length (int): number of timeslots
+
+        Returns:
+            dict: first column -> tuple of the columns of the run, in order of the time of the day
+        """
+
+        if (dayNo, length) not in self.blocks:
+            blocks = dict()
+            for timeNo in self.dayTimes[dayNo]:
+                block = [timeNo]
+                while len(block) < length and self.following[dayNo][block[-1]] is not None:
+                    block.append(self.following[dayNo][block[-1]])
+                if len(block) == length:
+                    blocks[timeNo] = tuple(block)
+            self.blocks[(dayNo, length)] = blocks
+
+        return self.blocks[(dayNo, length)]
+
+
+    def slotNo(self, dayNo, timeNo):
+        """Bit of a (day, column) in bitmasks over the whole week"""
+
+        return dayNo * len(self.labels) + timeNo
+
+
+    def weekMask(self):
+        """Bitmask over the whole week of every timeslot of every day, see slotNo"""
+
+        return sum(openMask << self.slotNo(dayNo, 0) for dayNo, openMask in enumerate(self.openMasks))
+
+
+    def weekSlots(self):
+        """Number of timeslots in the whole week"""
+
+        return sum(len(timeNos) for timeNos in self.dayTimes)